@@ -2,7 +2,22 @@ import frappe
 from frappe import _
 import pandas as pd
 import numpy as np
+import difflib
+import re
+import time
 from datetime import datetime, timedelta
+from frappe.utils import add_days, cint, getdate, now
+from mkaguzi.utils.analytics_queries import filter_clause, profile_queries, run_query, stream_query
+from mkaguzi.utils.benford import BenfordAnalyzer
+from mkaguzi.utils.journal_entry_rules import JOURNAL_ENTRY_COLUMNS, evaluate_journal_entry_rules
+from mkaguzi.utils.result_store import ResultStore
+
+EXCEPTION_INSERT_BATCH_SIZE = 5000
+STANDARD_CHILD_FIELDS = (
+    'name', 'owner', 'creation', 'modified', 'modified_by', 'docstatus',
+    'idx', 'parent', 'parentfield', 'parenttype'
+)
+
 
 @frappe.whitelist()
 def execute_test(test_id, parameters):
@@ -36,29 +51,45 @@ def execute_test(test_id, parameters):
         frappe.db.commit()
 
         # Execute test based on test type
-        if test.test_category == 'Inventory':
-            results = execute_inventory_test(test, params)
-        elif test.test_category == 'Financial':
-            results = execute_financial_test(test, params)
-        elif test.test_category == 'Sales':
-            results = execute_sales_test(test, params)
-        elif test.test_category == 'Procurement':
-            results = execute_procurement_test(test, params)
-        else:
-            results = execute_generic_test(test, params)
+        with profile_queries() as query_log:
+            if test.test_category == 'Inventory':
+                results = execute_inventory_test(test, params)
+            elif test.test_category == 'Financial':
+                results = execute_financial_test(test, params)
+            elif test.test_category == 'Sales':
+                results = execute_sales_test(test, params)
+            elif test.test_category == 'Procurement':
+                results = execute_procurement_test(test, params)
+            else:
+                results = execute_generic_test(test, params)
+
+        results['query_profile'] = query_log
 
         # Update execution with results
         execution.status = 'Completed'
         execution.total_records_analyzed = results.get('total_records', 0)
         execution.exceptions_found = results.get('exceptions_count', 0)
         execution.result_summary = results.get('summary', '')
-        execution.result_data = frappe.as_json(results.get('data', []))
-
-        # Add exceptions
-        for exc in results.get('exceptions', []):
-            execution.append('exception_details', exc)
+        # Large row sets are spilled to files; the document keeps a pointer
+        results['data'] = ResultStore.store(execution.name, 'data', results.get('data', []))
+        execution.result_data = frappe.as_json(results['data'])
+        execution.queries_executed = len(query_log)
+
+        # Record each query's timing for profiling
+        for query in query_log:
+            execution.append('execution_logs', {
+                'timestamp': datetime.now(),
+                'log_level': 'DEBUG',
+                'step_name': query['name'],
+                'message': f"{query['rows']} rows: {query['sql']}",
+                'duration_ms': int(query['duration_ms'])
+            })
 
         execution.save()
+
+        # Exceptions are written with multi-row INSERTs rather than one
+        # child insert per row on save
+        results['exception_insert'] = insert_exception_details(execution, results.get('exceptions', []))
         frappe.db.commit()
 
         return {
@@ -75,6 +106,49 @@ def execute_test(test_id, parameters):
         frappe.throw(str(e))
 
 
+def insert_exception_details(execution, exceptions, batch_size=EXCEPTION_INSERT_BATCH_SIZE):
+    """
+    Insert exception_details rows for an execution in batches
+
+    Rows bypass child document validation and controller hooks. Keys that
+    are not columns of the child table are ignored. Returns the inserted
+    count, number of INSERT batches, ignored keys and duration.
+    """
+    start_time = time.perf_counter()
+    if not exceptions:
+        return {'inserted': 0, 'batches': 0, 'ignored_fields': [], 'duration_ms': 0}
+
+    child_doctype = execution.meta.get_field('exception_details').options
+    valid_columns = set(frappe.get_meta(child_doctype).get_valid_columns())
+
+    keys = list(dict.fromkeys(key for exc in exceptions for key in exc))
+    data_fields = [key for key in keys if key in valid_columns and key not in STANDARD_CHILD_FIELDS]
+    ignored_fields = [key for key in keys if key not in valid_columns]
+
+    timestamp = now()
+    user = frappe.session.user
+    fields = list(STANDARD_CHILD_FIELDS) + data_fields
+    idx_offset = len(execution.get('exception_details') or [])
+
+    batches = 0
+    for start in range(0, len(exceptions), batch_size):
+        values = [
+            (frappe.generate_hash(length=10), user, timestamp, timestamp, user, 0,
+             idx_offset + start + i + 1, execution.name, 'exception_details', execution.doctype,
+             *(exc.get(field) for field in data_fields))
+            for i, exc in enumerate(exceptions[start:start + batch_size])
+        ]
+        frappe.db.bulk_insert(child_doctype, fields, values, chunk_size=batch_size)
+        batches += 1
+
+    return {
+        'inserted': len(exceptions),
+        'batches': batches,
+        'ignored_fields': ignored_fields,
+        'duration_ms': round((time.perf_counter() - start_time) * 1000, 2)
+    }
+
+
 def execute_inventory_test(test, params):
     """
     Execute inventory-specific tests
@@ -111,97 +185,108 @@ def stock_variance_analysis(params):
         order_by='end_date desc'
     )
 
-    # Query to calculate variance
+    # One scan of the item ledger computes every period bucket per item
+    location_filter = filter_clause('location_code', 'location', location)
     query = f"""
         SELECT
             item.item_no,
             item.description,
             item.item_category_name,
-            COALESCE(opening.quantity, 0) as opening_stock,
-            COALESCE(purchases.quantity, 0) as purchases,
-            COALESCE(sales.quantity, 0) as sales,
-            COALESCE(adjustments.quantity, 0) as adjustments,
-            (COALESCE(opening.quantity, 0) + COALESCE(purchases.quantity, 0) -
-             COALESCE(sales.quantity, 0) + COALESCE(adjustments.quantity, 0)) as expected_closing,
-            COALESCE(closing.quantity, 0) as actual_closing,
-            (COALESCE(closing.quantity, 0) -
-             (COALESCE(opening.quantity, 0) + COALESCE(purchases.quantity, 0) -
-              COALESCE(sales.quantity, 0) + COALESCE(adjustments.quantity, 0))) as variance,
             item.unit_cost,
-            (COALESCE(closing.quantity, 0) -
-             (COALESCE(opening.quantity, 0) + COALESCE(purchases.quantity, 0) -
-              COALESCE(sales.quantity, 0) + COALESCE(adjustments.quantity, 0))) * item.unit_cost as variance_value
+            ledger.opening_stock,
+            ledger.purchases,
+            ledger.sales,
+            ledger.adjustments,
+            ledger.actual_closing
         FROM `tabItem Master` item
         LEFT JOIN (
-            SELECT item_no, SUM(remaining_quantity) as quantity
-            FROM `tabItem Ledger Entry`
-            WHERE data_period = '{prev_period}'
-            {'AND location_code = "' + location + '"' if location else ''}
-            GROUP BY item_no
-        ) opening ON item.item_no = opening.item_no
-        LEFT JOIN (
-            SELECT item_no, SUM(quantity) as quantity
-            FROM `tabItem Ledger Entry`
-            WHERE entry_type = 'Purchase'
-            AND posting_date BETWEEN '{start_date}' AND '{end_date}'
-            {'AND location_code = "' + location + '"' if location else ''}
-            GROUP BY item_no
-        ) purchases ON item.item_no = purchases.item_no
-        LEFT JOIN (
-            SELECT item_no, SUM(ABS(quantity)) as quantity
-            FROM `tabItem Ledger Entry`
-            WHERE entry_type = 'Sale'
-            AND posting_date BETWEEN '{start_date}' AND '{end_date}'
-            {'AND location_code = "' + location + '"' if location else ''}
-            GROUP BY item_no
-        ) sales ON item.item_no = sales.item_no
-        LEFT JOIN (
-            SELECT item_no, SUM(quantity) as quantity
-            FROM `tabItem Ledger Entry`
-            WHERE entry_type IN ('Positive Adjmt', 'Negative Adjmt')
-            AND posting_date BETWEEN '{start_date}' AND '{end_date}'
-            {'AND location_code = "' + location + '"' if location else ''}
-            GROUP BY item_no
-        ) adjustments ON item.item_no = adjustments.item_no
-        LEFT JOIN (
-            SELECT item_no, SUM(remaining_quantity) as quantity
+            SELECT
+                item_no,
+                SUM(CASE WHEN data_period = %(prev_period)s
+                    THEN remaining_quantity ELSE 0 END) as opening_stock,
+                SUM(CASE WHEN entry_type = 'Purchase' AND posting_date BETWEEN %(start_date)s AND %(end_date)s
+                    THEN quantity ELSE 0 END) as purchases,
+                SUM(CASE WHEN entry_type = 'Sale' AND posting_date BETWEEN %(start_date)s AND %(end_date)s
+                    THEN ABS(quantity) ELSE 0 END) as sales,
+                SUM(CASE WHEN entry_type IN ('Positive Adjmt', 'Negative Adjmt')
+                    AND posting_date BETWEEN %(start_date)s AND %(end_date)s
+                    THEN quantity ELSE 0 END) as adjustments,
+                SUM(CASE WHEN data_period = %(period)s
+                    THEN remaining_quantity ELSE 0 END) as actual_closing
             FROM `tabItem Ledger Entry`
-            WHERE data_period = '{period}'
-            {'AND location_code = "' + location + '"' if location else ''}
+            WHERE (data_period IN (%(prev_period)s, %(period)s)
+                OR posting_date BETWEEN %(start_date)s AND %(end_date)s)
+            {location_filter}
             GROUP BY item_no
-        ) closing ON item.item_no = closing.item_no
+        ) ledger ON item.item_no = ledger.item_no
         WHERE item.import_batch IN (
             SELECT name FROM `tabBC Data Import`
-            WHERE data_period = '{period}' AND import_type = 'Item Master Data'
+            WHERE data_period = %(period)s AND import_type = 'Item Master Data'
         )
     """
 
-    data = frappe.db.sql(query, as_dict=True)
+    rows = run_query('stock_variance', query, {
+        'period': period,
+        'prev_period': prev_period,
+        'start_date': start_date,
+        'end_date': end_date,
+        'location': location
+    }, as_dict=False)
 
-    # Calculate variance percentage and flag exceptions
-    exceptions = []
-    for row in data:
-        if row['expected_closing'] != 0:
-            row['variance_percent'] = (row['variance'] / row['expected_closing']) * 100
-        else:
-            row['variance_percent'] = 0 if row['variance'] == 0 else 100
+    frame = pd.DataFrame.from_records(rows, columns=[
+        'item_no', 'description', 'item_category_name', 'unit_cost',
+        'opening_stock', 'purchases', 'sales', 'adjustments', 'actual_closing'
+    ])
 
-        # Flag exceptions
-        if abs(row['variance_percent']) > threshold_percent:
-            exceptions.append({
-                'document_no': row['item_no'],
-                'description': f"{row['description']} - Variance: {row['variance']:.2f} ({row['variance_percent']:.2f}%)",
-                'amount': row['variance_value'],
-                'variance_amount': row['variance_value'],
-                'variance_percent': row['variance_percent'],
-                'risk_rating': 'High' if abs(row['variance_percent']) > 10 else 'Medium',
-                'requires_investigation': True
-            })
+    # Variance and exception flags for all items at once
+    quantities = {
+        column: frame[column].fillna(0).to_numpy(dtype=float)
+        for column in ('opening_stock', 'purchases', 'sales', 'adjustments', 'actual_closing')
+    }
+    unit_cost = frame['unit_cost'].fillna(0).to_numpy(dtype=float)
+
+    expected_closing = (
+        quantities['opening_stock'] + quantities['purchases']
+        - quantities['sales'] + quantities['adjustments']
+    )
+    variance = quantities['actual_closing'] - expected_closing
+    variance_value = variance * unit_cost
+    variance_percent = np.where(
+        expected_closing != 0,
+        np.divide(variance, expected_closing, out=np.zeros_like(variance), where=expected_closing != 0) * 100,
+        np.where(variance == 0, 0.0, 100.0)
+    )
+    exception_mask = np.abs(variance_percent) > threshold_percent
+
+    frame = frame.assign(
+        **quantities,
+        expected_closing=expected_closing,
+        variance=variance,
+        variance_value=variance_value,
+        variance_percent=variance_percent
+    )[[
+        'item_no', 'description', 'item_category_name', 'opening_stock', 'purchases', 'sales',
+        'adjustments', 'expected_closing', 'actual_closing', 'variance', 'unit_cost',
+        'variance_value', 'variance_percent'
+    ]]
+
+    # Flag exceptions
+    exceptions = [{
+        'document_no': row.item_no,
+        'description': f"{row.description} - Variance: {row.variance:.2f} ({row.variance_percent:.2f}%)",
+        'amount': row.variance_value,
+        'variance_amount': row.variance_value,
+        'variance_percent': row.variance_percent,
+        'risk_rating': 'High' if abs(row.variance_percent) > 10 else 'Medium',
+        'requires_investigation': True
+    } for row in frame[exception_mask].itertuples(index=False)]
+
+    data = frame.astype(object).where(frame.notna(), None).to_dict('records')
 
     # Summary statistics
-    total_variance_value = sum([row['variance_value'] for row in data])
-    total_items = len(data)
-    items_with_variance = len([row for row in data if row['variance'] != 0])
+    total_variance_value = float(variance_value.sum())
+    total_items = len(frame)
+    items_with_variance = int(np.count_nonzero(variance))
 
     summary = f"""
     Stock Variance Analysis Summary:
@@ -233,7 +318,7 @@ def abc_analysis(params):
 
     # Query based on classification basis
     if classification_basis == 'Sales Value':
-        query = f"""
+        query = """
             SELECT
                 i.item_no,
                 i.description,
@@ -243,12 +328,12 @@ def abc_analysis(params):
             FROM `tabItem Ledger Entry` l
             JOIN `tabItem Master` i ON l.item_no = i.item_no
             WHERE l.entry_type = 'Sale'
-            AND l.posting_date BETWEEN '{start_date}' AND '{end_date}'
+            AND l.posting_date BETWEEN %(start_date)s AND %(end_date)s
             GROUP BY i.item_no, i.description, i.item_category_name
             ORDER BY value DESC
         """
     elif classification_basis == 'Quantity':
-        query = f"""
+        query = """
             SELECT
                 i.item_no,
                 i.description,
@@ -258,12 +343,12 @@ def abc_analysis(params):
             FROM `tabItem Ledger Entry` l
             JOIN `tabItem Master` i ON l.item_no = i.item_no
             WHERE l.entry_type = 'Sale'
-            AND l.posting_date BETWEEN '{start_date}' AND '{end_date}'
+            AND l.posting_date BETWEEN %(start_date)s AND %(end_date)s
             GROUP BY i.item_no, i.description, i.item_category_name
             ORDER BY value DESC
         """
 
-    data = frappe.db.sql(query, as_dict=True)
+    data = run_query(f"abc_analysis:{classification_basis}", query, {'start_date': start_date, 'end_date': end_date})
 
     # Calculate cumulative percentages
     total_value = sum([row['value'] for row in data])
@@ -314,7 +399,7 @@ def slow_moving_stock(params):
     end_date = period_doc.end_date
     start_date = (datetime.strptime(str(end_date), '%Y-%m-%d') - timedelta(days=days_threshold)).date()
 
-    query = f"""
+    query = """
         SELECT
             i.item_no,
             i.description,
@@ -323,12 +408,12 @@ def slow_moving_stock(params):
             COALESCE(stock.quantity, 0) as current_stock,
             COALESCE(stock.quantity, 0) * i.unit_cost as stock_value,
             COALESCE(last_sale.last_sale_date, '1900-01-01') as last_sale_date,
-            DATEDIFF('{end_date}', COALESCE(last_sale.last_sale_date, '1900-01-01')) as days_since_last_sale
+            DATEDIFF(%(end_date)s, COALESCE(last_sale.last_sale_date, '1900-01-01')) as days_since_last_sale
         FROM `tabItem Master` i
         LEFT JOIN (
             SELECT item_no, SUM(remaining_quantity) as quantity
             FROM `tabItem Ledger Entry`
-            WHERE data_period = '{period}'
+            WHERE data_period = %(period)s
             GROUP BY item_no
         ) stock ON i.item_no = stock.item_no
         LEFT JOIN (
@@ -338,11 +423,15 @@ def slow_moving_stock(params):
             GROUP BY item_no
         ) last_sale ON i.item_no = last_sale.item_no
         WHERE COALESCE(stock.quantity, 0) > 0
-        AND DATEDIFF('{end_date}', COALESCE(last_sale.last_sale_date, '1900-01-01')) > {days_threshold}
+        AND DATEDIFF(%(end_date)s, COALESCE(last_sale.last_sale_date, '1900-01-01')) > %(days_threshold)s
         ORDER BY days_since_last_sale DESC, stock_value DESC
     """
 
-    data = frappe.db.sql(query, as_dict=True)
+    data = run_query('slow_moving_stock', query, {
+        'period': period,
+        'end_date': end_date,
+        'days_threshold': days_threshold
+    })
 
     # Flag all as exceptions
     exceptions = []
@@ -379,7 +468,7 @@ def negative_stock_detection(params):
     """
     period = params.get('period')
 
-    query = f"""
+    query = """
         SELECT
             i.item_no,
             i.description,
@@ -390,13 +479,13 @@ def negative_stock_detection(params):
             SUM(l.remaining_quantity) * i.unit_cost as value
         FROM `tabItem Ledger Entry` l
         JOIN `tabItem Master` i ON l.item_no = i.item_no
-        WHERE l.data_period = '{period}'
+        WHERE l.data_period = %(period)s
         GROUP BY i.item_no, i.description, i.item_category_name, l.location_code, i.unit_cost
         HAVING SUM(l.remaining_quantity) < 0
         ORDER BY quantity ASC
     """
 
-    data = frappe.db.sql(query, as_dict=True)
+    data = run_query('negative_stock', query, {'period': period})
 
     # All negative stock items are exceptions
     exceptions = []
@@ -442,49 +531,37 @@ def execute_financial_test(test, params):
 def duplicate_payment_detection(params):
     """
     Detect potential duplicate payments
+
+    engine='sweep' replaces the SQL self-join with a sort-and-sweep pass
+    (see find_duplicate_payments) and enables fuzzy invoice matching.
     """
     period = params.get('period')
     tolerance_amount = float(params.get('tolerance_amount', 0.01))
     date_range_days = int(params.get('date_range_days', 7))
+    invoice_similarity = float(params.get('invoice_similarity', 0.85))
 
     period_doc = frappe.get_doc('Data Period', period)
     start_date = period_doc.start_date
     end_date = period_doc.end_date
 
-    query = f"""
-        SELECT
-            v1.vendor_no,
-            v1.vendor_name,
-            v1.document_no as doc_no_1,
-            v2.document_no as doc_no_2,
-            v1.posting_date as date_1,
-            v2.posting_date as date_2,
-            v1.amount,
-            v1.vendor_invoice_no as invoice_1,
-            v2.vendor_invoice_no as invoice_2,
-            DATEDIFF(v2.posting_date, v1.posting_date) as days_apart
-        FROM `tabVendor Ledger Entry` v1
-        JOIN `tabVendor Ledger Entry` v2
-            ON v1.vendor_no = v2.vendor_no
-            AND ABS(v1.amount - v2.amount) <= {tolerance_amount}
-            AND v1.document_no < v2.document_no
-            AND DATEDIFF(v2.posting_date, v1.posting_date) <= {date_range_days}
-        WHERE v1.document_type = 'Payment'
-        AND v2.document_type = 'Payment'
-        AND v1.posting_date BETWEEN '{start_date}' AND '{end_date}'
-        ORDER BY v1.amount DESC
-    """
-
-    data = frappe.db.sql(query, as_dict=True)
+    if params.get('engine') == 'sweep':
+        data = find_duplicate_payments(
+            start_date, end_date, tolerance_amount, date_range_days,
+            invoice_similarity, cint(params.get('require_invoice_match'))
+        )
+    else:
+        data = duplicate_payment_self_join(start_date, end_date, tolerance_amount, date_range_days)
 
     # Create exceptions
     exceptions = []
     for row in data:
+        similar_invoices = row.get('invoice_similarity', 0) >= invoice_similarity
         exceptions.append({
             'document_no': f"{row['doc_no_1']} & {row['doc_no_2']}",
-            'description': f"Potential duplicate payment to {row['vendor_name']} - Same amount (KES {row['amount']:,.2f}) paid {row['days_apart']} days apart",
+            'description': f"Potential duplicate payment to {row['vendor_name']} - Same amount (KES {row['amount']:,.2f}) paid {row['days_apart']} days apart"
+                + (f" - Similar invoices {row['invoice_1']} / {row['invoice_2']}" if similar_invoices else ''),
             'amount': row['amount'],
-            'risk_rating': 'High' if row['days_apart'] <= 3 else 'Medium',
+            'risk_rating': 'High' if row['days_apart'] <= 3 or similar_invoices else 'Medium',
             'requires_investigation': True
         })
 
@@ -506,12 +583,201 @@ def duplicate_payment_detection(params):
     }
 
 
+def duplicate_payment_self_join(start_date, end_date, tolerance_amount, date_range_days):
+    """
+    Candidate duplicate payment pairs from a self-join of the vendor ledger
+    """
+    query = """
+        SELECT
+            v1.vendor_no,
+            v1.vendor_name,
+            v1.document_no as doc_no_1,
+            v2.document_no as doc_no_2,
+            v1.posting_date as date_1,
+            v2.posting_date as date_2,
+            v1.amount,
+            v1.vendor_invoice_no as invoice_1,
+            v2.vendor_invoice_no as invoice_2,
+            ABS(DATEDIFF(v2.posting_date, v1.posting_date)) as days_apart
+        FROM `tabVendor Ledger Entry` v1
+        JOIN `tabVendor Ledger Entry` v2
+            ON v1.vendor_no = v2.vendor_no
+            AND ABS(v1.amount - v2.amount) <= %(tolerance_amount)s
+            AND v1.document_no < v2.document_no
+            AND DATEDIFF(v2.posting_date, v1.posting_date) <= %(date_range_days)s
+        WHERE v1.document_type = 'Payment'
+        AND v2.document_type = 'Payment'
+        AND v1.posting_date BETWEEN %(start_date)s AND %(end_date)s
+        ORDER BY v1.amount DESC
+    """
+
+    return run_query('duplicate_payments', query, {
+        'tolerance_amount': tolerance_amount,
+        'date_range_days': date_range_days,
+        'start_date': start_date,
+        'end_date': end_date
+    })
+
+
+def find_duplicate_payments(start_date, end_date, tolerance_amount, date_range_days,
+                            invoice_similarity=0.85, require_invoice_match=False):
+    """
+    Candidate duplicate payment pairs by sort-and-sweep
+
+    Payments are read once and put in tolerance-wide amount buckets per
+    vendor; each payment also joins the bucket below as a guest, so any two
+    payments within the tolerance share exactly one bucket. Within a bucket
+    payments are ordered by date and each is compared with the one k places
+    later: each pass keeps only the payments still within date_range_days
+    at the previous offset and the sweep stops when none are left. The work
+    grows with the pairs inside both the amount and the date window, so
+    recurring same-amount payments (rent, retainers) stay near-linear.
+    The earlier document of a pair must be posted in the period. Rows match
+    the self-join shape plus an invoice_similarity score.
+    """
+    payments = run_query('duplicate_payments_sweep', """
+        SELECT vendor_no, vendor_name, document_no, posting_date, amount, vendor_invoice_no
+        FROM `tabVendor Ledger Entry`
+        WHERE document_type = 'Payment'
+        AND posting_date BETWEEN %(window_start)s AND %(window_end)s
+        ORDER BY vendor_no, posting_date
+    """, {
+        'window_start': add_days(start_date, -date_range_days),
+        'window_end': add_days(end_date, date_range_days)
+    }, as_dict=False)
+
+    if not payments:
+        return []
+
+    frame = pd.DataFrame.from_records(payments, columns=[
+        'vendor_no', 'vendor_name', 'document_no', 'posting_date', 'amount', 'vendor_invoice_no'
+    ])
+    vendors = pd.factorize(frame['vendor_no'])[0]
+    amounts = frame['amount'].to_numpy(dtype=float)
+    days = pd.to_datetime(frame['posting_date']).to_numpy().astype('datetime64[D]').astype(np.int64)
+    period_start = np.datetime64(getdate(start_date), 'D').astype(np.int64)
+    period_end = np.datetime64(getdate(end_date), 'D').astype(np.int64)
+
+    count = len(frame)
+    if tolerance_amount > 0:
+        # Slightly wider than the tolerance so rounding in the division can
+        # never put two payments within the tolerance more than one bucket apart
+        buckets = np.floor(amounts / (tolerance_amount * (1 + 1e-9))).astype(np.int64)
+        rows = np.concatenate([np.arange(count), np.arange(count)])
+        groups = np.concatenate([buckets, buckets - 1])
+        home = np.arange(2 * count) < count
+    else:
+        rows = np.arange(count)
+        groups = pd.factorize(amounts)[0]
+        home = np.ones(count, dtype=bool)
+
+    order = np.lexsort((days[rows], groups, vendors[rows]))
+    rows, groups, home = rows[order], groups[order], home[order]
+    row_vendors, row_days = vendors[rows], days[rows]
+
+    # Dates are sorted within a bucket, so once payment i is out of the date
+    # window at offset k it stays out for every larger offset: each pass
+    # only compares the payments still in the window at the last one
+    left_parts, right_parts = [], []
+    active = np.arange(len(rows))
+    for offset in range(1, len(rows)):
+        active = active[active + offset < len(rows)]
+        right = active + offset
+        in_date_window = (
+            (row_vendors[active] == row_vendors[right])
+            & (groups[active] == groups[right])
+            & (row_days[right] - row_days[active] <= date_range_days)
+        )
+
+        active, right = active[in_date_window], right[in_date_window]
+        if not len(active):
+            break
+
+        # Two guests are a pair of the bucket above, found there
+        keep = (home[active] | home[right]) & (
+            np.abs(amounts[rows[right]] - amounts[rows[active]]) <= tolerance_amount
+        )
+        left_parts.append(rows[active[keep]])
+        right_parts.append(rows[right[keep]])
+
+    if not left_parts:
+        return []
+
+    left = np.concatenate(left_parts)
+    right = np.concatenate(right_parts)
+
+    # Orient each pair by document number, as the self-join does
+    documents = frame['document_no'].astype(str).to_numpy()
+    swap = documents[left] > documents[right]
+    first = np.where(swap, right, left)
+    second = np.where(swap, left, right)
+
+    keep = (documents[first] != documents[second]) & (days[first] >= period_start) & (days[first] <= period_end)
+    first, second = first[keep], second[keep]
+
+    invoices = frame['vendor_invoice_no'].to_numpy()
+    data = []
+    for i, j in zip(first.tolist(), second.tolist()):
+        similarity = invoice_number_similarity(invoices[i], invoices[j])
+        if require_invoice_match and similarity < invoice_similarity:
+            continue
+
+        data.append({
+            'vendor_no': frame.at[i, 'vendor_no'],
+            'vendor_name': frame.at[i, 'vendor_name'],
+            'doc_no_1': documents[i],
+            'doc_no_2': documents[j],
+            'date_1': frame.at[i, 'posting_date'],
+            'date_2': frame.at[j, 'posting_date'],
+            'amount': float(amounts[i]),
+            'invoice_1': invoices[i],
+            'invoice_2': invoices[j],
+            'days_apart': int(abs(days[j] - days[i])),
+            'invoice_similarity': round(similarity, 3)
+        })
+
+    data.sort(key=lambda row: row['amount'], reverse=True)
+    return data
+
+
+def invoice_number_similarity(invoice_1, invoice_2):
+    """
+    Similarity (0-1) of two vendor invoice numbers after normalisation
+
+    Case, punctuation and leading zeros are ignored, so "INV-0042" and
+    "inv 42" score 1.0.
+    """
+    normalised = [
+        re.sub(r'(?<![0-9])0+(?=[0-9])', '', re.sub(r'[^0-9A-Z]', '', str(invoice or '').upper()))
+        for invoice in (invoice_1, invoice_2)
+    ]
+
+    if not all(normalised):
+        return 0.0
+
+    if normalised[0] == normalised[1]:
+        return 1.0
+
+    return difflib.SequenceMatcher(None, normalised[0], normalised[1]).ratio()
+
+
 def benfords_law_analysis(params):
     """
     Apply Benford's Law to detect anomalies in financial data
+
+    Amounts are streamed from the database in chunks into a BenfordAnalyzer,
+    which runs the first-digit, second-digit, first-two-digit and
+    last-two-digit tests with MAD conformity. For GL Entries, segment_by
+    (account_no, user_id or source_code) adds a first-digit test per
+    segment in the same pass.
     """
     period = params.get('period')
     data_source = params.get('data_source', 'GL Entries')  # GL Entries, Sales, Purchases
+    segment_by = params.get('segment_by') if data_source == 'GL Entries' else None
+    min_segment_records = cint(params.get('min_segment_records', 300))
+
+    if segment_by and segment_by not in ('account_no', 'user_id', 'source_code'):
+        frappe.throw(_("Benford's analysis can only be segmented by account_no, user_id or source_code"))
 
     period_doc = frappe.get_doc('Data Period', period)
     start_date = period_doc.start_date
@@ -520,65 +786,48 @@ def benfords_law_analysis(params):
     # Get data based on source
     if data_source == 'GL Entries':
         query = f"""
-            SELECT ABS(amount) as amount
+            SELECT ABS(amount) as amount{', ' + segment_by if segment_by else ''}
             FROM `tabGL Entry`
-            WHERE posting_date BETWEEN '{start_date}' AND '{end_date}'
+            WHERE posting_date BETWEEN %(start_date)s AND %(end_date)s
             AND ABS(amount) >= 10
         """
     elif data_source == 'Sales':
-        query = f"""
+        query = """
             SELECT amount
             FROM `tabSales Invoice Header`
-            WHERE posting_date BETWEEN '{start_date}' AND '{end_date}'
+            WHERE posting_date BETWEEN %(start_date)s AND %(end_date)s
             AND amount >= 10
         """
     elif data_source == 'Purchases':
-        query = f"""
+        query = """
             SELECT amount
             FROM `tabPurchase Invoice Header`
-            WHERE posting_date BETWEEN '{start_date}' AND '{end_date}'
+            WHERE posting_date BETWEEN %(start_date)s AND %(end_date)s
             AND amount >= 10
         """
 
-    amounts = frappe.db.sql(query, as_dict=True)
-
-    # Expected Benford distribution for first digit
-    benford_expected = {
-        '1': 30.1, '2': 17.6, '3': 12.5, '4': 9.7, '5': 7.9,
-        '6': 6.7, '7': 5.8, '8': 5.1, '9': 4.6
-    }
-
-    # Calculate actual distribution
-    first_digits = {}
-    for row in amounts:
-        first_digit = str(int(row['amount']))[0]
-        first_digits[first_digit] = first_digits.get(first_digit, 0) + 1
-
-    total = len(amounts)
-    actual_distribution = {}
-    variance_data = []
-
-    for digit in '123456789':
-        count = first_digits.get(digit, 0)
-        actual_percent = (count / total * 100) if total > 0 else 0
-        expected_percent = benford_expected[digit]
-        variance = actual_percent - expected_percent
-
-        actual_distribution[digit] = actual_percent
-        variance_data.append({
-            'digit': digit,
-            'expected_percent': expected_percent,
-            'actual_percent': round(actual_percent, 2),
-            'variance': round(variance, 2),
-            'count': count
-        })
+    analyzer = BenfordAnalyzer()
+    for chunk in stream_query(f"benford:{data_source}", query, {'start_date': start_date, 'end_date': end_date}):
+        columns = list(zip(*chunk))
+        analyzer.add(
+            np.array(columns[0], dtype=np.float64),
+            columns[1] if segment_by else None
+        )
 
-    # Calculate chi-square statistic
-    chi_square = sum([
-        ((first_digits.get(d, 0) - (benford_expected[d]/100 * total)) ** 2) /
-        (benford_expected[d]/100 * total)
-        for d in '123456789'
-    ])
+    tests = analyzer.results()
+    first_digit = tests['first_digit']
+    total = analyzer.total
+    chi_square = first_digit['chi_square']
+
+    variance_data = [{
+        'digit': str(row['digit']),
+        'expected_percent': round(row['expected_percent'], 1),
+        'actual_percent': row['actual_percent'],
+        'variance': round(row['actual_percent'] - row['expected_percent'], 2),
+        'count': row['count']
+    } for row in first_digit['distribution']]
+    actual_distribution = {row['digit']: row['actual_percent'] for row in variance_data}
+    benford_expected = {row['digit']: row['expected_percent'] for row in variance_data}
 
     # Flag significant variances as exceptions
     exceptions = []
@@ -592,6 +841,17 @@ def benfords_law_analysis(params):
                 'requires_investigation': True
             })
 
+    # Segments whose own first-digit distribution does not conform
+    segments = analyzer.segment_results(min_segment_records) if segment_by else []
+    for segment in segments:
+        if segment['conformity'] == 'Nonconformity':
+            exceptions.append({
+                'document_no': f"{segment_by}: {segment['segment']}",
+                'description': f"First-digit nonconformity for {segment_by} {segment['segment']}: MAD {segment['mad']:.4f} over {segment['records']} amounts",
+                'risk_rating': 'High',
+                'requires_investigation': True
+            })
+
     # Interpret chi-square (critical value for 8 df at 95% confidence is 15.507)
     conformance = "CONFORMS" if chi_square < 15.507 else "DOES NOT CONFORM"
 
@@ -600,6 +860,9 @@ def benfords_law_analysis(params):
     - Data Source: {data_source}
     - Records Analyzed: {total}
     - Chi-Square Statistic: {chi_square:.2f}
+    - First Digit MAD: {first_digit['mad']:.4f} ({first_digit['conformity']})
+    - Second Digit MAD: {tests['second_digit']['mad']:.4f} ({tests['second_digit']['conformity']})
+    - First Two Digits MAD: {tests['first_two_digits']['mad']:.4f} ({tests['first_two_digits']['conformity']})
     - Conclusion: Data {conformance} to Benford's Law
     - Significant Variances: {len(exceptions)}
 
@@ -612,6 +875,8 @@ def benfords_law_analysis(params):
         'summary': summary,
         'data': variance_data,
         'exceptions': exceptions,
+        'digit_tests': tests,
+        'segments': segments,
         'chart_data': {
             'labels': list('123456789'),
             'expected': [benford_expected[d] for d in '123456789'],
@@ -630,138 +895,24 @@ def journal_entry_analysis(params):
     start_date = period_doc.start_date
     end_date = period_doc.end_date
 
-    findings = {
-        'round_numbers': [],
-        'weekend_postings': [],
-        'large_entries': [],
-        'unbalanced_entries': []
-    }
-
-    # 1. Round number entries (potentially suspicious)
-    query = f"""
-        SELECT
-            document_no,
-            posting_date,
-            account_no,
-            account_name,
-            amount,
-            description,
-            user_id
-        FROM `tabGL Entry`
-        WHERE posting_date BETWEEN '{start_date}' AND '{end_date}'
-        AND source_code = 'GENJNL'
-        AND amount % 1000 = 0
-        AND ABS(amount) >= 10000
-        ORDER BY ABS(amount) DESC
-        LIMIT 100
-    """
-
-    findings['round_numbers'] = frappe.db.sql(query, as_dict=True)
-
-    # 2. Weekend or holiday postings
-    query = f"""
-        SELECT
-            document_no,
-            posting_date,
-            DAYOFWEEK(posting_date) as day_of_week,
-            account_no,
-            account_name,
-            amount,
-            description,
-            user_id
-        FROM `tabGL Entry`
-        WHERE posting_date BETWEEN '{start_date}' AND '{end_date}'
-        AND source_code = 'GENJNL'
-        AND DAYOFWEEK(posting_date) IN (1, 7)  -- Sunday=1, Saturday=7
-        ORDER BY posting_date DESC
-    """
-
-    findings['weekend_postings'] = frappe.db.sql(query, as_dict=True)
-
-    # 3. Large manual entries (above threshold)
-    threshold_amount = params.get('threshold_amount', 1000000)
-
+    # One scan of the period's manual journals feeds every rule
     query = f"""
-        SELECT
-            document_no,
-            posting_date,
-            account_no,
-            account_name,
-            amount,
-            description,
-            user_id
+        SELECT {', '.join(JOURNAL_ENTRY_COLUMNS)}
         FROM `tabGL Entry`
-        WHERE posting_date BETWEEN '{start_date}' AND '{end_date}'
+        WHERE posting_date BETWEEN %(start_date)s AND %(end_date)s
         AND source_code = 'GENJNL'
-        AND ABS(amount) > {threshold_amount}
-        ORDER BY ABS(amount) DESC
     """
 
-    findings['large_entries'] = frappe.db.sql(query, as_dict=True)
-
-    # 4. Unbalanced journal entries
-    query = f"""
-        SELECT
-            document_no,
-            posting_date,
-            SUM(debit_amount) as total_debit,
-            SUM(credit_amount) as total_credit,
-            ABS(SUM(debit_amount) - SUM(credit_amount)) as imbalance
-        FROM `tabGL Entry`
-        WHERE posting_date BETWEEN '{start_date}' AND '{end_date}'
-        GROUP BY document_no, posting_date
-        HAVING ABS(SUM(debit_amount) - SUM(credit_amount)) > 0.01
-        ORDER BY imbalance DESC
-    """
-
-    findings['unbalanced_entries'] = frappe.db.sql(query, as_dict=True)
-
-    # Compile exceptions
-    exceptions = []
-
-    for entry in findings['round_numbers'][:20]:  # Top 20
-        exceptions.append({
-            'document_no': entry['document_no'],
-            'description': f"Round number entry: KES {entry['amount']:,.2f} - {entry['description']}",
-            'amount': entry['amount'],
-            'risk_rating': 'Medium',
-            'requires_investigation': True
-        })
-
-    for entry in findings['weekend_postings']:
-        day_name = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'][entry['day_of_week'] - 1]
-        exceptions.append({
-            'document_no': entry['document_no'],
-            'description': f"Weekend posting on {day_name} - {entry['description']}",
-            'amount': entry['amount'],
-            'risk_rating': 'Medium',
-            'requires_investigation': True
-        })
-
-    for entry in findings['large_entries']:
-        exceptions.append({
-            'document_no': entry['document_no'],
-            'description': f"Large manual entry: KES {entry['amount']:,.2f} - {entry['description']}",
-            'amount': entry['amount'],
-            'risk_rating': 'High',
-            'requires_investigation': True
-        })
-
-    for entry in findings['unbalanced_entries']:
-        exceptions.append({
-            'document_no': entry['document_no'],
-            'description': f"Unbalanced entry - Imbalance: KES {entry['imbalance']:,.2f}",
-            'amount': entry['imbalance'],
-            'risk_rating': 'Critical',
-            'requires_investigation': True
-        })
+    findings, exceptions, rule_stats = evaluate_journal_entry_rules(
+        stream_query('je_journal_entries', query, {'start_date': start_date, 'end_date': end_date}),
+        params
+    )
 
+    rule_lines = '\n'.join(f"    - {stat['label']}: {stat['count']}" for stat in rule_stats['rules'])
     summary = f"""
     Journal Entry Analysis:
-    - Round Number Entries: {len(findings['round_numbers'])}
-    - Weekend/Holiday Postings: {len(findings['weekend_postings'])}
-    - Large Manual Entries: {len(findings['large_entries'])}
-    - Unbalanced Entries: {len(findings['unbalanced_entries'])}
+    - Journal Lines Scanned: {rule_stats['rows_scanned']}
+{rule_lines}
     - Total Exceptions: {len(exceptions)}
     """
 
@@ -770,7 +921,8 @@ def journal_entry_analysis(params):
         'exceptions_count': len(exceptions),
         'summary': summary,
         'data': findings,
-        'exceptions': exceptions
+        'exceptions': exceptions,
+        'rule_stats': rule_stats
     }
 
 
@@ -792,19 +944,65 @@ def execute_generic_test(test, params):
 
 
 @frappe.whitelist()
-def get_test_results(execution_id):
+def get_test_results(execution_id, table=None, start=0, page_length=100, columns=None, paginate=False):
     """
     Retrieve test execution results
+
+    By default the complete data and exceptions are returned, as before.
+    With paginate=1 only one page of the requested result table and
+    columns is read, whether the rows are inline on the execution or
+    spilled to a file, together with the same page of exceptions.
     """
-    execution = frappe.get_doc('Test Execution', execution_id)
+    execution = frappe.db.get_value('Test Execution', execution_id, [
+        'name', 'test_reference', 'status', 'total_records_analyzed',
+        'exceptions_found', 'result_summary', 'result_data'
+    ], as_dict=True)
+    if not execution:
+        frappe.throw(_("Test Execution {0} not found").format(execution_id))
 
-    return {
+    stored = frappe.parse_json(execution.result_data) if execution.result_data else []
+    exception_doctype = frappe.get_meta('Test Execution').get_field('exception_details').options
+    exception_filters = {'parent': execution.name, 'parenttype': 'Test Execution', 'parentfield': 'exception_details'}
+
+    response = {
         'execution_id': execution.name,
         'test_name': execution.test_reference,
         'status': execution.status,
         'total_records': execution.total_records_analyzed,
         'exceptions_count': execution.exceptions_found,
-        'summary': execution.result_summary,
-        'data': frappe.parse_json(execution.result_data) if execution.result_data else [],
-        'exceptions': [exc.as_dict() for exc in execution.exception_details]
-    }
\ No newline at end of file
+        'summary': execution.result_summary
+    }
+
+    if not cint(paginate):
+        response.update({
+            'data': ResultStore.load(stored),
+            'exceptions': frappe.get_all(exception_doctype, filters=exception_filters,
+                fields=['*'], order_by='idx asc')
+        })
+        return response
+
+    start = cint(start)
+    page_length = cint(page_length) or 100
+    if isinstance(columns, str):
+        columns = frappe.parse_json(columns) if columns.startswith('[') else columns.split(',')
+
+    page = ResultStore.read_page(stored, table, start, page_length, columns)
+    exceptions = frappe.get_all(exception_doctype,
+        filters=exception_filters,
+        fields=['*'],
+        order_by='idx asc',
+        limit_start=start,
+        limit_page_length=page_length
+    )
+
+    response.update({
+        'table': page['table'],
+        'tables': page['tables'],
+        'columns': page['columns'],
+        'total_rows': page['total_rows'],
+        'start': start,
+        'page_length': page_length,
+        'data': page['rows'],
+        'exceptions': exceptions
+    })
+    return response
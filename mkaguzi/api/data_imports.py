@@ -1,9 +1,24 @@
 import frappe
 from frappe import _
+from frappe.utils import cint, now
+from frappe.utils.background_jobs import get_job
 import pandas as pd
+import math
 import os
 from datetime import datetime
 
+# Rows per batch, and per checkpoint commit, when processing imports
+DEFAULT_IMPORT_BATCH_SIZE = 5000
+
+# Row-level validation errors listed per column and error type; the rest are summarized
+MAX_ERRORS_PER_COLUMN = 100
+
+# Seconds a queued import may run on the long queue
+IMPORT_JOB_TIMEOUT = 4 * 60 * 60
+
+# A started import job whose worker has not sent a heartbeat for this long is treated as crashed
+IMPORT_JOB_STALE_SECONDS = 5 * 60
+
 @frappe.whitelist()
 def upload_csv(import_type):
     """
@@ -72,47 +87,10 @@ def validate_import(import_id):
             })
             validation_results['status'] = 'Fail'
 
-        # 2. Validate data types
-        for index, row in df.iterrows():
-            for mapping in import_type.field_mappings:
-                col_name = mapping.csv_column_name
-                if col_name not in df.columns:
-                    continue
-
-                value = row[col_name]
-
-                # Check required fields
-                if mapping.is_required and pd.isna(value):
-                    validation_results['errors'].append({
-                        'row': index + 2,  # +2 for header and 0-index
-                        'column': col_name,
-                        'type': 'Required Field',
-                        'message': f"{col_name} is required but empty"
-                    })
-
-                # Check data type
-                if not pd.isna(value):
-                    if mapping.data_type == 'Number' and not isinstance(value, (int, float)):
-                        try:
-                            float(value)
-                        except:
-                            validation_results['errors'].append({
-                                'row': index + 2,
-                                'column': col_name,
-                                'type': 'Data Type',
-                                'message': f"{col_name} should be numeric"
-                            })
-
-                    elif mapping.data_type == 'Date':
-                        try:
-                            pd.to_datetime(value)
-                        except:
-                            validation_results['errors'].append({
-                                'row': index + 2,
-                                'column': col_name,
-                                'type': 'Data Type',
-                                'message': f"{col_name} is not a valid date"
-                            })
+        # 2. Validate required fields and data types column by column
+        column_errors, error_summary = validate_columns(df, import_type.field_mappings)
+        validation_results['errors'].extend(column_errors)
+        validation_results['error_summary'] = error_summary
 
         # 3. Business rule validations
         if import_doc.import_type == 'General Ledger Entries':
@@ -139,7 +117,10 @@ def validate_import(import_id):
         # Update import doc with validation results
         import_doc.status = 'Validated' if validation_results['status'] == 'Pass' else 'Validation Failed'
         import_doc.total_rows = validation_results['total_rows']
-        import_doc.failed_rows = len(validation_results['errors'])
+        import_doc.failed_rows = (
+            len(validation_results['errors']) - len(column_errors)
+            + sum(summary['count'] for summary in error_summary.values())
+        )
         import_doc.warnings_count = len(validation_results['warnings'])
 
         # Save validation errors
@@ -162,77 +143,171 @@ def validate_import(import_id):
 
 
 @frappe.whitelist()
-def process_import(import_id):
+def process_import(import_id, mode='row', batch_size=DEFAULT_IMPORT_BATCH_SIZE, run_now=False, partitions=1):
+    """
+    Queue a validated CSV import on the long worker queue
+
+    mode='row' inserts one document per row through the full controller;
+    mode='bulk' converts columns in bulk and writes rows through multi-row
+    INSERTs. Either way rows are committed every batch_size rows. Pass
+    run_now=1 to process inside the request instead, or partitions=N to
+    split the file into N row ranges processed by parallel workers.
+    """
+    import_doc = frappe.get_doc('BC Data Import', import_id)
+
+    if import_doc.status != 'Validated':
+        frappe.throw(_("Import must be validated before processing"))
+
+    if cint(partitions) > 1:
+        return queue_partitioned_import(import_doc, mode, batch_size, cint(partitions))
+
+    return queue_import(import_doc, mode, batch_size, run_now)
+
+
+@frappe.whitelist()
+def resume_import(import_id, mode='row', batch_size=DEFAULT_IMPORT_BATCH_SIZE, run_now=False):
+    """
+    Re-queue an import interrupted by a worker crash or error
+
+    Processing restarts after the last committed checkpoint. A job left
+    registered by a crashed worker is cleared first; one that is still
+    queued or running blocks the resume. Queued imports can be resumed
+    too: their job may have been lost before a worker picked it up.
+    """
+    import_doc = frappe.get_doc('BC Data Import', import_id)
+
+    if import_doc.status not in ('Queued', 'Processing', 'Failed'):
+        frappe.throw(_("Only interrupted imports can be resumed"))
+
+    if cint(import_doc.partitions) > 1:
+        frappe.throw(_("Partitioned imports cannot be resumed; re-validate and process the file again"))
+
+    if not cint(run_now):
+        clear_stale_import_job(import_job_id(import_id))
+
+    return queue_import(import_doc, mode, batch_size, run_now, resume=True)
+
+
+def import_job_id(import_id):
+    return f"data_import::{import_id}"
+
+
+def clear_stale_import_job(job_id):
+    """
+    Drop a previous job for the import unless a worker is still running it
+
+    A worker killed mid-job leaves the job marked started until RQ cleans
+    up its registry, which would make the deduplicated enqueue a no-op.
+    """
+    job = get_job(job_id)
+    if not job:
+        return
+
+    status = job.get_status(refresh=False)
+    if status == 'queued':
+        frappe.throw(_("Import is already queued"))
+
+    if status == 'started':
+        heartbeat = job.last_heartbeat
+        if heartbeat and (datetime.utcnow() - heartbeat).total_seconds() < IMPORT_JOB_STALE_SECONDS:
+            frappe.throw(_("Import is still running"))
+
+    job.delete()
+
+
+def queue_import(import_doc, mode, batch_size, run_now=False, resume=False):
     """
-    Process validated CSV import
+    Mark an import as queued and hand it to a long-queue worker
     """
+    batch_size = cint(batch_size) or DEFAULT_IMPORT_BATCH_SIZE
+
+    if not resume:
+        import_doc.status = 'Queued'
+        import_doc.partitions = 0
+        import_doc.save()
+        frappe.db.commit()
+
+    if cint(run_now):
+        return run_import(import_doc.name, mode, batch_size)
+
+    frappe.enqueue(
+        'mkaguzi.api.data_imports.run_import',
+        queue='long',
+        timeout=IMPORT_JOB_TIMEOUT,
+        job_id=import_job_id(import_doc.name),
+        deduplicate=True,
+        import_id=import_doc.name,
+        mode=mode,
+        batch_size=batch_size
+    )
+
+    return {
+        'success': True,
+        'queued': True,
+        'import_id': import_doc.name,
+        'message': _("Import queued for processing")
+    }
+
+
+def run_import(import_id, mode='row', batch_size=DEFAULT_IMPORT_BATCH_SIZE):
+    """
+    Process a queued import, committing a checkpoint after every batch
+
+    successfully_imported and failed_rows are committed in the same
+    transaction as the rows they count, so an import left in Processing
+    resumes from successfully_imported + failed_rows.
+    """
+    import_doc = None
+
     try:
         import_doc = frappe.get_doc('BC Data Import', import_id)
 
-        if import_doc.status != 'Validated':
-            frappe.throw(_("Import must be validated before processing"))
-
-        # Update status
+        if import_doc.status in ('Processing', 'Failed'):
+            start_row = cint(import_doc.successfully_imported) + cint(import_doc.failed_rows)
+        else:
+            start_row = 0
+            import_doc.successfully_imported = 0
+            import_doc.failed_rows = 0
+
+        # Checkpoints write the counters and new error rows only; saving the
+        # document would rewrite the whole, growing error_log every batch.
+        # Marked Processing before the file is read, so a worker killed
+        # while loading it leaves an import that can be resumed
         import_doc.status = 'Processing'
-        import_doc.save()
+        update_import_counters(import_doc, 'status')
         frappe.db.commit()
 
         # Get import configuration
         import_type = frappe.get_doc('CSV Import Type', import_doc.import_type)
-        target_doctype = import_type.target_doctype
 
         # Read CSV
         df = pd.read_csv(import_doc.import_file)
+        import_doc.total_rows = len(df)
+        update_import_counters(import_doc, 'total_rows')
+        frappe.db.commit()
 
-        success_count = 0
-        error_count = 0
-
-        # Process each row
-        for index, row in df.iterrows():
-            try:
-                # Map CSV columns to DocType fields
-                doc_data = {'doctype': target_doctype}
-
-                for mapping in import_type.field_mappings:
-                    csv_col = mapping.csv_column_name
-                    target_field = mapping.target_field
-
-                    if csv_col in row and not pd.isna(row[csv_col]):
-                        value = row[csv_col]
-
-                        # Apply transformations
-                        if mapping.data_type == 'Date':
-                            value = pd.to_datetime(value).date()
-                        elif mapping.data_type == 'Currency' or mapping.data_type == 'Number':
-                            value = float(value)
-
-                        doc_data[target_field] = value
-
-                # Add import batch reference
-                doc_data['import_batch'] = import_doc.name
-                doc_data['data_period'] = import_doc.import_period
-
-                # Create document
-                doc = frappe.get_doc(doc_data)
-                doc.insert(ignore_permissions=True)
-                success_count += 1
-
-            except Exception as e:
-                error_count += 1
-                import_doc.append('error_log', {
-                    'row_number': index + 2,
-                    'error_type': 'Import Error',
-                    'error_message': str(e),
-                    'row_data': str(row.to_dict())
-                })
+        for batch_start in range(start_row, len(df), batch_size):
+            batch = df.iloc[batch_start:batch_start + batch_size]
+            success_count, errors = import_batch(batch, import_type, import_doc, mode, batch_size)
+
+            insert_error_rows(import_doc.name, errors)
+            import_doc.successfully_imported = cint(import_doc.successfully_imported) + success_count
+            import_doc.failed_rows = cint(import_doc.failed_rows) + len(errors)
+            update_import_counters(import_doc)
+            frappe.db.commit()
+
+            publish_import_progress(import_doc)
+
+        success_count = cint(import_doc.successfully_imported)
+        error_count = cint(import_doc.failed_rows)
 
         # Update import status
         import_doc.status = 'Completed' if error_count == 0 else 'Partially Completed'
-        import_doc.successfully_imported = success_count
-        import_doc.failed_rows = error_count
-        import_doc.save()
+        update_import_counters(import_doc, 'status')
         frappe.db.commit()
 
+        publish_import_progress(import_doc)
+
         return {
             'success': True,
             'imported': success_count,
@@ -241,26 +316,486 @@ def process_import(import_id):
         }
 
     except Exception as e:
-        import_doc.status = 'Failed'
-        import_doc.save()
-        frappe.db.commit()
+        frappe.db.rollback()
+        if import_doc:
+            frappe.db.set_value('BC Data Import', import_doc.name, 'status', 'Failed')
+            frappe.db.commit()
         frappe.log_error(frappe.get_traceback(), _("CSV Import Processing Error"))
         frappe.throw(str(e))
 
 
+def update_import_counters(import_doc, *fields):
+    """
+    Write the progress counters, and any extra fields, without saving the document
+    """
+    fields = ('successfully_imported', 'failed_rows', *fields)
+    frappe.db.set_value('BC Data Import', import_doc.name, {field: import_doc.get(field) for field in fields})
+
+
+def queue_partitioned_import(import_doc, mode, batch_size, partitions):
+    """
+    Split an import into row-range shards and queue one worker per shard
+
+    Each worker has its own DB connection and adds its counters and
+    error_log rows to the shared import record; the worker that completes
+    the last row sets the final status. The partition count is kept on the
+    import record so a failed partitioned import is never resumed as a
+    sequential one.
+    """
+    batch_size = cint(batch_size) or DEFAULT_IMPORT_BATCH_SIZE
+    total_rows = cint(import_doc.total_rows) or len(pd.read_csv(import_doc.import_file, usecols=[0]))
+    shard_size = math.ceil(total_rows / partitions) or 1
+
+    import_doc.status = 'Processing'
+    import_doc.total_rows = total_rows
+    import_doc.successfully_imported = 0
+    import_doc.failed_rows = 0
+    import_doc.partitions = partitions
+    import_doc.save()
+    frappe.db.commit()
+
+    shards = list(range(0, total_rows, shard_size))
+    for index, start_row in enumerate(shards):
+        frappe.enqueue(
+            'mkaguzi.api.data_imports.run_import_partition',
+            queue='long',
+            timeout=IMPORT_JOB_TIMEOUT,
+            job_id=f"data_import::{import_doc.name}::{index}",
+            deduplicate=True,
+            import_id=import_doc.name,
+            start_row=start_row,
+            end_row=min(start_row + shard_size, total_rows),
+            mode=mode,
+            batch_size=batch_size
+        )
+
+    return {
+        'success': True,
+        'queued': True,
+        'import_id': import_doc.name,
+        'partitions': len(shards),
+        'message': _("Import queued for processing in {0} partitions").format(len(shards))
+    }
+
+
+def run_import_partition(import_id, start_row, end_row, mode='row', batch_size=DEFAULT_IMPORT_BATCH_SIZE):
+    """
+    Process rows [start_row, end_row) of a partitioned import
+
+    Counters are added with atomic UPDATEs and error_log rows inserted
+    directly, so concurrent partitions never overwrite each other.
+    """
+    try:
+        import_doc = frappe.get_doc('BC Data Import', import_id)
+        import_type = frappe.get_doc('CSV Import Type', import_doc.import_type)
+
+        df = read_csv_rows(import_doc.import_file, start_row, end_row)
+
+        for batch_start in range(0, len(df), batch_size):
+            batch = df.iloc[batch_start:batch_start + batch_size]
+            success_count, errors = import_batch(batch, import_type, import_doc, mode, batch_size)
+
+            record_partition_batch(import_doc, success_count, errors)
+            frappe.db.commit()
+
+            frappe.publish_realtime(
+                'data_import_progress',
+                get_import_progress(import_id),
+                doctype='BC Data Import',
+                docname=import_id
+            )
+
+        finish_partitioned_import(import_id)
+
+    except Exception:
+        frappe.db.rollback()
+        frappe.db.set_value('BC Data Import', import_id, 'status', 'Failed')
+        frappe.db.commit()
+        frappe.log_error(frappe.get_traceback(), _("CSV Import Partition Error"))
+        raise
+
+
+def read_csv_rows(file_path, start_row, end_row):
+    """
+    Read data rows [start_row, end_row) of a CSV, keeping file row positions as the index
+    """
+    df = pd.read_csv(file_path, skiprows=range(1, start_row + 1), nrows=end_row - start_row)
+    df.index = pd.RangeIndex(start_row, start_row + len(df))
+    return df
+
+
+def record_partition_batch(import_doc, success_count, errors):
+    """
+    Add one batch's results to the shared import record
+    """
+    frappe.db.sql("""
+        UPDATE `tabBC Data Import`
+        SET successfully_imported = successfully_imported + %s,
+            failed_rows = failed_rows + %s
+        WHERE name = %s
+    """, (success_count, len(errors), import_doc.name))
+
+    # The UPDATE above holds the import's row lock until commit, so
+    # partitions take error_log idx values one batch at a time
+    insert_error_rows(import_doc.name, errors)
+
+
+def insert_error_rows(import_id, errors):
+    """
+    Append error_log rows with one multi-row INSERT, numbering them after existing rows
+    """
+    if not errors:
+        return
+
+    error_doctype = frappe.get_meta('BC Data Import').get_field('error_log').options
+    last_idx = cint(frappe.db.sql(f"""
+        SELECT MAX(idx)
+        FROM `tab{error_doctype}`
+        WHERE parent = %s AND parenttype = 'BC Data Import' AND parentfield = 'error_log'
+    """, import_id)[0][0])
+
+    user = frappe.session.user
+    timestamp = now()
+    fields = ['name', 'parent', 'parenttype', 'parentfield', 'idx', 'owner', 'modified_by', 'creation', 'modified',
+              'row_number', 'column_name', 'error_type', 'error_message', 'row_data']
+    values = [
+        (frappe.generate_hash(length=10), import_id, 'BC Data Import', 'error_log', last_idx + position,
+         user, user, timestamp, timestamp,
+         error.get('row_number', 0), error.get('column_name', ''), error.get('error_type', ''),
+         error.get('error_message', ''), error.get('row_data', ''))
+        for position, error in enumerate(errors, start=1)
+    ]
+    frappe.db.bulk_insert(error_doctype, fields, values)
+
+
+def finish_partitioned_import(import_id):
+    """
+    Set the final status once every partition's rows are accounted for
+    """
+    counters = frappe.db.sql("""
+        SELECT status, total_rows, successfully_imported, failed_rows
+        FROM `tabBC Data Import`
+        WHERE name = %s
+        FOR UPDATE
+    """, import_id, as_dict=True)[0]
+
+    if counters.status != 'Processing':
+        return
+
+    if counters.successfully_imported + counters.failed_rows < counters.total_rows:
+        return
+
+    status = 'Completed' if counters.failed_rows == 0 else 'Partially Completed'
+    frappe.db.set_value('BC Data Import', import_id, 'status', status)
+    frappe.db.commit()
+
+
+def import_batch(batch, import_type, import_doc, mode, batch_size):
+    """
+    Import one batch of rows in the requested mode
+    """
+    if mode == 'bulk':
+        return bulk_import_dataframe(batch, import_type, import_doc, batch_size)
+
+    return import_rows(batch, import_type, import_doc)
+
+
+def import_rows(df, import_type, import_doc):
+    """
+    Insert one document per CSV row through the full controller
+
+    Returns (success_count, error_log rows).
+    """
+    target_doctype = import_type.target_doctype
+    success_count = 0
+    errors = []
+
+    # Process each row
+    for index, row in df.iterrows():
+        try:
+            # Map CSV columns to DocType fields
+            doc_data = {'doctype': target_doctype}
+
+            for mapping in import_type.field_mappings:
+                csv_col = mapping.csv_column_name
+                target_field = mapping.target_field
+
+                if csv_col in row and not pd.isna(row[csv_col]):
+                    value = row[csv_col]
+
+                    # Apply transformations
+                    if mapping.data_type == 'Date':
+                        value = pd.to_datetime(value).date()
+                    elif mapping.data_type == 'Currency' or mapping.data_type == 'Number':
+                        value = float(value)
+
+                    doc_data[target_field] = value
+
+            # Add import batch reference
+            doc_data['import_batch'] = import_doc.name
+            doc_data['data_period'] = import_doc.import_period
+
+            # Create document
+            doc = frappe.get_doc(doc_data)
+            doc.insert(ignore_permissions=True)
+            success_count += 1
+
+        except Exception as e:
+            errors.append(make_import_error(index, str(e), row))
+
+    return success_count, errors
+
+
+def publish_import_progress(import_doc):
+    """
+    Push import counters to clients watching the import
+    """
+    frappe.publish_realtime(
+        'data_import_progress',
+        get_progress_payload(import_doc.as_dict()),
+        doctype='BC Data Import',
+        docname=import_doc.name,
+        after_commit=True
+    )
+
+
 @frappe.whitelist()
 def get_import_progress(import_id):
     """
     Get real-time import progress
     """
-    import_doc = frappe.get_doc('BC Data Import', import_id)
+    values = frappe.db.get_value(
+        'BC Data Import',
+        import_id,
+        ['name', 'status', 'total_rows', 'successfully_imported', 'failed_rows'],
+        as_dict=True
+    )
+
+    if not values:
+        frappe.throw(_("Import {0} not found").format(import_id))
+
+    return get_progress_payload(values)
+
+
+def get_progress_payload(values):
+    """
+    Build the progress response from import counters
+    """
+    total_rows = cint(values.get('total_rows'))
+    imported = cint(values.get('successfully_imported'))
+    failed = cint(values.get('failed_rows'))
+
+    # Before processing starts failed_rows holds validation errors
+    processed = imported + failed if values.get('status') not in ('Draft', 'Validated', 'Validation Failed', 'Queued') else 0
+
+    return {
+        'import_id': values.get('name'),
+        'status': values.get('status'),
+        'total_rows': total_rows,
+        'successfully_imported': imported,
+        'failed_rows': failed,
+        'processed_rows': processed,
+        'progress_percent': (processed / total_rows * 100) if total_rows > 0 else 0
+    }
+
+
+def validate_columns(df, field_mappings, max_errors_per_column=MAX_ERRORS_PER_COLUMN):
+    """
+    Check required fields and data types with whole-column masks
+
+    Returns (errors, error_summary). errors lists at most
+    max_errors_per_column failures per column and error type, in row order,
+    followed by one summary entry for each truncated list. error_summary maps
+    "column: type" to the total count and first failing rows.
+    """
+    listed = []
+    truncated = []
+    error_summary = {}
+
+    for position, mapping in enumerate(field_mappings):
+        col_name = mapping.csv_column_name
+        if col_name not in df.columns:
+            continue
+
+        values = df[col_name]
+        present = values.notna()
+        checks = []
+
+        if mapping.is_required:
+            checks.append(('Required Field', ~present, f"{col_name} is required but empty"))
+
+        if mapping.data_type == 'Number' and not pd.api.types.is_numeric_dtype(values):
+            invalid = present & pd.to_numeric(values, errors='coerce').isna()
+            checks.append(('Data Type', invalid, f"{col_name} should be numeric"))
+
+        elif mapping.data_type == 'Date':
+            invalid = present & to_datetime_column(values).isna()
+            checks.append(('Data Type', invalid, f"{col_name} is not a valid date"))
+
+        for error_type, mask, message in checks:
+            failed_index = df.index[mask.to_numpy()]
+            if not len(failed_index):
+                continue
+
+            error_summary[f"{col_name}: {error_type}"] = {
+                'column': col_name,
+                'type': error_type,
+                'count': len(failed_index),
+                'first_rows': [int(index) + 2 for index in failed_index[:10]]
+            }
+
+            for index in failed_index[:max_errors_per_column]:
+                listed.append((index, position, {
+                    'row': int(index) + 2,  # +2 for header and 0-index
+                    'column': col_name,
+                    'type': error_type,
+                    'message': message
+                }))
+
+            if len(failed_index) > max_errors_per_column:
+                truncated.append({
+                    'column': col_name,
+                    'type': error_type,
+                    'message': f"{message}: {len(failed_index)} rows failed, "
+                               f"{len(failed_index) - max_errors_per_column} not listed"
+                })
+
+    listed.sort(key=lambda entry: (entry[0], entry[1]))
+    return [entry[2] for entry in listed] + truncated, error_summary
+
+
+def to_datetime_column(values):
+    """
+    Convert a column to datetimes, leaving NaT where a value does not parse
 
+    Whole-column parsing infers a single format, so values it misses are
+    retried one by one before being treated as invalid.
+    """
+    converted = pd.to_datetime(values, errors='coerce')
+    retry = values.notna() & converted.isna()
+
+    for index in values.index[retry.to_numpy()]:
+        try:
+            converted[index] = pd.to_datetime(values[index])
+        except Exception:
+            pass
+
+    return converted
+
+
+def map_import_columns(df, field_mappings):
+    """
+    Map CSV columns to target fields, converting each column in one pass
+
+    Returns the mapped DataFrame (NaN replaced by None) and a dict of
+    row index -> conversion error message for values that failed to convert.
+    """
+    mapped = pd.DataFrame(index=df.index)
+    conversion_errors = {}
+
+    for mapping in field_mappings:
+        csv_col = mapping.csv_column_name
+        if csv_col not in df.columns:
+            continue
+
+        values = df[csv_col]
+
+        if mapping.data_type == 'Date':
+            converted = to_datetime_column(values)
+            invalid = values.notna() & converted.isna()
+            converted = converted.dt.date
+            message = f"{csv_col} is not a valid date"
+        elif mapping.data_type in ('Currency', 'Number'):
+            converted = pd.to_numeric(values, errors='coerce')
+            invalid = values.notna() & converted.isna()
+            message = f"{csv_col} should be numeric"
+        else:
+            converted = values
+            invalid = None
+
+        if invalid is not None:
+            for index in df.index[invalid]:
+                conversion_errors.setdefault(index, message)
+
+        mapped[mapping.target_field] = converted
+
+    mapped = mapped.astype(object).where(mapped.notna(), None)
+    return mapped, conversion_errors
+
+
+def bulk_import_dataframe(df, import_type, import_doc, batch_size=DEFAULT_IMPORT_BATCH_SIZE):
+    """
+    Import a CSV DataFrame with multi-row INSERTs
+
+    Controller hooks are skipped for successful batches. When a batch fails,
+    its rows are retried one by one so failures are logged with their row
+    numbers. Returns (success_count, error_log rows).
+    """
+    target_doctype = import_type.target_doctype
+    meta = frappe.get_meta(target_doctype)
+
+    mapped, conversion_errors = map_import_columns(df, import_type.field_mappings)
+    mapped['import_batch'] = import_doc.name
+    mapped['data_period'] = import_doc.import_period
+
+    valid_columns = set(meta.get_valid_columns())
+    data_fields = [f for f in mapped.columns if f in valid_columns and f != 'name']
+
+    errors = [
+        make_import_error(index, message, df.loc[index], 'Data Type')
+        for index, message in conversion_errors.items()
+    ]
+    mapped = mapped.drop(index=list(conversion_errors))
+
+    timestamp = now()
+    user = frappe.session.user
+    fields = ['name', 'owner', 'creation', 'modified', 'modified_by', 'docstatus', *data_fields]
+    name_field = meta.autoname[len('field:'):] if (meta.autoname or '').startswith('field:') else None
+
+    success_count = 0
+
+    for start in range(0, len(mapped), batch_size):
+        batch = mapped.iloc[start:start + batch_size]
+        names = (
+            batch[name_field].tolist() if name_field in batch.columns
+            else [frappe.generate_hash(length=10) for _ in range(len(batch))]
+        )
+        values = [
+            (name, user, timestamp, timestamp, user, 0, *row)
+            for name, row in zip(names, batch[data_fields].itertuples(index=False, name=None))
+        ]
+
+        save_point = f"bulk_import_{start}"
+        frappe.db.savepoint(save_point)
+        try:
+            frappe.db.bulk_insert(target_doctype, fields, values, chunk_size=batch_size)
+            success_count += len(values)
+        except Exception:
+            frappe.db.rollback(save_point=save_point)
+
+            # Fall back to row-by-row inserts to isolate the failing rows
+            for index, row in batch.iterrows():
+                try:
+                    doc_data = {k: v for k, v in row.items() if v is not None}
+                    doc_data['doctype'] = target_doctype
+                    frappe.get_doc(doc_data).insert(ignore_permissions=True)
+                    success_count += 1
+                except Exception as e:
+                    errors.append(make_import_error(index, str(e), df.loc[index]))
+
+    errors.sort(key=lambda error: error['row_number'])
+    return success_count, errors
+
+
+def make_import_error(index, message, row, error_type='Import Error'):
+    """
+    Build an error_log row for a DataFrame index
+    """
     return {
-        'status': import_doc.status,
-        'total_rows': import_doc.total_rows,
-        'successfully_imported': import_doc.successfully_imported,
-        'failed_rows': import_doc.failed_rows,
-        'progress_percent': (import_doc.successfully_imported / import_doc.total_rows * 100) if import_doc.total_rows > 0 else 0
+        'row_number': index + 2,  # +2 for header and 0-index
+        'error_type': error_type,
+        'error_message': message,
+        'row_data': str(row.to_dict())
     }
 
 
@@ -1,69 +1,120 @@
 import frappe
 from frappe import _
+from frappe.utils import cint
 import json
 from datetime import datetime, timedelta
 
+# Listing filters and the Audit Finding columns they match; the older
+# names are still accepted
+FINDING_FILTER_FIELDS = {
+    'engagement_reference': 'engagement_reference',
+    'test_execution_reference': 'test_execution_reference',
+    'finding_status': 'finding_status',
+    'status': 'finding_status',
+    'risk_rating': 'risk_rating',
+    'severity': 'risk_rating',
+    'finding_category': 'finding_category',
+    'finding_type': 'finding_category',
+    'responsible_person': 'responsible_person',
+    'responsible_party': 'responsible_person'
+}
+
+# Child tables counted for each finding in the listing
+FINDING_CHILD_COUNTS = {
+    'evidence_count': 'evidence',
+    'action_items_count': 'milestones'
+}
+
+FINDING_MAX_PAGE_SIZE = 500
+
+
 @frappe.whitelist()
-def get_findings(filters=None, page=1, page_size=50):
+def get_findings(filters=None, page=1, page_size=50, after=None):
     """
     Get audit findings with filtering and pagination
+
+    Pass the previous response's `next_cursor` as `after` to page by
+    (reported_date, name) instead of OFFSET, which stays fast on deep pages.
+    Rows keep the listing's field names, read from the matching Audit
+    Finding columns; reported_date is the creation time.
     """
     try:
+        page = max(cint(page), 1)
+        page_size = min(max(cint(page_size) or 50, 1), FINDING_MAX_PAGE_SIZE)
+
         filter_conditions = {}
         if filters:
             data = frappe.parse_json(filters) if isinstance(filters, str) else filters
 
-            if data.get('audit_execution'):
-                filter_conditions['audit_execution'] = data['audit_execution']
-            if data.get('status'):
-                filter_conditions['status'] = data['status']
-            if data.get('severity'):
-                filter_conditions['severity'] = data['severity']
-            if data.get('finding_type'):
-                filter_conditions['finding_type'] = data['finding_type']
-            if data.get('responsible_party'):
-                filter_conditions['responsible_party'] = data['responsible_party']
-
-        # Calculate offset
-        offset = (page - 1) * page_size
+            for key, field in FINDING_FILTER_FIELDS.items():
+                if data.get(key):
+                    filter_conditions[field] = data[key]
 
-        # Get findings
-        findings = frappe.get_all('Audit Finding',
-            filters=filter_conditions,
-            fields=['name', 'finding_title', 'description', 'finding_type', 'severity',
-                   'impact', 'status', 'responsible_party', 'target_completion_date',
-                   'actual_completion_date', 'reported_date', 'reported_by'],
-            order_by='reported_date desc',
-            limit_page_length=page_size,
-            limit_start=offset)
+        conditions = [f"`{field}` = %({field})s" for field in filter_conditions]
+        values = dict(filter_conditions)
 
-        # Get total count
-        total_count = frappe.db.count('Audit Finding', filters=filter_conditions)
+        # Keyset pagination on (creation, name)
+        cursor = frappe.parse_json(after) if isinstance(after, str) else after
+        if cursor:
+            values.update({'after_date': cursor.get('reported_date'), 'after_name': cursor.get('name')})
+            conditions.append("""(creation < %(after_date)s
+                OR (creation = %(after_date)s AND name < %(after_name)s))""")
 
-        # Add additional data
-        for finding in findings:
-            finding_doc = frappe.get_doc('Audit Finding', finding.name)
+        where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        limit_clause = "LIMIT %(page_size)s" if cursor else "LIMIT %(page_size)s OFFSET %(offset)s"
+        values.update({'page_size': page_size, 'offset': (page - 1) * page_size})
 
-            # Add evidence count
-            finding['evidence_count'] = len(finding_doc.supporting_evidence)
+        # Get findings
+        findings = frappe.db.sql(f"""
+            SELECT name, finding_title, `condition` AS description, finding_category AS finding_type,
+                risk_rating AS severity, impact, finding_status AS status,
+                responsible_person AS responsible_party, target_completion_date,
+                closure_date AS actual_completion_date, creation AS reported_date,
+                owner AS reported_by,
+                CASE
+                    WHEN finding_status IN ('Open', 'Action in Progress') AND target_completion_date < CURDATE()
+                    THEN DATEDIFF(CURDATE(), target_completion_date)
+                    ELSE 0
+                END AS days_overdue
+            FROM `tabAudit Finding`
+            {where_clause}
+            ORDER BY creation DESC, name DESC
+            {limit_clause}
+        """, values, as_dict=True)
 
-            # Add action items count
-            finding['action_items_count'] = len(finding_doc.action_items)
+        # Get total count
+        total_count = frappe.db.count('Audit Finding', filters=filter_conditions)
 
-            # Add days overdue
-            if finding['target_completion_date'] and finding['status'] in ['Open', 'In Progress']:
-                target_date = datetime.strptime(str(finding['target_completion_date']), '%Y-%m-%d').date()
-                today = datetime.now().date()
-                finding['days_overdue'] = (today - target_date).days if today > target_date else 0
-            else:
-                finding['days_overdue'] = 0
+        # Child row counts: one grouped query per child table for the page
+        names = [finding.name for finding in findings]
+        meta = frappe.get_meta('Audit Finding')
+        for count_field, table_field in FINDING_CHILD_COUNTS.items():
+            counts = {}
+            if names:
+                counts = dict(frappe.db.sql(f"""
+                    SELECT parent, COUNT(*)
+                    FROM `tab{meta.get_field(table_field).options}`
+                    WHERE parenttype = 'Audit Finding'
+                    AND parentfield = %s
+                    AND parent IN %s
+                    GROUP BY parent
+                """, (table_field, tuple(names))))
+
+            for finding in findings:
+                finding[count_field] = counts.get(finding.name, 0)
+
+        next_cursor = None
+        if len(findings) == page_size:
+            last = findings[-1]
+            next_cursor = {'reported_date': str(last.reported_date), 'name': last.name}
 
         return {
             'findings': findings,
             'total_count': total_count,
             'page': page,
             'page_size': page_size,
-            'total_pages': (total_count + page_size - 1) // page_size
+            'total_pages': (total_count + page_size - 1) // page_size,
+            'next_cursor': next_cursor
         }
 
     except Exception as e:
@@ -1,32 +1,60 @@
 import frappe
 from frappe import _
 from frappe.utils import now, get_datetime
+import hashlib
 import json
 
 
+TESTS_CACHE_PREFIX = "test_library_tests::"
+TESTS_CACHE_TTL = 300
+RECENT_EXECUTIONS = 3
+
+# Columns get_tests can return; child data is requested by key
+TEST_LIST_FIELDS = [
+    'name', 'test_id', 'test_name', 'test_category', 'sub_category', 'description',
+    'objective', 'risk_area', 'data_source_type', 'test_logic_type', 'status',
+    'usage_count', 'success_rate', 'creation', 'modified', 'owner'
+]
+TEST_CHILD_FIELDS = ['test_parameters', 'expected_results', 'recent_executions']
+
+
 @frappe.whitelist()
-def get_tests(filters=None, search=None):
-    """Get all audit tests with optional filtering"""
+def get_tests(filters=None, search=None, fields=None):
+    """Get all audit tests with optional filtering
+
+    fields limits the returned columns and child data (test_parameters,
+    expected_results, recent_executions); by default everything is
+    returned. Results are cached per filter set until a test or test
+    execution changes.
+    """
+    fields = get_requested_fields(fields)
+
     try:
+        filters_dict = (json.loads(filters) if isinstance(filters, str) else filters) or {}
+
+        cache_key = TESTS_CACHE_PREFIX + hashlib.sha1(
+            json.dumps([filters_dict, search, fields], sort_keys=True, default=str).encode()
+        ).hexdigest()
+        tests = frappe.cache().get_value(cache_key)
+        if tests is not None:
+            return tests
+
         # Build the query
         conditions = []
         values = {}
 
         # Apply filters
-        if filters:
-            filters_dict = json.loads(filters) if isinstance(filters, str) else filters
-
-            if filters_dict.get('category'):
-                conditions.append("test_category = %(category)s")
-                values['category'] = filters_dict['category']
+        if filters_dict.get('category'):
+            conditions.append("test_category = %(category)s")
+            values['category'] = filters_dict['category']
 
-            if filters_dict.get('test_type'):
-                conditions.append("test_logic_type = %(test_type)s")
-                values['test_type'] = filters_dict['test_type']
+        if filters_dict.get('test_type'):
+            conditions.append("test_logic_type = %(test_type)s")
+            values['test_type'] = filters_dict['test_type']
 
-            if filters_dict.get('status'):
-                conditions.append("status = %(status)s")
-                values['status'] = filters_dict['status']
+        if filters_dict.get('status'):
+            conditions.append("status = %(status)s")
+            values['status'] = filters_dict['status']
 
         # Apply search
         if search:
@@ -41,62 +69,56 @@ def get_tests(filters=None, search=None):
 
         # Build the final query
         where_clause = " AND ".join(conditions) if conditions else "1=1"
+        columns = ['name'] + [field for field in fields if field in TEST_LIST_FIELDS and field != 'name']
 
         query = f"""
-            SELECT
-                name,
-                test_id,
-                test_name,
-                test_category,
-                sub_category,
-                description,
-                objective,
-                risk_area,
-                data_source_type,
-                test_logic_type,
-                status,
-                usage_count,
-                success_rate,
-                creation,
-                modified,
-                owner
+            SELECT {', '.join(columns)}
             FROM `tabAudit Test Library`
             WHERE {where_clause}
             ORDER BY test_category, test_name
         """
 
         tests = frappe.db.sql(query, values, as_dict=True)
+        test_names = [test.name for test in tests]
 
-        # Get test parameters and expected results for each test
-        for test in tests:
-            # Get test parameters
-            test_parameters = frappe.db.sql("""
-                SELECT parameter_name, parameter_type, default_value, description
+        # Child rows and recent executions for all tests in one query each
+        if test_names and 'test_parameters' in fields:
+            add_child_rows(tests, 'test_parameters', """
+                SELECT parent, parameter_name, parameter_type, default_value, description
                 FROM `tabTest Parameter`
-                WHERE parent = %s
-                ORDER BY idx
-            """, test.name, as_dict=True)
-            test['test_parameters'] = test_parameters
-
-            # Get expected results
-            expected_results = frappe.db.sql("""
-                SELECT condition, expected_value, severity, description
-                FROM `tabTest Expected Result`
-                WHERE parent = %s
-                ORDER BY idx
-            """, test.name, as_dict=True)
-            test['expected_results'] = expected_results
-
-            # Get recent executions (last 3)
-            recent_executions = frappe.db.sql("""
-                SELECT actual_start_date as execution_date, status as result, created_by as executed_by
-                FROM `tabTest Execution`
-                WHERE test_library_reference = %s
-                ORDER BY actual_start_date DESC
-                LIMIT 3
-            """, test.name, as_dict=True)
-            test['recent_executions'] = recent_executions
+                WHERE parenttype = 'Audit Test Library' AND parent IN %(tests)s
+                ORDER BY parent, idx
+            """, test_names)
 
+        if test_names and 'expected_results' in fields:
+            add_child_rows(tests, 'expected_results', """
+                SELECT parent, result_type, `condition`, expected_value, value_range_min, value_range_max, severity
+                FROM `tabTest Expected Result`
+                WHERE parenttype = 'Audit Test Library' AND parent IN %(tests)s
+                ORDER BY parent, idx
+            """, test_names)
+
+        if test_names and 'recent_executions' in fields:
+            add_child_rows(tests, 'recent_executions', """
+                SELECT parent, execution_date, result, executed_by
+                FROM (
+                    SELECT
+                        test_library_reference as parent,
+                        actual_start_date as execution_date,
+                        status as result,
+                        created_by as executed_by,
+                        ROW_NUMBER() OVER (
+                            PARTITION BY test_library_reference
+                            ORDER BY actual_start_date DESC
+                        ) as row_num
+                    FROM `tabTest Execution`
+                    WHERE test_library_reference IN %(tests)s
+                ) recent
+                WHERE row_num <= %(limit)s
+                ORDER BY parent, row_num
+            """, test_names, {'limit': RECENT_EXECUTIONS})
+
+        frappe.cache().set_value(cache_key, tests, expires_in_sec=TESTS_CACHE_TTL)
         return tests
 
     except Exception as e:
@@ -104,6 +126,37 @@ def get_tests(filters=None, search=None):
         frappe.throw(_("Failed to fetch audit tests"))
 
 
+def get_requested_fields(fields):
+    """Validated list of get_tests fields, defaulting to all of them"""
+    if not fields:
+        return TEST_LIST_FIELDS + TEST_CHILD_FIELDS
+
+    if isinstance(fields, str):
+        fields = json.loads(fields) if fields.startswith('[') else fields.split(',')
+
+    fields = [field.strip() for field in fields]
+    invalid = [field for field in fields if field not in TEST_LIST_FIELDS + TEST_CHILD_FIELDS]
+    if invalid:
+        frappe.throw(_("Invalid fields: {0}").format(", ".join(invalid)))
+
+    return fields
+
+
+def add_child_rows(tests, key, query, test_names, values=None):
+    """Group rows of a parent IN (...) query onto each test under key"""
+    rows_by_parent = {}
+    for row in frappe.db.sql(query, dict(values or {}, tests=test_names), as_dict=True):
+        rows_by_parent.setdefault(row.pop('parent'), []).append(row)
+
+    for test in tests:
+        test[key] = rows_by_parent.get(test.name, [])
+
+
+def clear_tests_cache(doc=None, method=None):
+    """Drop cached get_tests results when a test or test execution changes"""
+    frappe.cache().delete_keys(TESTS_CACHE_PREFIX)
+
+
 @frappe.whitelist()
 def create_test(test_data):
     """Create a new audit test"""
@@ -139,14 +139,34 @@ app_license = "mit"
 
 doc_events = {
     "Audit Finding": {
-        "after_insert": "mkaguzi.utils.notifications.on_audit_finding_insert",
-        "on_update": "mkaguzi.utils.notifications.on_audit_finding_update",
+        "after_insert": [
+            "mkaguzi.utils.notifications.on_audit_finding_insert",
+            "mkaguzi.utils.weekly_digest.on_audit_finding_insert",
+        ],
+        "on_update": [
+            "mkaguzi.utils.notifications.on_audit_finding_update",
+            "mkaguzi.utils.weekly_digest.on_audit_finding_update",
+        ],
     },
     "Compliance Check": {
         "on_update": "mkaguzi.utils.notifications.on_compliance_check_update",
     },
+    "Compliance Execution": {
+        "after_insert": "mkaguzi.utils.weekly_digest.on_compliance_execution_insert",
+    },
     "Audit Execution": {
-        "on_update": "mkaguzi.utils.notifications.on_audit_execution_update",
+        "on_update": [
+            "mkaguzi.utils.notifications.on_audit_execution_update",
+            "mkaguzi.utils.weekly_digest.on_audit_execution_update",
+        ],
+    },
+    "Audit Test Library": {
+        "on_update": "mkaguzi.api.test_library.clear_tests_cache",
+        "on_trash": "mkaguzi.api.test_library.clear_tests_cache",
+    },
+    "Test Execution": {
+        "on_update": "mkaguzi.api.test_library.clear_tests_cache",
+        "on_trash": "mkaguzi.api.test_library.clear_tests_cache",
     }
 }
 
@@ -154,12 +174,19 @@ doc_events = {
 # ---------------
 
 scheduler_events = {
+    "all": [
+        "mkaguzi.utils.notifications.flush_notification_events",
+        "mkaguzi.mkaguzi.doctype.test_execution.test_execution.sweep_stale_test_batches"
+    ],
     "daily": [
         "mkaguzi.utils.notifications.schedule_notifications"
     ],
-    "weekly": [
-        "mkaguzi.utils.notifications.send_weekly_digest"
-    ]
+    "cron": {
+        # Monday morning, once the previous ISO week is complete
+        "0 6 * * 1": [
+            "mkaguzi.utils.notifications.send_weekly_digest"
+        ]
+    }
 }
 
 # Testing
@@ -232,5 +259,15 @@ user_data_fields = [
 # 	"Logging DocType Name": 30  # days to retain logs
 # }
 
+# Journal Entry Analysis
+# ----------------------
+# Extra journal entry red flags (subclasses of
+# mkaguzi.utils.journal_entry_rules.JournalEntryRule), evaluated in the same
+# scan as the built-in rules
+
+# journal_entry_rules = [
+# 	"myapp.audit.rules.ReversedEntryRule"
+# ]
+
 
 website_route_rules = [{'from_route': '/frontend/<path:app_path>', 'to_route': 'frontend'},]
\ No newline at end of file
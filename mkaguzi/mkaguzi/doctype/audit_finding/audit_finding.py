@@ -146,6 +146,11 @@ class AuditFinding(Document):
 			original = frappe.get_doc(self.doctype, self.name)
 			self._original_status = original.finding_status
 
+		# Dated when closed, not only on submit, so the weekly digest counts
+		# a resolution in the week it happened
+		if self.finding_status == "Closed" and not self.closure_date:
+			self.closure_date = nowdate()
+
 	def on_update(self):
 		"""Handle status changes and create status history"""
 		if hasattr(self, '_original_status') and self._original_status != self.finding_status:
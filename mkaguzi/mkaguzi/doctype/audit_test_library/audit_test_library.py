@@ -6,9 +6,18 @@ from __future__ import unicode_literals
 import frappe
 from frappe import _
 from frappe.model.document import Document
-from frappe.utils import nowdate, getdate
+from frappe.utils import nowdate, getdate, cint, flt
 import re
 import json
+import pandas as pd
+from mkaguzi.utils import analytics_kernels as kernels
+from mkaguzi.utils.analytics_queries import stream_query
+from mkaguzi.utils.execution_profiler import profile_step
+from mkaguzi.utils.python_sandbox import PythonSandbox
+from mkaguzi.utils.thresholds import clear_threshold_evaluator, get_threshold_evaluator
+
+# Rows per DataFrame chunk for built-in tests; memory scales with this
+KERNEL_CHUNK_SIZE = 100000
 
 class AuditTestLibrary(Document):
 	def autoname(self):
@@ -115,6 +124,9 @@ class AuditTestLibrary(Document):
 		"""Handle updates"""
 		self.update_usage_stats()
 
+	def on_trash(self):
+		clear_threshold_evaluator(self.name)
+
 	def update_usage_stats(self):
 		"""Update usage statistics"""
 		# This would be called when the test is executed
@@ -145,9 +157,8 @@ def execute_test(test_id, parameters=None, data_source=None):
 		else:
 			result = execute_builtin_test(test, test_params, data_source)
 
-		# Update usage count
-		test.usage_count = (test.usage_count or 0) + 1
-		test.save()
+		# Update usage count without touching modified or re-running the controller
+		test.db_set("usage_count", (test.usage_count or 0) + 1, update_modified=False)
 
 		return result
 
@@ -158,19 +169,15 @@ def execute_test(test_id, parameters=None, data_source=None):
 def execute_sql_test(test, parameters, data_source):
 	"""Execute SQL-based test"""
 	try:
-		sql_query = test.sql_query
-
-		# Replace parameters in query
-		for param_name, param_value in parameters.items():
-			placeholder = f"{{{param_name}}}"
-			if placeholder in sql_query:
-				sql_query = sql_query.replace(placeholder, str(param_value))
+		sql_query = render_sql_query(test.sql_query, parameters)
 
 		# Execute query
-		result = frappe.db.sql(sql_query, as_dict=True)
+		with profile_step("Query"):
+			result = frappe.db.sql(sql_query, as_dict=True)
 
 		# Apply thresholds and determine status
-		status = evaluate_thresholds(test, result)
+		with profile_step("Threshold Evaluation"):
+			status = evaluate_thresholds(test, result)
 
 		return {
 			"test_id": test.test_id,
@@ -183,20 +190,47 @@ def execute_sql_test(test, parameters, data_source):
 	except Exception as e:
 		frappe.throw(_("SQL test execution failed: {0}").format(str(e)))
 
+def render_sql_query(sql_query, parameters):
+	"""Replace {parameter} placeholders in a test query"""
+	for param_name, param_value in parameters.items():
+		placeholder = f"{{{param_name}}}"
+		if placeholder in sql_query:
+			sql_query = sql_query.replace(placeholder, str(param_value))
+
+	return sql_query
+
 def execute_python_test(test, parameters, data_source):
-	"""Execute Python script test"""
+	"""Execute Python script test in the out-of-process sandbox
+
+	The script sees the rows of the test's SQL query (if any) as the
+	DataFrame `data`, the parameters as `params`, and sets `result`.
+	"""
 	try:
-		# This would require careful sandboxing in production
-		# For now, we'll just validate the script exists
 		if not test.python_script:
 			frappe.throw(_("Python script not found"))
 
-		# In a real implementation, this would execute the script in a sandbox
+		data = None
+		if test.sql_query:
+			with profile_step("Query"):
+				data = pd.DataFrame.from_records(
+					frappe.db.sql(render_sql_query(test.sql_query, parameters), as_dict=True)
+				)
+
+		with profile_step("Python Script"):
+			result = PythonSandbox.run(test.python_script, data, parameters)
+
+		# Thresholds run on the DataFrame before it is turned into rows
+		with profile_step("Threshold Evaluation"):
+			status = evaluate_thresholds(test, result)
+
+		if isinstance(result, pd.DataFrame):
+			result = result.astype(object).where(result.notna(), None).to_dict("records")
+
 		return {
 			"test_id": test.test_id,
 			"test_name": test.test_name,
-			"result": "Python execution not implemented in sandbox",
-			"status": "Pending",
+			"result": result,
+			"status": status,
 			"execution_time": frappe.utils.now()
 		}
 
@@ -217,12 +251,14 @@ def execute_builtin_test(test, parameters, data_source):
 
 		if test.test_category in builtin_functions:
 			func = builtin_functions[test.test_category]
-			result = func(test, parameters, data_source)
+			with profile_step("Transform"):
+				result = func(test, parameters, data_source)
 		else:
 			frappe.throw(_("Built-in function not found for category: {0}").format(test.test_category))
 
 		# Apply thresholds
-		status = evaluate_thresholds(test, result)
+		with profile_step("Threshold Evaluation"):
+			status = evaluate_thresholds(test, result)
 
 		return {
 			"test_id": test.test_id,
@@ -240,84 +276,150 @@ def evaluate_thresholds(test, result):
 	if not test.threshold_settings:
 		return "Pass"
 
-	status = "Pass"
-	highest_severity = "Low"
+	status, _severity, _breaches = get_threshold_evaluator(test).evaluate(result)
+	return status
 
-	for threshold in test.threshold_settings:
-		# Get the value to compare (this would depend on result structure)
-		actual_value = extract_threshold_value(result, threshold.threshold_name)
+# Built-in test functions
+def get_data_reader(test, parameters, data_source=None):
+	"""Return a function yielding DataFrame chunks of the test's data
+
+	Database Table sources stream the required data fields of the DocType
+	named by data_source, narrowed by the test's data filters and, when a
+	date_field parameter is given, by start_date/end_date. SQL sources
+	stream the test's query. CSV and Excel sources read the File at
+	data_source. Each call starts a new pass over the data. The caller
+	must be able to read the DocType or File used as the source.
+	"""
+	chunk_size = cint(parameters.get("chunk_size")) or KERNEL_CHUNK_SIZE
+	data_source = data_source or parameters.get("data_source")
+
+	if test.data_source_type in ("CSV File", "Excel File"):
+		if not data_source:
+			frappe.throw(_("A file is required as the data source"))
+		file_doc = frappe.get_doc("File", {"file_url": data_source})
+		file_doc.check_permission("read")
+		file_path = file_doc.get_full_path()
+
+		if test.data_source_type == "CSV File":
+			return lambda: pd.read_csv(file_path, chunksize=chunk_size)
+
+		def read_excel():
+			frame = pd.read_excel(file_path)
+			for start in range(0, len(frame), chunk_size):
+				yield frame.iloc[start:start + chunk_size]
+
+		return read_excel
+
+	if test.sql_query and (test.data_source_type == "SQL Query" or not data_source):
+		query, values = render_sql_query(test.sql_query, parameters), None
+	elif data_source:
+		query, values = build_table_query(test, data_source, parameters)
+	else:
+		frappe.throw(_("No data source configured for test {0}").format(test.test_name))
+
+	def read_chunks():
+		for rows in stream_query(f"builtin:{test.name}", query, values, chunk_size, as_dict=True):
+			yield pd.DataFrame.from_records(rows)
+
+	return read_chunks
+
+def build_table_query(test, doctype, parameters):
+	"""SELECT over a DocType's table from the test's required fields and data filters"""
+	if not frappe.db.exists("DocType", doctype):
+		frappe.throw(_("Data source {0} is not a DocType").format(doctype))
+	frappe.has_permission(doctype, "read", throw=True)
+
+	valid_columns = set(frappe.get_meta(doctype).get_valid_columns())
+	fields = [field.field_name for field in test.required_data_fields or []] or sorted(valid_columns)
+
+	invalid = [field for field in fields if field not in valid_columns]
+	if invalid:
+		frappe.throw(_("Fields not found in {0}: {1}").format(doctype, ", ".join(invalid)))
+
+	conditions, values = [], {}
+	for i, data_filter in enumerate(test.data_filters or []):
+		if data_filter.filter_field not in valid_columns:
+			frappe.throw(_("Filter field {0} not found in {1}").format(data_filter.filter_field, doctype))
+
+		column = f"`{data_filter.filter_field}`"
+		if data_filter.operator in ("IS NULL", "IS NOT NULL"):
+			condition = f"{column} {data_filter.operator}"
+		else:
+			filter_value = render_sql_query(data_filter.filter_value or "", parameters)
+			if data_filter.operator in ("IN", "NOT IN"):
+				filter_value = tuple(value.strip() for value in filter_value.split(","))
+			values[f"filter_{i}"] = filter_value
+			condition = f"{column} {data_filter.operator} %(filter_{i})s"
 
-		if actual_value is None:
-			continue
+		if conditions:
+			conditions.append(data_filter.logical_operator or "AND")
+		conditions.append(condition)
 
-		threshold_value = threshold.threshold_value
-
-		# Compare based on operator
-		comparison_result = False
-		if threshold.comparison_operator == ">":
-			comparison_result = actual_value > threshold_value
-		elif threshold.comparison_operator == "<":
-			comparison_result = actual_value < threshold_value
-		elif threshold.comparison_operator == ">=":
-			comparison_result = actual_value >= threshold_value
-		elif threshold.comparison_operator == "<=":
-			comparison_result = actual_value <= threshold_value
-		elif threshold.comparison_operator == "==":
-			comparison_result = actual_value == threshold_value
-
-		if comparison_result:
-			status = "Fail"
-			if threshold.notification_level == "Critical":
-				highest_severity = "Critical"
-			elif threshold.notification_level == "Error" and highest_severity != "Critical":
-				highest_severity = "High"
-			elif threshold.notification_level == "Warning" and highest_severity not in ["Critical", "High"]:
-				highest_severity = "Medium"
+	where = f"WHERE ({' '.join(conditions)})" if conditions else "WHERE 1=1"
 
-	return status
+	date_field = parameters.get("date_field")
+	if date_field and parameters.get("start_date") and parameters.get("end_date"):
+		if date_field not in valid_columns:
+			frappe.throw(_("Date field {0} not found in {1}").format(date_field, doctype))
+		where += f" AND `{date_field}` BETWEEN %(start_date)s AND %(end_date)s"
+		values.update(start_date=parameters.get("start_date"), end_date=parameters.get("end_date"))
 
-def extract_threshold_value(result, threshold_name):
-	"""Extract value from result for threshold comparison"""
-	# This is a simplified implementation
-	# In reality, this would need to parse the result structure
-	if isinstance(result, list) and len(result) > 0:
-		if threshold_name.lower() == "count":
-			return len(result)
-		elif threshold_name.lower() == "percentage":
-			# Calculate percentage based on result structure
-			return 0
-		else:
-			# Try to find the value in the first result row
-			if isinstance(result[0], dict):
-				return result[0].get(threshold_name)
+	query = f"SELECT {', '.join(f'`{field}`' for field in fields)} FROM `tab{doctype}` {where}"
+	return query, values
 
-	return None
+def get_required_fields(test):
+	return [field.field_name for field in test.required_data_fields or []]
 
-# Built-in test functions
 def detect_duplicates(test, parameters, data_source):
-	"""Built-in duplicate detection"""
-	# This would implement duplicate detection logic
-	return []
+	"""Built-in duplicate detection on key_fields (default: required data fields)"""
+	return kernels.detect_duplicates(
+		get_data_reader(test, parameters, data_source),
+		kernels.split_fields(parameters.get("key_fields")) or get_required_fields(test),
+		normalize=parameters.get("normalize", "1") not in (0, "0", False, "false"),
+		max_results=cint(parameters.get("max_results")) or kernels.DEFAULT_MAX_RESULTS
+	)
 
 def analyze_outliers(test, parameters, data_source):
-	"""Built-in outlier analysis"""
-	# This would implement outlier detection logic
-	return []
+	"""Built-in outlier analysis (z-score, IQR or MAD) on value_field"""
+	return kernels.analyze_outliers(
+		get_data_reader(test, parameters, data_source),
+		parameters.get("value_field") or "amount",
+		method=parameters.get("method") or "zscore",
+		threshold=flt(parameters.get("outlier_threshold")) or None,
+		max_results=cint(parameters.get("max_results")) or kernels.DEFAULT_MAX_RESULTS
+	)
 
 def analyze_trends(test, parameters, data_source):
-	"""Built-in trend analysis"""
-	# This would implement trend analysis logic
-	return []
+	"""Built-in trend analysis of value_field per period against a rolling baseline"""
+	return kernels.analyze_trends(
+		get_data_reader(test, parameters, data_source),
+		parameters.get("date_field") or "posting_date",
+		value_field=parameters.get("value_field"),
+		period=parameters.get("trend_period") or "M",
+		window=cint(parameters.get("window")) or 3,
+		threshold_percent=flt(parameters.get("threshold_percent")) or 50
+	)
 
 def check_completeness(test, parameters, data_source):
-	"""Built-in completeness check"""
-	# This would implement completeness checking logic
-	return []
+	"""Built-in completeness check of missing values per column"""
+	required_fields = [field.field_name for field in test.required_data_fields or [] if field.is_required]
+	return kernels.check_completeness(
+		get_data_reader(test, parameters, data_source),
+		fields=kernels.split_fields(parameters.get("fields")) or get_required_fields(test),
+		required_fields=required_fields,
+		max_missing_percent=flt(parameters.get("max_missing_percent"))
+	)
 
 def check_validity(test, parameters, data_source):
-	"""Built-in validity check"""
-	# This would implement validity checking logic
-	return []
+	"""Built-in validity check of required data fields against their types and rules"""
+	return kernels.check_validity(
+		get_data_reader(test, parameters, data_source),
+		[{
+			"field": field.field_name,
+			"field_type": field.field_type,
+			"validation_rule": field.validation_rule
+		} for field in test.required_data_fields or []]
+	)
 
 @frappe.whitelist()
 def get_tests_by_category(category=None, risk_area=None):
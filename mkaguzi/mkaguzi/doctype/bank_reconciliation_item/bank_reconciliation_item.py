@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025, Mkaguzi and contributors
+# For license information, please see license.txt
+
+from frappe.model.document import Document
+
+
+class BankReconciliationItem(Document):
+	# begin: auto-generated types
+	# This code is auto-generated. Do not modify anything in this block.
+
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		amount: DF.Currency
+		description: DF.SmallText | None
+		document_no: DF.Data | None
+		gl_entry: DF.Link
+		item_status: DF.Literal["Cleared", "Outstanding"]
+		parent: DF.Data
+		parentfield: DF.Data
+		parenttype: DF.Data
+		posting_date: DF.Date | None
+		statement_line_date: DF.Date | None
+		statement_reference: DF.Data | None
+
+	# end: auto-generated types
+
+	pass
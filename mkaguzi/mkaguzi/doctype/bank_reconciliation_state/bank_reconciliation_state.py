@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025, Mkaguzi and contributors
+# For license information, please see license.txt
+
+from frappe.model.document import Document
+
+
+class BankReconciliationState(Document):
+	# begin: auto-generated types
+	# This code is auto-generated. Do not modify anything in this block.
+
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		from mkaguzi.mkaguzi.doctype.bank_reconciliation_item.bank_reconciliation_item import BankReconciliationItem
+
+		aged_out_count: DF.Int
+		bank_account: DF.Data
+		book_balance: DF.Currency
+		cleared_count: DF.Int
+		difference: DF.Currency
+		gl_checkpoint: DF.Datetime | None
+		items: DF.Table[BankReconciliationItem]
+		outstanding_count: DF.Int
+		previous_state: DF.Link | None
+		reconciled: DF.Check
+		statement_balance: DF.Currency
+		statement_date: DF.Date
+		unmatched_statement_lines: DF.Int
+
+	# end: auto-generated types
+
+	def validate(self):
+		# Items are bulk inserted by the reconciliation engine, which sets the counts itself
+		if not self.items:
+			return
+
+		self.cleared_count = len([item for item in self.items if item.item_status == 'Cleared'])
+		self.outstanding_count = len([item for item in self.items if item.item_status == 'Outstanding'])
@@ -9,9 +9,21 @@ from frappe.model.document import Document
 from frappe.utils import nowdate, now_datetime, getdate, time_diff_in_seconds, cint
 import json
 import time
-import psutil
-import os
-from frappe.utils.background_jobs import enqueue
+from datetime import datetime
+from frappe.utils.background_jobs import enqueue, get_job
+from mkaguzi.utils.execution_profiler import ExecutionProfiler
+from mkaguzi.utils.result_store import ResultStore
+
+BATCH_DEFAULT_CONCURRENCY = 4
+BATCH_JOB_TIMEOUT = 4 * 60 * 60
+# A started batch worker that has not sent a heartbeat for this long is treated as dead
+BATCH_WORKER_STALE_SECONDS = 5 * 60
+BATCH_STATUS_COUNTERS = {
+	"Pass": "passed_tests",
+	"Fail": "failed_tests",
+	"Error": "failed_tests",
+	"Warning": "warning_tests"
+}
 
 class TestExecution(Document):
 	def autoname(self):
@@ -91,6 +103,10 @@ class TestExecution(Document):
 		elif self.status in ["Completed", "Failed"]:
 			self.finalize_execution()
 
+	def on_trash(self):
+		"""Remove result files spilled for this execution"""
+		ResultStore.delete(self.name)
+
 	def enqueue_execution(self):
 		"""Enqueue the test execution for background processing"""
 		if self.execution_type in ["Scheduled", "Batch"]:
@@ -103,31 +119,26 @@ class TestExecution(Document):
 
 	def start_execution(self):
 		"""Start the test execution"""
+		profiler = ExecutionProfiler()
 		try:
 			self.log_execution("INFO", "Starting test execution", "Initialization")
 
-			# Get test library
-			test_lib = frappe.get_doc("Audit Test Library", self.test_library_reference)
-
-			# Prepare parameters
-			execution_params = {}
-			if self.execution_parameters:
-				for param in self.execution_parameters:
-					execution_params[param.parameter_name] = param.parameter_value
+			with profiler:
+				with profiler.step("Load Test"):
+					# Get test library
+					test_lib = frappe.get_doc("Audit Test Library", self.test_library_reference)
 
-			# Execute test
-			start_time = time.time()
-			result = self.execute_test(test_lib, execution_params)
-			end_time = time.time()
+					# Prepare parameters
+					execution_params = {}
+					if self.execution_parameters:
+						for param in self.execution_parameters:
+							execution_params[param.parameter_name] = param.parameter_value
 
-			# Update performance metrics
-			self.execution_time_ms = int((end_time - start_time) * 1000)
-			self.records_per_second = self.total_records_processed / ((end_time - start_time) or 1)
-			self.memory_usage_mb = psutil.Process(os.getpid()).memory_info().rss / 1024 / 1024
-			self.cpu_usage_percent = psutil.cpu_percent(interval=1)
+				# Query and threshold steps are timed inside the test library
+				result = self.execute_test(test_lib, execution_params)
 
-			# Process results
-			self.process_test_results(result)
+				with profiler.step("Persistence"):
+					self.process_test_results(result)
 
 			# Update status
 			if self.failed_tests > 0:
@@ -135,7 +146,7 @@ class TestExecution(Document):
 			else:
 				self.status = "Completed"
 
-			self.log_execution("INFO", f"Test execution completed in {self.execution_time_ms}ms", "Completion")
+			self.log_execution("INFO", f"Test execution completed in {profiler.elapsed_ms}ms", "Completion")
 
 		except Exception as e:
 			self.status = "Failed"
@@ -143,8 +154,20 @@ class TestExecution(Document):
 			self.log_execution("ERROR", f"Test execution failed: {str(e)}", "Error Handling")
 			frappe.log_error(f"Test execution failed: {str(e)}", "Test Execution")
 
+		self.record_profile(profiler)
 		self.save()
 
+	def record_profile(self, profiler):
+		"""Store performance metrics and step timings from a profiler"""
+		self.execution_time_ms = profiler.elapsed_ms
+		self.records_per_second = (self.total_records_processed or 0) / ((profiler.elapsed_ms / 1000) or 1)
+		self.memory_usage_mb = profiler.peak_memory_mb
+		self.cpu_usage_percent = profiler.cpu_percent
+
+		for step in profiler.steps:
+			self.log_execution("DEBUG", f"{step['step_name']} took {step['duration_ms']}ms",
+				step["step_name"], step["duration_ms"])
+
 	def execute_test(self, test_lib, parameters):
 		"""Execute the test using the test library"""
 		from mkaguzi.mkaguzi.doctype.audit_test_library.audit_test_library import execute_test
@@ -168,7 +191,7 @@ class TestExecution(Document):
 			"test_status": result.get("status", "Unknown"),
 			"execution_time_ms": result.get("execution_time_ms", 0),
 			"records_processed": len(result.get("result", [])) if isinstance(result.get("result"), list) else 0,
-			"result_data": json.dumps(result.get("result", {})),
+			"result_data": frappe.as_json(ResultStore.store(self.name, "test_result", result.get("result", {}))),
 			"threshold_breached": result.get("status") in ["Fail", "Warning"]
 		}
 
@@ -213,7 +236,11 @@ class TestExecution(Document):
 				current_success = test_lib.success_rate or 0
 				test_lib.success_rate = (current_success * (test_lib.usage_count - 1)) / test_lib.usage_count
 
-			test_lib.save()
+			# Statistics only: keep the test's modified timestamp and skip its controller
+			test_lib.db_set({
+				"usage_count": test_lib.usage_count,
+				"success_rate": test_lib.success_rate
+			}, update_modified=False)
 
 	def log_execution(self, level, message, step_name=None, duration_ms=None):
 		"""Log execution steps"""
@@ -360,4 +387,300 @@ def get_execution_history(test_library_id=None, limit=50):
 		],
 		order_by="creation desc",
 		limit=limit
-	)
\ No newline at end of file
+	)
+
+@frappe.whitelist()
+def run_test_batch(tests, period, parameters=None, concurrency=BATCH_DEFAULT_CONCURRENCY, execution_name=None):
+	"""Run a set of library tests for a data period on parallel background workers"""
+	if isinstance(tests, str):
+		tests = json.loads(tests)
+	if isinstance(parameters, str):
+		parameters = json.loads(parameters)
+
+	tests = list(dict.fromkeys(tests or []))
+	if not tests:
+		frappe.throw(_("Select at least one test to run"))
+
+	active = frappe.get_all("Audit Test Library",
+		filters={"name": ["in", tests], "status": "Active"},
+		pluck="name"
+	)
+	inactive = [test for test in tests if test not in active]
+	if inactive:
+		frappe.throw(_("Cannot execute inactive or missing tests: {0}").format(", ".join(inactive)))
+
+	# Period lookups are resolved once and shared by every test in the batch
+	batch_params = get_period_parameters(period)
+	batch_params.update(parameters or {})
+
+	batch = frappe.new_doc("Test Execution")
+	batch.execution_name = execution_name or _("Batch of {0} tests for {1}").format(len(tests), period)
+	batch.execution_type = "Batch"
+	batch.status = "Pending"
+	batch.actual_start_date = now_datetime()
+	batch.total_tests = len(tests)
+	batch.passed_tests = 0
+	batch.failed_tests = 0
+	batch.warning_tests = 0
+
+	for param_name, param_value in batch_params.items():
+		batch.append("execution_parameters", {
+			"parameter_name": param_name,
+			"parameter_value": param_value
+		})
+
+	concurrency = min(max(cint(concurrency), 1), len(tests))
+	batch.log_execution("INFO", f"Queued {len(tests)} tests with {concurrency} workers", "Batch Scheduling")
+	batch.insert()
+
+	# Workers take tests from a shared queue until it is empty
+	queue_key = batch_queue_key(batch.name)
+	for test in tests:
+		frappe.cache().rpush(queue_key, test)
+	frappe.cache().set_value(batch_workers_key(batch.name), concurrency)
+
+	# Set directly: saving a Running execution would start it as a single test
+	frappe.db.set_value("Test Execution", batch.name, "status", "Running", update_modified=False)
+
+	for worker in range(concurrency):
+		enqueue(
+			"mkaguzi.mkaguzi.doctype.test_execution.test_execution.run_test_batch_worker",
+			queue="long",
+			timeout=BATCH_JOB_TIMEOUT,
+			job_id=batch_job_id(batch.name, worker),
+			enqueue_after_commit=True,
+			batch_name=batch.name,
+			parameters=batch_params,
+			worker=worker
+		)
+
+	return {
+		"batch_id": batch.name,
+		"total_tests": len(tests),
+		"concurrency": concurrency
+	}
+
+def get_period_parameters(period):
+	"""Data Period values passed to every test in a batch"""
+	period_doc = frappe.get_cached_doc("Data Period", period)
+	previous_period = frappe.db.get_value("Data Period",
+		filters={"end_date": ["<", period_doc.start_date]},
+		fieldname="name",
+		order_by="end_date desc"
+	)
+
+	return {
+		"period": period,
+		"start_date": str(period_doc.start_date),
+		"end_date": str(period_doc.end_date),
+		"previous_period": previous_period or ""
+	}
+
+def batch_queue_key(batch_name):
+	return f"test_batch_queue::{batch_name}"
+
+def batch_processing_key(batch_name, worker):
+	return f"test_batch_processing::{batch_name}::{worker}"
+
+def batch_workers_key(batch_name):
+	return f"test_batch_workers::{batch_name}"
+
+def batch_job_id(batch_name, worker):
+	return f"test_batch::{batch_name}::{worker}"
+
+def run_test_batch_worker(batch_name, parameters, worker=0):
+	"""Background job: run queued tests of a batch one at a time"""
+	cache = frappe.cache()
+	queue_key = cache.make_key(batch_queue_key(batch_name))
+	processing_key = cache.make_key(batch_processing_key(batch_name, worker))
+
+	while True:
+		# The test stays in the worker's processing list until its result is
+		# committed, so the sweep can settle it if this worker dies
+		test_id = cache.lmove(queue_key, processing_key, "LEFT", "RIGHT")
+		if not test_id:
+			break
+
+		run_batch_test(batch_name, frappe.safe_decode(test_id), parameters)
+		cache.lrem(processing_key, 1, test_id)
+
+def run_batch_test(batch_name, test_id, parameters):
+	"""Run one test of a batch and record its outcome on the batch"""
+	from mkaguzi.mkaguzi.doctype.audit_test_library.audit_test_library import execute_test
+
+	start_time = time.perf_counter()
+	error_message = None
+	try:
+		result = execute_test(test_id, dict(parameters))
+		frappe.db.commit()
+	except Exception:
+		frappe.db.rollback()
+		result = {"test_name": test_id, "status": "Error"}
+		error_message = frappe.get_traceback()
+		frappe.log_error(error_message, "Test Batch Execution")
+
+	duration_ms = int((time.perf_counter() - start_time) * 1000)
+	record_batch_result(batch_name, test_id, result, duration_ms, error_message)
+	frappe.db.commit()
+
+def record_batch_result(batch_name, test_id, result, duration_ms, error_message=None):
+	"""Add one test's result row and counters to the batch, finishing it after the last test"""
+	# Lock the batch so concurrent workers update counters and row order in turn
+	batch = frappe.get_doc("Test Execution", batch_name, for_update=True)
+
+	status = result.get("status")
+	if status not in BATCH_STATUS_COUNTERS:
+		status = "Skipped"
+	rows = result.get("result")
+
+	batch.append("test_results", {
+		"test_name": result.get("test_name") or test_id,
+		"test_status": status,
+		"execution_time_ms": duration_ms,
+		"records_processed": len(rows) if isinstance(rows, list) else 0,
+		"result_data": frappe.as_json(ResultStore.store(batch_name, f"test_result_{test_id}", rows or [])),
+		"error_message": error_message,
+		"threshold_breached": status in ["Fail", "Warning"]
+	}).db_insert()
+
+	if status in BATCH_STATUS_COUNTERS:
+		counter = BATCH_STATUS_COUNTERS[status]
+		batch.set(counter, cint(batch.get(counter)) + 1)
+
+	batch.total_records_processed = cint(batch.total_records_processed) + (len(rows) if isinstance(rows, list) else 0)
+	batch.progress_percentage = len(batch.test_results) * 100 / (batch.total_tests or 1)
+
+	if len(batch.test_results) < batch.total_tests:
+		batch.db_update()
+	else:
+		finish_test_batch(batch)
+
+	frappe.publish_realtime(
+		"test_batch_progress",
+		{
+			"batch_id": batch.name,
+			"test_id": test_id,
+			"test_status": status,
+			"completed_tests": len(batch.test_results),
+			"total_tests": batch.total_tests,
+			"progress_percentage": batch.progress_percentage
+		},
+		doctype="Test Execution",
+		docname=batch.name,
+		after_commit=True
+	)
+
+def finish_test_batch(batch):
+	"""Aggregate timings and set the final status of a batch"""
+	timings = [row.execution_time_ms or 0 for row in batch.test_results]
+	elapsed = time_diff_in_seconds(now_datetime(), batch.actual_start_date)
+
+	batch.execution_time_ms = int(elapsed * 1000)
+	batch.records_per_second = batch.total_records_processed / (elapsed or 1)
+	batch.status = "Failed" if batch.failed_tests else "Completed"
+	batch.log_execution("INFO",
+		f"Batch finished in {batch.execution_time_ms}ms; sum of test times {sum(timings)}ms, "
+		f"slowest test {max(timings)}ms",
+		"Batch Completion",
+		batch.execution_time_ms
+	)
+	batch.save(ignore_permissions=True)
+
+	cache = frappe.cache()
+	workers = cint(cache.get_value(batch_workers_key(batch.name)))
+	cache.delete_value([batch_queue_key(batch.name), batch_workers_key(batch.name)]
+		+ [batch_processing_key(batch.name, worker) for worker in range(workers)])
+
+def sweep_stale_test_batches():
+	"""Scheduler: settle running batches whose workers have died"""
+	for batch_name in frappe.get_all("Test Execution",
+		filters={"execution_type": "Batch", "status": "Running"},
+		pluck="name"
+	):
+		try:
+			recover_test_batch(batch_name)
+			frappe.db.commit()
+		except Exception:
+			frappe.db.rollback()
+			frappe.log_error(frappe.get_traceback(), "Test Batch Sweep")
+
+def recover_test_batch(batch_name):
+	"""
+	Fail the in-flight tests of dead workers and restart workers for queued tests
+
+	A test whose worker died is recorded as an error rather than queued
+	again, so a test that kills its worker cannot stall the batch forever.
+	"""
+	cache = frappe.cache()
+	workers = cint(cache.get_value(batch_workers_key(batch_name)))
+	if not workers:
+		return
+
+	pipe = cache.pipeline()
+	for worker in range(workers):
+		pipe.lrange(cache.make_key(batch_processing_key(batch_name, worker)), 0, -1)
+	pipe.llen(cache.make_key(batch_queue_key(batch_name)))
+	*in_flight, queued = pipe.execute()
+
+	live_workers = 0
+	for worker, test_ids in enumerate(in_flight):
+		if is_batch_worker_alive(batch_job_id(batch_name, worker)):
+			live_workers += 1
+			continue
+
+		for test_id in test_ids:
+			fail_abandoned_test(batch_name, worker, frappe.safe_decode(test_id))
+
+	if queued and not live_workers:
+		parameters = {row.parameter_name: row.parameter_value for row in frappe.get_all("Execution Parameter",
+			filters={"parent": batch_name, "parenttype": "Test Execution", "parentfield": "execution_parameters"},
+			fields=["parameter_name", "parameter_value"]
+		)}
+		for worker in range(workers):
+			job = get_job(batch_job_id(batch_name, worker))
+			if job:
+				job.delete()
+
+			enqueue(
+				"mkaguzi.mkaguzi.doctype.test_execution.test_execution.run_test_batch_worker",
+				queue="long",
+				timeout=BATCH_JOB_TIMEOUT,
+				job_id=batch_job_id(batch_name, worker),
+				enqueue_after_commit=True,
+				batch_name=batch_name,
+				parameters=parameters,
+				worker=worker
+			)
+
+def is_batch_worker_alive(job_id):
+	"""Whether a batch worker job is waiting to run or still sending heartbeats"""
+	job = get_job(job_id)
+	if not job:
+		return False
+
+	status = job.get_status(refresh=False)
+	if status in ("queued", "deferred", "scheduled"):
+		return True
+
+	if status == "started":
+		heartbeat = job.last_heartbeat
+		return bool(heartbeat) and (datetime.utcnow() - heartbeat).total_seconds() < BATCH_WORKER_STALE_SECONDS
+
+	return False
+
+def fail_abandoned_test(batch_name, worker, test_id):
+	"""Record a test left in flight by a dead worker as an error"""
+	# The worker may have died after committing the result but before
+	# clearing the test from its processing list
+	test_names = [test_id, frappe.db.get_value("Audit Test Library", test_id, "test_name") or test_id]
+	if not frappe.db.exists("Test Result", {
+		"parent": batch_name,
+		"parenttype": "Test Execution",
+		"test_name": ["in", test_names]
+	}):
+		record_batch_result(batch_name, test_id, {"test_name": test_id, "status": "Error"}, 0,
+			_("The worker running this test stopped before it finished"))
+		frappe.db.commit()
+
+	cache = frappe.cache()
+	cache.lrem(cache.make_key(batch_processing_key(batch_name, worker)), 0, test_id)
@@ -0,0 +1,371 @@
+import frappe
+from frappe import _
+import numpy as np
+import pandas as pd
+import re
+
+DEFAULT_MAX_RESULTS = 10000
+RESERVOIR_SIZE = 1000000
+COMPACT_EVERY = 16
+
+OUTLIER_DEFAULT_THRESHOLDS = {
+    'zscore': 3.0,
+    'iqr': 1.5,
+    'mad': 3.5
+}
+
+BOOLEAN_VALUES = {'0', '1', 'true', 'false', 'yes', 'no', 't', 'f', 'y', 'n'}
+
+
+def split_fields(value):
+    """
+    Field list from a list or a comma-separated parameter value
+    """
+    if not value:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(field) for field in value]
+    return [field.strip() for field in str(value).split(',') if field.strip()]
+
+
+def to_records(frame):
+    return frame.astype(object).where(frame.notna(), None).to_dict('records')
+
+
+def require_columns(chunk, fields):
+    missing = [field for field in fields if field not in chunk.columns]
+    if missing:
+        frappe.throw(_("Columns not found in test data: {0}").format(', '.join(missing)))
+
+
+def hash_rows(chunk, key_fields, normalize=True):
+    """
+    64-bit hash per row of the key columns, stable across chunks
+    """
+    keys = chunk[key_fields].astype(str)
+    if normalize:
+        keys = keys.apply(lambda column: column.str.strip().str.lower())
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+
+class HashCounter:
+    """
+    Occurrence counts per hash, kept as sorted unique arrays
+
+    Per-chunk counts are merged every COMPACT_EVERY chunks, so memory is
+    bounded by the number of distinct keys rather than rows.
+    """
+
+    def __init__(self):
+        self.parts = []
+
+    def add(self, hashes):
+        self.parts.append(np.unique(hashes, return_counts=True))
+        if len(self.parts) >= COMPACT_EVERY:
+            self.parts = [self.compact()]
+
+    def compact(self):
+        if not self.parts:
+            return np.array([], dtype=np.uint64), np.array([], dtype=np.int64)
+
+        hashes = np.concatenate([part[0] for part in self.parts])
+        counts = np.concatenate([part[1] for part in self.parts])
+        unique, inverse = np.unique(hashes, return_inverse=True)
+        return unique, np.bincount(inverse, weights=counts).astype(np.int64)
+
+    def duplicated(self):
+        unique, counts = self.compact()
+        repeated = counts > 1
+        return unique[repeated], counts[repeated]
+
+
+def detect_duplicates(read_chunks, key_fields, normalize=True, max_results=DEFAULT_MAX_RESULTS):
+    """
+    Rows whose key fields repeat, grouped by duplicate_key
+
+    The first pass counts key hashes; the second collects the rows of keys
+    seen more than once, up to max_results rows.
+    """
+    if not key_fields:
+        frappe.throw(_("Duplicate detection needs key_fields or required data fields"))
+
+    counter = HashCounter()
+    for chunk in read_chunks():
+        require_columns(chunk, key_fields)
+        counter.add(hash_rows(chunk, key_fields, normalize))
+
+    duplicate_hashes, duplicate_counts = counter.duplicated()
+    if not len(duplicate_hashes):
+        return []
+
+    matches, collected = [], 0
+    for chunk in read_chunks():
+        hashes = hash_rows(chunk, key_fields, normalize)
+        positions = np.minimum(np.searchsorted(duplicate_hashes, hashes), len(duplicate_hashes) - 1)
+        found = duplicate_hashes[positions] == hashes
+        if not found.any():
+            continue
+
+        matched = chunk[found].assign(
+            duplicate_key=[format(value, '016x') for value in hashes[found]],
+            duplicate_count=duplicate_counts[positions[found]]
+        )
+        matches.append(matched)
+        collected += len(matched)
+        if collected >= max_results:
+            break
+
+    frame = pd.concat(matches).sort_values(['duplicate_count', 'duplicate_key'], ascending=[False, True], kind='stable')
+    return to_records(frame.head(max_results).assign(exception_found=True))
+
+
+def merge_moments(moments, values):
+    """
+    Combine running (count, mean, M2) with a chunk (Chan et al.)
+    """
+    count, mean, m2 = moments
+    chunk_count = len(values)
+    if not chunk_count:
+        return moments
+
+    chunk_mean = values.mean()
+    chunk_m2 = ((values - chunk_mean) ** 2).sum()
+    total = count + chunk_count
+    delta = chunk_mean - mean
+
+    return total, mean + delta * chunk_count / total, m2 + chunk_m2 + delta ** 2 * count * chunk_count / total
+
+
+def update_reservoir(reservoir, seen, values, rng):
+    """
+    Uniform sample of at most RESERVOIR_SIZE values, updated in place
+    """
+    free = RESERVOIR_SIZE - len(reservoir)
+    if free > 0:
+        reservoir = np.concatenate([reservoir, values[:free]])
+        seen += min(free, len(values))
+        values = values[free:]
+
+    if len(values):
+        slots = rng.integers(0, seen + np.arange(1, len(values) + 1))
+        keep = slots < RESERVOIR_SIZE
+        reservoir[slots[keep]] = values[keep]
+        seen += len(values)
+
+    return reservoir, seen
+
+
+def analyze_outliers(read_chunks, value_field, method='zscore', threshold=None, max_results=DEFAULT_MAX_RESULTS):
+    """
+    Rows whose value_field is an outlier by z-score, IQR fences or MAD
+
+    The first pass gathers the mean and variance (z-score) or a uniform
+    sample for the quartiles and median (IQR, MAD); the second scores every
+    row and keeps the max_results highest scores.
+    """
+    method = (method or 'zscore').lower()
+    if method not in OUTLIER_DEFAULT_THRESHOLDS:
+        frappe.throw(_("Unknown outlier method {0}").format(method))
+    threshold = threshold or OUTLIER_DEFAULT_THRESHOLDS[method]
+
+    moments = (0, 0.0, 0.0)
+    reservoir, seen = np.array([], dtype=np.float64), 0
+    rng = np.random.default_rng(0)
+
+    for chunk in read_chunks():
+        require_columns(chunk, [value_field])
+        values = pd.to_numeric(chunk[value_field], errors='coerce').dropna().to_numpy(dtype=np.float64)
+        if method == 'zscore':
+            moments = merge_moments(moments, values)
+        else:
+            reservoir, seen = update_reservoir(reservoir, seen, values, rng)
+
+    if method == 'zscore':
+        count, mean, m2 = moments
+        center, scale = mean, np.sqrt(m2 / count) if count else 0.0
+    elif method == 'iqr':
+        if not len(reservoir):
+            return []
+        q1, q3 = np.percentile(reservoir, [25, 75])
+        center, scale = (q1, q3), q3 - q1
+    else:
+        if not len(reservoir):
+            return []
+        median = np.median(reservoir)
+        center, scale = median, np.median(np.abs(reservoir - median)) / 0.6745
+
+    if not scale:
+        return []
+
+    top = None
+    for chunk in read_chunks():
+        values = pd.to_numeric(chunk[value_field], errors='coerce').to_numpy(dtype=np.float64)
+
+        if method == 'iqr':
+            q1, q3 = center
+            scores = np.maximum(q1 - values, values - q3) / scale
+        else:
+            scores = np.abs(values - center) / scale
+
+        flagged = np.nan_to_num(scores, nan=-np.inf) > threshold
+        if not flagged.any():
+            continue
+
+        found = chunk[flagged].assign(outlier_score=np.round(scores[flagged], 4))
+        top = found if top is None else pd.concat([top, found])
+        top = top.nlargest(max_results, 'outlier_score', keep='first')
+
+    if top is None:
+        return []
+
+    return to_records(top.assign(outlier_method=method, exception_found=True))
+
+
+def analyze_trends(read_chunks, date_field, value_field=None, period='M', window=3, threshold_percent=50):
+    """
+    Per-period totals compared with the rolling mean of the previous window
+
+    Periods moving more than threshold_percent from that baseline are
+    flagged. Without value_field the row count per period is used.
+    """
+    parts = []
+    for chunk in read_chunks():
+        require_columns(chunk, [date_field] + ([value_field] if value_field else []))
+        periods = pd.to_datetime(chunk[date_field], errors='coerce', format='mixed').dt.to_period(period)
+        values = pd.to_numeric(chunk[value_field], errors='coerce') if value_field else pd.Series(1, index=chunk.index)
+        parts.append(values.groupby(periods).agg(['sum', 'count']))
+        if len(parts) >= COMPACT_EVERY:
+            parts = [pd.concat(parts).groupby(level=0).sum()]
+
+    if not parts:
+        return []
+
+    totals = pd.concat(parts).groupby(level=0).sum().sort_index()
+    if totals.empty:
+        return []
+    totals = totals.reindex(pd.period_range(totals.index.min(), totals.index.max(), freq=totals.index.freq), fill_value=0)
+
+    baseline = totals['sum'].rolling(window, min_periods=window).mean().shift(1)
+    change = (totals['sum'] - baseline) / baseline.abs().replace(0, np.nan) * 100
+
+    trend = pd.DataFrame({
+        'period': totals.index.astype(str),
+        'total': totals['sum'].to_numpy(),
+        'record_count': totals['count'].to_numpy(),
+        'baseline': baseline.round(2).to_numpy(),
+        'change_percent': change.round(2).to_numpy()
+    })
+    trend['exception_found'] = trend['change_percent'].abs() > threshold_percent
+
+    return to_records(trend)
+
+
+def missing_mask(values):
+    mask = values.isna()
+    if values.dtype == object or pd.api.types.is_string_dtype(values):
+        mask |= values.astype(str).str.strip() == ''
+    return mask
+
+
+def check_completeness(read_chunks, fields=None, required_fields=None, max_missing_percent=0):
+    """
+    Missing (null or blank) values per column
+
+    A column is an exception when more than max_missing_percent of its
+    values are missing and it is required (or no fields are required).
+    """
+    required_fields = set(required_fields or [])
+    missing, total_rows = {}, 0
+
+    for chunk in read_chunks():
+        columns = fields or list(chunk.columns)
+        require_columns(chunk, columns)
+        total_rows += len(chunk)
+        for column in columns:
+            missing[column] = missing.get(column, 0) + int(missing_mask(chunk[column]).sum())
+
+    results = []
+    for column, count in missing.items():
+        percent = round(count * 100 / total_rows, 2) if total_rows else 0
+        is_required = column in required_fields
+        results.append({
+            'field': column,
+            'total_rows': total_rows,
+            'missing_count': count,
+            'missing_percent': percent,
+            'is_required': is_required,
+            'exception_found': percent > max_missing_percent and (is_required or not required_fields)
+        })
+
+    return results
+
+
+def valid_mask(values, field_type, rule=None):
+    if field_type == 'Integer':
+        numbers = pd.to_numeric(values, errors='coerce')
+        mask = numbers.notna() & (numbers % 1 == 0)
+    elif field_type == 'Float':
+        mask = pd.to_numeric(values, errors='coerce').notna()
+    elif field_type in ('Date', 'DateTime'):
+        mask = pd.to_datetime(values, errors='coerce', format='mixed').notna()
+    elif field_type == 'Boolean':
+        mask = values.astype(str).str.strip().str.lower().isin(BOOLEAN_VALUES)
+    else:
+        mask = pd.Series(True, index=values.index)
+
+    if rule:
+        mask &= values.astype(str).str.fullmatch(rule).fillna(False).astype(bool)
+
+    return mask
+
+
+def check_validity(read_chunks, field_specs, sample_size=5):
+    """
+    Values that do not parse as their field type or match their validation rule
+
+    field_specs are dicts with field, field_type and an optional regex
+    validation_rule. Blank values are left to the completeness check.
+    """
+    if not field_specs:
+        frappe.throw(_("Validity check needs required data fields with types or validation rules"))
+
+    rules = {}
+    for spec in field_specs:
+        try:
+            rules[spec['field']] = re.compile(spec['validation_rule']) if spec.get('validation_rule') else None
+        except re.error as e:
+            frappe.throw(_("Validation rule for {0} is not a valid regular expression: {1}").format(spec['field'], e))
+
+    stats = {spec['field']: {'checked': 0, 'invalid': 0, 'samples': []} for spec in field_specs}
+
+    for chunk in read_chunks():
+        require_columns(chunk, list(stats))
+        for spec in field_specs:
+            values = chunk[spec['field']]
+            present = ~missing_mask(values)
+            invalid = present & ~valid_mask(values, spec.get('field_type'), rules[spec['field']])
+
+            field_stats = stats[spec['field']]
+            field_stats['checked'] += int(present.sum())
+            field_stats['invalid'] += int(invalid.sum())
+            if invalid.any() and len(field_stats['samples']) < sample_size:
+                for value in values[invalid].astype(str).unique()[:sample_size]:
+                    if value not in field_stats['samples'] and len(field_stats['samples']) < sample_size:
+                        field_stats['samples'].append(value)
+
+    results = []
+    for spec in field_specs:
+        field_stats = stats[spec['field']]
+        results.append({
+            'field': spec['field'],
+            'field_type': spec.get('field_type'),
+            'validation_rule': spec.get('validation_rule'),
+            'checked_rows': field_stats['checked'],
+            'invalid_count': field_stats['invalid'],
+            'invalid_percent': round(field_stats['invalid'] * 100 / field_stats['checked'], 2)
+            if field_stats['checked'] else 0,
+            'sample_invalid_values': ', '.join(field_stats['samples']),
+            'exception_found': field_stats['invalid'] > 0
+        })
+
+    return results
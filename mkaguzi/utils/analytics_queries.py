@@ -0,0 +1,88 @@
+import frappe
+import itertools
+import time
+from contextlib import contextmanager
+
+
+def filter_clause(column, param, value, operator='='):
+    """
+    Optional filter bound to a named parameter
+
+    Returns an empty string when value is not set, so a query has at most
+    two SQL texts per optional filter instead of one per value.
+    """
+    return f"AND {column} {operator} %({param})s" if value else ""
+
+
+@contextmanager
+def profile_queries():
+    """
+    Collect the SQL, parameters, row counts and timings of every run_query
+    call made inside the block
+    """
+    previous = getattr(frappe.local, 'analytics_query_log', None)
+    query_log = []
+    frappe.local.analytics_query_log = query_log
+
+    try:
+        yield query_log
+    finally:
+        frappe.local.analytics_query_log = previous
+
+
+def run_query(name, query, values=None, as_dict=True):
+    """
+    Run a parameterized analytics query
+
+    Values are always passed separately from the SQL text, so each query has
+    a stable text for the server's statement digests and plan caches. When a
+    profile_queries block is active the query is recorded under name.
+    """
+    start = time.perf_counter()
+    result = frappe.db.sql(query, values, as_dict=as_dict)
+    duration_ms = (time.perf_counter() - start) * 1000
+
+    query_log = getattr(frappe.local, 'analytics_query_log', None)
+    if query_log is not None:
+        query_log.append({
+            'name': name,
+            'sql': ' '.join(query.split()),
+            'values': values,
+            'rows': len(result),
+            'duration_ms': round(duration_ms, 2)
+        })
+
+    return result
+
+
+def stream_query(name, query, values=None, chunk_size=50000, as_dict=False):
+    """
+    Yield the rows of a parameterized query as lists of tuples (or dicts)
+
+    Rows are read through an unbuffered cursor, so at most chunk_size rows
+    are held in memory. No other query may run on the connection until the
+    generator is exhausted or closed.
+    """
+    start = time.perf_counter()
+    rows = 0
+
+    with frappe.db.unbuffered_cursor():
+        result = frappe.db.sql(query, values, as_dict=as_dict, as_iterator=True)
+
+        while True:
+            chunk = list(itertools.islice(result, chunk_size))
+            if not chunk:
+                break
+
+            rows += len(chunk)
+            yield chunk
+
+    query_log = getattr(frappe.local, 'analytics_query_log', None)
+    if query_log is not None:
+        query_log.append({
+            'name': name,
+            'sql': ' '.join(query.split()),
+            'values': values,
+            'rows': rows,
+            'duration_ms': round((time.perf_counter() - start) * 1000, 2)
+        })
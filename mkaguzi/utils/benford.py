@@ -0,0 +1,169 @@
+import numpy as np
+
+# Nigrini's mean absolute deviation thresholds: close, acceptable, marginal conformity
+MAD_THRESHOLDS = {
+    'first_digit': (0.006, 0.012, 0.015),
+    'second_digit': (0.008, 0.010, 0.012),
+    'first_two_digits': (0.0012, 0.0018, 0.0022),
+    'last_two_digits': None
+}
+
+
+def expected_distributions():
+    """
+    Benford proportions for each digit test, indexed by digit value
+    """
+    first_two = np.zeros(100)
+    first_two[10:] = np.log10(1 + 1 / np.arange(10, 100))
+
+    first = np.zeros(10)
+    first[1:] = np.log10(1 + 1 / np.arange(1, 10))
+
+    second = first_two[10:].reshape(9, 10).sum(axis=0)
+
+    return {
+        'first_digit': first,
+        'second_digit': second,
+        'first_two_digits': first_two,
+        'last_two_digits': np.full(100, 0.01)
+    }
+
+
+class BenfordAnalyzer:
+    """
+    Streaming Benford's Law analysis over chunks of amounts
+
+    Digits are derived arithmetically from float64 arrays (no string
+    conversion) and accumulated as counts, so memory stays bounded by the
+    chunk size. Optional segment labels (account, user, source code) get
+    their own first-digit counts in the same pass.
+    """
+
+    DIGIT_RANGES = {
+        'first_digit': range(1, 10),
+        'second_digit': range(0, 10),
+        'first_two_digits': range(10, 100),
+        'last_two_digits': range(0, 100)
+    }
+
+    def __init__(self):
+        self.total = 0
+        self.counts = {
+            'first_digit': np.zeros(10, dtype=np.int64),
+            'second_digit': np.zeros(10, dtype=np.int64),
+            'first_two_digits': np.zeros(100, dtype=np.int64),
+            'last_two_digits': np.zeros(100, dtype=np.int64)
+        }
+        self.segment_index = {}
+        self.segment_counts = np.zeros((0, 10), dtype=np.int64)
+
+    @staticmethod
+    def first_two_digits(amounts):
+        """
+        Leading two digits (10-99) of positive amounts >= 10
+        """
+        exponent = np.floor(np.log10(amounts))
+        leading = np.floor(amounts / np.power(10.0, exponent - 1)).astype(np.int64)
+
+        # Correct log10 rounding at exact powers of ten
+        leading = np.where(leading >= 100, leading // 10, leading)
+        leading = np.where(leading < 10, leading * 10, leading)
+        return leading
+
+    def add(self, amounts, segments=None):
+        """
+        Add a chunk of amounts, with an optional parallel array of segment labels
+        """
+        amounts = np.abs(np.asarray(amounts, dtype=np.float64))
+        valid = np.isfinite(amounts) & (amounts >= 10)
+        amounts = amounts[valid]
+
+        if not len(amounts):
+            return
+
+        leading = self.first_two_digits(amounts)
+        first = leading // 10
+
+        self.total += len(amounts)
+        self.counts['first_digit'] += np.bincount(first, minlength=10)
+        self.counts['second_digit'] += np.bincount(leading % 10, minlength=10)
+        self.counts['first_two_digits'] += np.bincount(leading, minlength=100)
+        self.counts['last_two_digits'] += np.bincount(
+            (np.floor(amounts) % 100).astype(np.int64), minlength=100
+        )
+
+        if segments is not None:
+            self.add_segments(np.asarray(segments, dtype=object)[valid], first)
+
+    def add_segments(self, segments, first):
+        labels, codes = np.unique(segments.astype(str), return_inverse=True)
+
+        rows = np.array([self.segment_index.setdefault(str(label), len(self.segment_index)) for label in labels])
+        if len(self.segment_index) > len(self.segment_counts):
+            grown = np.zeros((len(self.segment_index), 10), dtype=np.int64)
+            grown[:len(self.segment_counts)] = self.segment_counts
+            self.segment_counts = grown
+
+        np.add.at(self.segment_counts, (rows[codes], first), 1)
+
+    @staticmethod
+    def conformity(test, mad):
+        thresholds = MAD_THRESHOLDS.get(test)
+        if not thresholds:
+            return None
+
+        close, acceptable, marginal = thresholds
+        if mad <= close:
+            return 'Close Conformity'
+        if mad <= acceptable:
+            return 'Acceptable Conformity'
+        if mad <= marginal:
+            return 'Marginal Conformity'
+        return 'Nonconformity'
+
+    def test_result(self, test, counts=None, total=None):
+        """
+        Distribution, MAD, chi-square and conformity for one digit test
+        """
+        counts = self.counts[test] if counts is None else counts
+        total = self.total if total is None else total
+        digits = np.array(self.DIGIT_RANGES[test])
+        expected = expected_distributions()[test][digits]
+        actual = counts[digits] / total if total else np.zeros(len(digits))
+
+        mad = float(np.mean(np.abs(actual - expected))) if total else 0.0
+        chi_square = float(np.sum((counts[digits] - expected * total) ** 2 / (expected * total))) if total else 0.0
+
+        return {
+            'test': test,
+            'records': int(total),
+            'mad': round(mad, 6),
+            'chi_square': round(chi_square, 2),
+            'conformity': self.conformity(test, mad),
+            'distribution': [{
+                'digit': int(digit),
+                'count': int(count),
+                'expected_percent': round(float(exp) * 100, 2),
+                'actual_percent': round(float(act) * 100, 2)
+            } for digit, count, exp, act in zip(digits, counts[digits], expected, actual)]
+        }
+
+    def results(self):
+        return {test: self.test_result(test) for test in self.counts}
+
+    def segment_results(self, min_records=0):
+        """
+        First-digit test per segment, least conforming (highest MAD) first
+        """
+        results = []
+        for label, row in self.segment_index.items():
+            counts = self.segment_counts[row]
+            total = int(counts.sum())
+            if total < min_records:
+                continue
+
+            result = self.test_result('first_digit', counts, total)
+            result['segment'] = label
+            results.append(result)
+
+        return sorted(results, key=lambda result: result['mad'], reverse=True)
@@ -6,6 +6,87 @@ import io
 from datetime import datetime
 import chardet
 
+# Bytes read from the start of a file for encoding detection
+ENCODING_SAMPLE_SIZE = 64 * 1024
+
+# Rows per batch when streaming and validating large files
+DEFAULT_CHUNK_SIZE = 10000
+
+# Errors kept per validation run; further errors are only counted
+MAX_VALIDATION_ERRORS = 1000
+
+
+class CSVStream:
+    """
+    Lazily parsed CSV file yielding row dictionaries
+
+    Only the header and an encoding sample are read up front, so iterating
+    a multi-GB export keeps memory bounded by the chunk being processed.
+    Rows whose column count differs from the header are skipped and their
+    line numbers recorded (up to MAX_VALIDATION_ERRORS).
+    """
+
+    def __init__(self, file_path, delimiter=',', has_header=True, encoding=None,
+                 sample_size=ENCODING_SAMPLE_SIZE):
+        self.file_path = file_path
+        self.delimiter = delimiter
+        self.has_header = has_header
+        self.encoding = encoding or CSVParser.detect_file_encoding(file_path, sample_size)
+        self.header = self._read_header()
+        self.total_rows = 0
+        self.inconsistent_rows = []
+        self.inconsistent_count = 0
+
+    def _open(self):
+        return open(self.file_path, 'r', encoding=self.encoding, errors='replace', newline='')
+
+    def _read_header(self):
+        with self._open() as f:
+            first_row = next(csv.reader(f, delimiter=self.delimiter), None)
+
+        if first_row is None:
+            return []
+
+        if self.has_header:
+            return first_row
+
+        return [f'Column_{i+1}' for i in range(len(first_row))]
+
+    def __iter__(self):
+        self.total_rows = 0
+        self.inconsistent_rows = []
+        self.inconsistent_count = 0
+
+        with self._open() as f:
+            reader = csv.reader(f, delimiter=self.delimiter)
+            if self.has_header:
+                next(reader, None)
+
+            for row in reader:
+                if len(row) != len(self.header):
+                    self.inconsistent_count += 1
+                    if len(self.inconsistent_rows) < MAX_VALIDATION_ERRORS:
+                        self.inconsistent_rows.append(reader.line_num)
+                    continue
+
+                self.total_rows += 1
+                yield dict(zip(self.header, row))
+
+    def iter_chunks(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Yield lists of at most chunk_size row dictionaries
+        """
+        chunk = []
+        for row in self:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+
+        if chunk:
+            yield chunk
+
+
 class CSVParser:
     """
     Enhanced CSV parser with encoding detection and data validation
@@ -23,50 +104,50 @@ class CSVParser:
             return 'utf-8'
 
     @staticmethod
-    def parse_csv_file(file_path, delimiter=',', has_header=True, encoding=None):
+    def detect_file_encoding(file_path, sample_size=ENCODING_SAMPLE_SIZE):
         """
-        Parse CSV file with automatic encoding detection
+        Detect the encoding of a file from a bounded sample of its content
         """
-        try:
-            # Read file content
-            with open(file_path, 'rb') as f:
-                file_content = f.read()
+        with open(file_path, 'rb') as f:
+            sample = f.read(sample_size)
 
-            # Detect encoding if not provided
-            if not encoding:
-                encoding = CSVParser.detect_encoding(file_content)
+        encoding = CSVParser.detect_encoding(sample) or 'utf-8'
 
-            # Parse CSV
-            content_str = file_content.decode(encoding, errors='replace')
-            csv_reader = csv.reader(io.StringIO(content_str), delimiter=delimiter)
+        # A pure-ASCII sample says nothing about the rest of the file;
+        # UTF-8 is a superset and decodes the same bytes identically
+        if encoding.lower() == 'ascii':
+            encoding = 'utf-8'
 
-            rows = list(csv_reader)
+        return encoding
 
-            if not rows:
-                return {'success': False, 'error': 'File is empty'}
+    @staticmethod
+    def stream_csv_file(file_path, delimiter=',', has_header=True, encoding=None):
+        """
+        Open a CSV file for streaming; see CSVStream
+        """
+        return CSVStream(file_path, delimiter, has_header, encoding)
 
-            # Extract header and data
-            if has_header:
-                header = rows[0]
-                data_rows = rows[1:]
-            else:
-                # Generate column names
-                header = [f'Column_{i+1}' for i in range(len(rows[0]))]
-                data_rows = rows
+    @staticmethod
+    def parse_csv_file(file_path, delimiter=',', has_header=True, encoding=None):
+        """
+        Parse CSV file with automatic encoding detection
+        """
+        try:
+            stream = CSVParser.stream_csv_file(file_path, delimiter, has_header, encoding)
 
-            # Convert to list of dictionaries
-            data = []
-            for row in data_rows:
-                if len(row) == len(header):
-                    row_dict = dict(zip(header, row))
-                    data.append(row_dict)
+            if not stream.header:
+                return {'success': False, 'error': 'File is empty'}
+
+            data = list(stream)
 
             return {
                 'success': True,
-                'header': header,
+                'header': stream.header,
                 'data': data,
                 'total_rows': len(data),
-                'encoding': encoding,
+                'inconsistent_count': stream.inconsistent_count,
+                'inconsistent_rows': stream.inconsistent_rows,
+                'encoding': stream.encoding,
                 'delimiter': delimiter
             }
 
@@ -94,18 +175,25 @@ class CSVParser:
                 header = [f'Column_{i+1}' for i in range(len(rows[0]))]
                 data_rows = rows
 
-            # Convert to list of dictionaries
+            # Convert to list of dictionaries, recording rows that do not
+            # match the header as CSVStream does
             data = []
-            for row in data_rows:
+            inconsistent_rows = []
+            first_line = 2 if has_header else 1
+            for line, row in enumerate(data_rows, start=first_line):
                 if len(row) == len(header):
                     row_dict = dict(zip(header, row))
                     data.append(row_dict)
+                else:
+                    inconsistent_rows.append(line)
 
             return {
                 'success': True,
                 'header': header,
                 'data': data,
-                'total_rows': len(data)
+                'total_rows': len(data),
+                'inconsistent_count': len(inconsistent_rows),
+                'inconsistent_rows': inconsistent_rows[:MAX_VALIDATION_ERRORS]
             }
 
         except Exception as e:
@@ -151,15 +239,13 @@ class CSVParser:
             if empty_rows > 0:
                 validation_results['warnings'].append(f"Found {empty_rows} empty rows")
 
-            # Check column consistency
-            inconsistent_rows = []
-            for i, row in enumerate(rows):
-                if len(row) != len(header):
-                    inconsistent_rows.append(i + 1)
-
-            if inconsistent_rows:
+            # Rows whose column count differs from the header were left out
+            # by the parser
+            if data.get('inconsistent_count'):
                 validation_results['valid'] = False
-                validation_results['errors'].append(f"Inconsistent column count in rows: {inconsistent_rows}")
+                validation_results['errors'].append(
+                    CSVParser.inconsistent_rows_message(data['inconsistent_count'], data.get('inconsistent_rows', []))
+                )
 
             # Validate data types and formats
             data_validation = CSVParser.validate_data_types(rows, column_mappings)
@@ -175,9 +261,85 @@ class CSVParser:
             return {'valid': False, 'error': str(e)}
 
     @staticmethod
-    def validate_data_types(rows, column_mappings=None):
+    def inconsistent_rows_message(count, lines):
+        return f"Inconsistent column count in {count} rows (lines: {lines})"
+
+    @staticmethod
+    def validate_csv_stream(stream, required_columns=None, column_mappings=None,
+                            chunk_size=DEFAULT_CHUNK_SIZE, max_errors=MAX_VALIDATION_ERRORS, preview_size=0):
+        """
+        Validate a CSVStream chunk by chunk in constant memory
+
+        Returns the same structure as validate_csv_structure. At most
+        max_errors errors and warnings are kept; the totals are reported in
+        error_count and warning_count. With preview_size the first rows are
+        kept in 'preview', taken during the same pass over the file.
+        """
+        try:
+            header = stream.header
+
+            validation_results = {
+                'valid': True,
+                'errors': [],
+                'warnings': [],
+                'error_count': 0,
+                'warning_count': 0,
+                'column_count': len(header),
+                'row_count': 0
+            }
+            if preview_size:
+                validation_results['preview'] = []
+
+            def add_messages(key, messages):
+                validation_results[f"{key[:-1]}_count"] += len(messages)
+                room = max_errors - len(validation_results[key])
+                if room > 0:
+                    validation_results[key].extend(messages[:room])
+
+            # Check required columns
+            if required_columns:
+                missing_columns = [col for col in required_columns if col not in header]
+                if missing_columns:
+                    add_messages('errors', [f"Missing required columns: {', '.join(missing_columns)}"])
+
+            empty_rows = 0
+            for chunk in stream.iter_chunks(chunk_size):
+                start_row = validation_results['row_count']
+                validation_results['row_count'] += len(chunk)
+
+                if preview_size and len(validation_results['preview']) < preview_size:
+                    validation_results['preview'].extend(chunk[:preview_size - len(validation_results['preview'])])
+
+                empty_rows += sum(
+                    1 for row in chunk if all(not str(value).strip() for value in row.values())
+                )
+
+                data_validation = CSVParser.validate_data_types(chunk, column_mappings, start_row=start_row)
+                add_messages('errors', data_validation.get('errors', []))
+                add_messages('warnings', data_validation.get('warnings', []))
+
+            if empty_rows > 0:
+                add_messages('warnings', [f"Found {empty_rows} empty rows"])
+
+            if stream.inconsistent_count:
+                add_messages('errors', [
+                    CSVParser.inconsistent_rows_message(stream.inconsistent_count, stream.inconsistent_rows)
+                ])
+
+            validation_results['valid'] = validation_results['error_count'] == 0
+
+            return validation_results
+
+        except Exception as e:
+            return {'valid': False, 'error': str(e)}
+
+    @staticmethod
+    def validate_data_types(rows, column_mappings=None, start_row=0):
         """
         Validate data types in CSV rows
+
+        start_row is the index of the first row in the file, so chunks of a
+        stream report the same row numbers as a full parse.
         """
         errors = []
         warnings = []
@@ -185,7 +347,7 @@ class CSVParser:
         if not column_mappings:
             return {'errors': errors, 'warnings': warnings}
 
-        for i, row in enumerate(rows):
+        for i, row in enumerate(rows, start=start_row):
             row_num = i + 2  # Account for header row
 
             for col_name, expected_type in column_mappings.items():
@@ -229,75 +391,13 @@ class CSVParser:
         Clean and standardize CSV data
         """
         try:
-            cleaned_data = []
             cleaning_stats = {
                 'total_rows': len(data.get('data', [])),
                 'cleaned_rows': 0,
                 'corrections_made': 0
             }
 
-            for row in data.get('data', []):
-                cleaned_row = {}
-
-                for col, value in row.items():
-                    original_value = str(value).strip()
-
-                    # Apply cleaning rules
-                    if cleaning_rules and col in cleaning_rules:
-                        rules = cleaning_rules[col]
-
-                        # Trim whitespace
-                        if rules.get('trim', True):
-                            cleaned_value = original_value.strip()
-                        else:
-                            cleaned_value = original_value
-
-                        # Convert to uppercase/lowercase
-                        if rules.get('uppercase'):
-                            cleaned_value = cleaned_value.upper()
-                        elif rules.get('lowercase'):
-                            cleaned_value = cleaned_value.lower()
-
-                        # Remove specific characters
-                        if rules.get('remove_chars'):
-                            for char in rules['remove_chars']:
-                                cleaned_value = cleaned_value.replace(char, '')
-
-                        # Replace values
-                        if rules.get('replace_values'):
-                            for old_val, new_val in rules['replace_values'].items():
-                                if cleaned_value == old_val:
-                                    cleaned_value = new_val
-
-                        # Number formatting
-                        if rules.get('type') == 'number':
-                            try:
-                                # Remove commas and spaces
-                                cleaned_value = cleaned_value.replace(',', '').replace(' ', '')
-                                float(cleaned_value)  # Validate it's a number
-                            except ValueError:
-                                cleaned_value = original_value  # Keep original if invalid
-
-                        # Date formatting
-                        if rules.get('type') == 'date' and rules.get('date_format'):
-                            try:
-                                parsed_date = datetime.strptime(cleaned_value, rules['date_format'])
-                                cleaned_value = parsed_date.strftime('%Y-%m-%d')
-                            except ValueError:
-                                pass  # Keep original if parsing fails
-
-                    else:
-                        # Default cleaning: trim whitespace
-                        cleaned_value = original_value.strip()
-
-                    cleaned_row[col] = cleaned_value
-
-                    # Track changes
-                    if cleaned_value != original_value:
-                        cleaning_stats['corrections_made'] += 1
-
-                cleaned_data.append(cleaned_row)
-                cleaning_stats['cleaned_rows'] += 1
+            cleaned_data = list(CSVParser.iter_clean_rows(data.get('data', []), cleaning_rules, cleaning_stats))
 
             return {
                 'success': True,
@@ -308,6 +408,87 @@ class CSVParser:
         except Exception as e:
             return {'success': False, 'error': str(e)}
 
+    @staticmethod
+    def iter_clean_rows(rows, cleaning_rules=None, cleaning_stats=None):
+        """
+        Lazily clean an iterable of row dictionaries (e.g. a CSVStream)
+
+        cleaning_stats, if given, is updated in place as rows are consumed.
+        """
+        if cleaning_stats is None:
+            cleaning_stats = {}
+        cleaning_stats.setdefault('cleaned_rows', 0)
+        cleaning_stats.setdefault('corrections_made', 0)
+
+        for row in rows:
+            cleaned_row = {}
+
+            for col, value in row.items():
+                original_value = str(value).strip()
+
+                # Apply cleaning rules
+                if cleaning_rules and col in cleaning_rules:
+                    cleaned_value = CSVParser.apply_cleaning_rules(original_value, cleaning_rules[col])
+                else:
+                    # Default cleaning: trim whitespace
+                    cleaned_value = original_value.strip()
+
+                cleaned_row[col] = cleaned_value
+
+                # Track changes
+                if cleaned_value != original_value:
+                    cleaning_stats['corrections_made'] += 1
+
+            cleaning_stats['cleaned_rows'] += 1
+            yield cleaned_row
+
+    @staticmethod
+    def apply_cleaning_rules(original_value, rules):
+        """
+        Apply one column's cleaning rules to a value
+        """
+        # Trim whitespace
+        if rules.get('trim', True):
+            cleaned_value = original_value.strip()
+        else:
+            cleaned_value = original_value
+
+        # Convert to uppercase/lowercase
+        if rules.get('uppercase'):
+            cleaned_value = cleaned_value.upper()
+        elif rules.get('lowercase'):
+            cleaned_value = cleaned_value.lower()
+
+        # Remove specific characters
+        if rules.get('remove_chars'):
+            for char in rules['remove_chars']:
+                cleaned_value = cleaned_value.replace(char, '')
+
+        # Replace values
+        if rules.get('replace_values'):
+            for old_val, new_val in rules['replace_values'].items():
+                if cleaned_value == old_val:
+                    cleaned_value = new_val
+
+        # Number formatting
+        if rules.get('type') == 'number':
+            try:
+                # Remove commas and spaces
+                cleaned_value = cleaned_value.replace(',', '').replace(' ', '')
+                float(cleaned_value)  # Validate it's a number
+            except ValueError:
+                cleaned_value = original_value  # Keep original if invalid
+
+        # Date formatting
+        if rules.get('type') == 'date' and rules.get('date_format'):
+            try:
+                parsed_date = datetime.strptime(cleaned_value, rules['date_format'])
+                cleaned_value = parsed_date.strftime('%Y-%m-%d')
+            except ValueError:
+                pass  # Keep original if parsing fails
+
+        return cleaned_value
+
     @staticmethod
     def generate_csv_preview(data, max_rows=10):
         """
@@ -332,11 +513,17 @@ class CSVParser:
 
 
 @frappe.whitelist()
-def parse_and_validate_csv(file_path, data_type=None, delimiter=',', has_header=True):
+def parse_and_validate_csv(file_path, data_type=None, delimiter=',', has_header=True, streaming=False):
     """
     Parse and validate CSV file for import
+
+    With streaming enabled the file is validated chunk by chunk and only a
+    preview is returned instead of the parsed rows.
     """
     try:
+        if frappe.utils.cint(streaming):
+            return stream_and_validate_csv(file_path, data_type, delimiter, has_header)
+
         # Parse CSV
         parser = CSVParser()
         parsed_data = parser.parse_csv_file(file_path, delimiter, has_header)
@@ -369,6 +556,44 @@ def parse_and_validate_csv(file_path, data_type=None, delimiter=',', has_header=
         return {'success': False, 'error': str(e)}
 
 
+def stream_and_validate_csv(file_path, data_type=None, delimiter=',', has_header=True):
+    """
+    Validate a CSV file in constant memory, returning a preview of its rows
+    """
+    stream = CSVParser.stream_csv_file(file_path, delimiter, has_header)
+
+    if not stream.header:
+        return {'success': False, 'error': 'File is empty'}
+
+    validation_rules = {}
+    if data_type:
+        from .validators import get_validation_rules
+        validation_rules = get_validation_rules(data_type)
+
+    validation_result = CSVParser.validate_csv_stream(stream, validation_rules.get('required_columns'),
+                                                      preview_size=10)
+    preview_rows = validation_result.pop('preview', [])
+
+    return {
+        'success': True,
+        'parsed_data': {
+            'header': stream.header,
+            'total_rows': validation_result.get('row_count', 0),
+            'encoding': stream.encoding,
+            'delimiter': delimiter
+        },
+        'validation': validation_result,
+        'preview': {
+            'header': stream.header,
+            'rows': preview_rows,
+            'total_rows': validation_result.get('row_count', 0),
+            'preview_rows': len(preview_rows),
+            'has_more': validation_result.get('row_count', 0) > len(preview_rows)
+        },
+        'data_type': data_type
+    }
+
+
 @frappe.whitelist()
 def clean_csv_data(csv_data, cleaning_rules=None):
     """
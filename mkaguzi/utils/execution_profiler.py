@@ -0,0 +1,108 @@
+import frappe
+import os
+import psutil
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_SAMPLE_INTERVAL = 0.2
+
+
+class ExecutionProfiler:
+    """
+    CPU, peak memory and step timings for one test execution
+
+    A daemon thread samples the process every interval seconds while the
+    profiler is active, so nothing blocks the execution itself. Steps are
+    timed with profiler.step(name), or with profile_step(name) from code
+    that has no reference to the profiler.
+    """
+
+    def __init__(self, interval=DEFAULT_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.process = psutil.Process(os.getpid())
+        self.cpu_count = psutil.cpu_count() or 1
+        self.steps = []
+        self.cpu_samples = []
+        self.peak_rss = 0
+        self.started = None
+        self.stopped = None
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.previous = None
+
+    def __enter__(self):
+        self.previous = getattr(frappe.local, 'execution_profiler', None)
+        frappe.local.execution_profiler = self
+
+        # The first cpu_percent call only sets the baseline for the next one
+        self.process.cpu_percent(None)
+        self.peak_rss = self.process.memory_info().rss
+        self.started = time.perf_counter()
+
+        self.thread = threading.Thread(target=self.sample, name='execution-profiler', daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop_event.set()
+        self.thread.join()
+        self.stopped = time.perf_counter()
+
+        # Final sample covers runs shorter than one interval
+        self.take_sample()
+        frappe.local.execution_profiler = self.previous
+        return False
+
+    def sample(self):
+        while not self.stop_event.wait(self.interval):
+            self.take_sample()
+
+    def take_sample(self):
+        try:
+            self.cpu_samples.append(self.process.cpu_percent(None) / self.cpu_count)
+            self.peak_rss = max(self.peak_rss, self.process.memory_info().rss)
+        except psutil.Error:
+            pass
+
+    @contextmanager
+    def step(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_step(name, start)
+
+    def record_step(self, name, start):
+        self.steps.append({
+            'step_name': name,
+            'duration_ms': int((time.perf_counter() - start) * 1000)
+        })
+
+    @property
+    def elapsed_ms(self):
+        if self.started is None:
+            return 0
+        return int(((self.stopped or time.perf_counter()) - self.started) * 1000)
+
+    @property
+    def cpu_percent(self):
+        return round(sum(self.cpu_samples) / len(self.cpu_samples), 2) if self.cpu_samples else 0
+
+    @property
+    def peak_memory_mb(self):
+        return round(self.peak_rss / 1024 / 1024, 2)
+
+
+@contextmanager
+def profile_step(name):
+    """
+    Time a block as a step of the active ExecutionProfiler, if any
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler = getattr(frappe.local, 'execution_profiler', None)
+        if profiler is not None:
+            profiler.record_step(name, start)
@@ -0,0 +1,270 @@
+import frappe
+import pandas as pd
+import time
+from abc import ABC, abstractmethod
+
+# Columns streamed from `tabGL Entry` for every rule
+JOURNAL_ENTRY_COLUMNS = [
+    'document_no', 'posting_date', 'account_no', 'account_name', 'amount',
+    'debit_amount', 'credit_amount', 'description', 'user_id'
+]
+
+DAY_NAMES = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+
+class JournalEntryRule(ABC):
+    """
+    A journal entry red flag evaluated over streamed chunks of GL rows
+
+    Subclasses set name and label, consume each chunk (a DataFrame with
+    JOURNAL_ENTRY_COLUMNS) in process(), and return their flagged rows from
+    findings() and exception dicts from exceptions(). Rules registered with
+    register_rule, or listed under the "journal_entry_rules" hook, all run
+    on the same single scan of the period.
+    """
+
+    name = None
+    label = None
+
+    def __init__(self, params):
+        self.params = params
+
+    @abstractmethod
+    def process(self, chunk):
+        pass
+
+    @abstractmethod
+    def findings(self):
+        pass
+
+    def exceptions(self, findings):
+        return []
+
+    @staticmethod
+    def to_records(frame, columns):
+        frame = frame[columns]
+        return frame.astype(object).where(frame.notna(), None).to_dict('records')
+
+
+JOURNAL_ENTRY_RULES = {}
+
+
+def register_rule(rule_class):
+    """
+    Class decorator adding a rule to the built-in journal entry rules
+    """
+    JOURNAL_ENTRY_RULES[rule_class.name] = rule_class
+    return rule_class
+
+
+def get_journal_entry_rules(params):
+    """
+    Instantiate the built-in rules followed by any provided through hooks
+    """
+    rule_classes = list(JOURNAL_ENTRY_RULES.values())
+    rule_classes += [frappe.get_attr(path) for path in frappe.get_hooks('journal_entry_rules')]
+
+    return [rule_class(params) for rule_class in rule_classes]
+
+
+@register_rule
+class RoundNumberRule(JournalEntryRule):
+    """
+    Entries of at least 10,000 in exact thousands (the 100 largest)
+    """
+
+    name = 'round_numbers'
+    label = 'Round Number Entries'
+    limit = 100
+
+    def __init__(self, params):
+        super().__init__(params)
+        self.top = pd.DataFrame(columns=JOURNAL_ENTRY_COLUMNS)
+
+    def process(self, chunk):
+        amount = chunk['amount']
+        flagged = chunk[(amount % 1000 == 0) & (amount.abs() >= 10000)]
+        if len(flagged):
+            combined = pd.concat([self.top, flagged]) if len(self.top) else flagged
+            self.top = combined.loc[combined['amount'].abs().sort_values(ascending=False, kind='stable').index[:self.limit]]
+
+    def findings(self):
+        return self.to_records(self.top, [
+            'document_no', 'posting_date', 'account_no', 'account_name', 'amount', 'description', 'user_id'
+        ])
+
+    def exceptions(self, findings):
+        return [{
+            'document_no': entry['document_no'],
+            'description': f"Round number entry: KES {entry['amount']:,.2f} - {entry['description']}",
+            'amount': entry['amount'],
+            'risk_rating': 'Medium',
+            'requires_investigation': True
+        } for entry in findings[:20]]  # Top 20
+
+
+@register_rule
+class WeekendPostingRule(JournalEntryRule):
+    """
+    Entries posted on a Saturday or Sunday
+    """
+
+    name = 'weekend_postings'
+    label = 'Weekend/Holiday Postings'
+
+    def __init__(self, params):
+        super().__init__(params)
+        self.parts = []
+
+    def process(self, chunk):
+        weekday = pd.to_datetime(chunk['posting_date']).dt.dayofweek
+        flagged = chunk[weekday >= 5]
+        if len(flagged):
+            # Same numbering as SQL DAYOFWEEK: Sunday=1 ... Saturday=7
+            self.parts.append(flagged.assign(day_of_week=(weekday[weekday >= 5] + 1) % 7 + 1))
+
+    def findings(self):
+        if not self.parts:
+            return []
+
+        flagged = pd.concat(self.parts).sort_values('posting_date', ascending=False, kind='stable')
+        return self.to_records(flagged, [
+            'document_no', 'posting_date', 'day_of_week', 'account_no', 'account_name',
+            'amount', 'description', 'user_id'
+        ])
+
+    def exceptions(self, findings):
+        return [{
+            'document_no': entry['document_no'],
+            'description': f"Weekend posting on {DAY_NAMES[(entry['day_of_week'] + 5) % 7]} - {entry['description']}",
+            'amount': entry['amount'],
+            'risk_rating': 'Medium',
+            'requires_investigation': True
+        } for entry in findings]
+
+
+@register_rule
+class LargeEntryRule(JournalEntryRule):
+    """
+    Manual entries above threshold_amount (default 1,000,000)
+    """
+
+    name = 'large_entries'
+    label = 'Large Manual Entries'
+
+    def __init__(self, params):
+        super().__init__(params)
+        self.threshold_amount = float(params.get('threshold_amount', 1000000))
+        self.parts = []
+
+    def process(self, chunk):
+        flagged = chunk[chunk['amount'].abs() > self.threshold_amount]
+        if len(flagged):
+            self.parts.append(flagged)
+
+    def findings(self):
+        if not self.parts:
+            return []
+
+        flagged = pd.concat(self.parts)
+        flagged = flagged.loc[flagged['amount'].abs().sort_values(ascending=False, kind='stable').index]
+        return self.to_records(flagged, [
+            'document_no', 'posting_date', 'account_no', 'account_name', 'amount', 'description', 'user_id'
+        ])
+
+    def exceptions(self, findings):
+        return [{
+            'document_no': entry['document_no'],
+            'description': f"Large manual entry: KES {entry['amount']:,.2f} - {entry['description']}",
+            'amount': entry['amount'],
+            'risk_rating': 'High',
+            'requires_investigation': True
+        } for entry in findings]
+
+
+@register_rule
+class UnbalancedEntryRule(JournalEntryRule):
+    """
+    Journal documents whose debits and credits differ by more than 0.01
+
+    Partial sums per document are kept across chunks, since a document's
+    lines may be split between chunks.
+    """
+
+    name = 'unbalanced_entries'
+    label = 'Unbalanced Entries'
+    combine_every = 20
+
+    def __init__(self, params):
+        super().__init__(params)
+        self.parts = []
+
+    def process(self, chunk):
+        self.parts.append(
+            chunk.groupby(['document_no', 'posting_date'], sort=False)[['debit_amount', 'credit_amount']].sum()
+        )
+        if len(self.parts) >= self.combine_every:
+            self.parts = [self.combined()]
+
+    def combined(self):
+        return pd.concat(self.parts).groupby(level=[0, 1], sort=False).sum()
+
+    def findings(self):
+        if not self.parts:
+            return []
+
+        totals = self.combined().reset_index().rename(
+            columns={'debit_amount': 'total_debit', 'credit_amount': 'total_credit'}
+        )
+        totals['imbalance'] = (totals['total_debit'] - totals['total_credit']).abs()
+        totals = totals[totals['imbalance'] > 0.01].sort_values('imbalance', ascending=False, kind='stable')
+
+        return self.to_records(totals, ['document_no', 'posting_date', 'total_debit', 'total_credit', 'imbalance'])
+
+    def exceptions(self, findings):
+        return [{
+            'document_no': entry['document_no'],
+            'description': f"Unbalanced entry - Imbalance: KES {entry['imbalance']:,.2f}",
+            'amount': entry['imbalance'],
+            'risk_rating': 'Critical',
+            'requires_investigation': True
+        } for entry in findings]
+
+
+def evaluate_journal_entry_rules(chunks, params):
+    """
+    Run every journal entry rule over one stream of GL row chunks
+
+    Returns (findings by rule name, exceptions, per-rule stats with the
+    flagged count and time spent in the rule).
+    """
+    rules = get_journal_entry_rules(params)
+    timings = {rule.name: 0.0 for rule in rules}
+    rows_scanned = 0
+
+    for chunk in chunks:
+        frame = pd.DataFrame.from_records(chunk, columns=JOURNAL_ENTRY_COLUMNS)
+        for column in ('amount', 'debit_amount', 'credit_amount'):
+            frame[column] = frame[column].astype(float)
+        rows_scanned += len(frame)
+
+        for rule in rules:
+            start = time.perf_counter()
+            rule.process(frame)
+            timings[rule.name] += time.perf_counter() - start
+
+    findings, exceptions, stats = {}, [], []
+    for rule in rules:
+        start = time.perf_counter()
+        findings[rule.name] = rule.findings()
+        exceptions.extend(rule.exceptions(findings[rule.name]))
+        timings[rule.name] += time.perf_counter() - start
+
+        stats.append({
+            'rule': rule.name,
+            'label': rule.label,
+            'count': len(findings[rule.name]),
+            'duration_ms': round(timings[rule.name] * 1000, 2)
+        })
+
+    return findings, exceptions, {'rows_scanned': rows_scanned, 'rules': stats}
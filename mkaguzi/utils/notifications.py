@@ -1,9 +1,30 @@
 import frappe
 from frappe import _
-from frappe.utils import get_url, now_datetime
-from datetime import datetime, timedelta
+from frappe.utils import create_batch, get_url, getdate, now_datetime
+from datetime import datetime
+from functools import partial
+import itertools
 import json
 
+from mkaguzi.utils.weekly_digest import WeeklyDigest
+
+# Days between repeated reminders for the same overdue item
+OVERDUE_NOTIFICATION_INTERVAL_DAYS = 7
+# Items listed per section of an overdue digest
+OVERDUE_DIGEST_ITEM_LIMIT = 50
+OVERDUE_UPDATE_BATCH_SIZE = 1000
+
+NOTIFICATION_EVENTS_KEY = 'audit_notification_events'
+# Events taken by a flush stay here until they are sent
+NOTIFICATION_EVENTS_PROCESSING_KEY = 'audit_notification_events::processing'
+NOTIFICATION_FLUSH_LOCK_KEY = 'audit_notification_events::lock'
+NOTIFICATION_FLUSH_LOCK_TTL = 15 * 60
+NOTIFICATION_EVENT_KEY_PREFIX = 'audit_notification_event'
+# Seconds during which repeats of an event are dropped, overridable with
+# audit_notification_debounce_seconds in site_config.json
+NOTIFICATION_DEBOUNCE_SECONDS = 3600
+NOTIFICATION_EVENT_FLUSH_BATCH = 500
+
 class NotificationManager:
     """
     Notification manager for audit system
@@ -12,7 +33,10 @@ class NotificationManager:
     @staticmethod
     def send_notification(recipients, subject, message, notification_type='Info', related_document=None):
         """
-        Send notification to users
+        Record a notification and queue its delivery
+
+        Emails are sent by a background job once the current transaction
+        commits, so document saves do not wait on the fan-out.
         """
         try:
             # Create notification document
@@ -23,29 +47,35 @@ class NotificationManager:
                 'notification_type': notification_type,
                 'related_document': related_document,
                 'sent_date': now_datetime(),
-                'status': 'Sent'
+                'status': 'Pending'
             })
 
             # Add recipients
             if isinstance(recipients, str):
                 recipients = [recipients]
 
-            for recipient in recipients:
+            for recipient in dict.fromkeys(filter(None, recipients)):
                 notification.append('recipients', {
                     'user': recipient,
                     'status': 'Pending'
                 })
 
             notification.insert()
-            frappe.db.commit()
 
-            # Send actual notifications (email, in-app, etc.)
-            NotificationManager._send_to_recipients(notification)
+            if notification.recipients:
+                frappe.enqueue(
+                    'mkaguzi.utils.notifications.deliver_notification',
+                    queue='short',
+                    job_id=f"audit_notification::{notification.name}",
+                    deduplicate=True,
+                    enqueue_after_commit=True,
+                    notification_id=notification.name
+                )
 
             return {
                 'success': True,
                 'notification_id': notification.name,
-                'message': 'Notification sent successfully'
+                'message': 'Notification queued for delivery'
             }
 
         except Exception as e:
@@ -53,32 +83,52 @@ class NotificationManager:
             return {'success': False, 'error': str(e)}
 
     @staticmethod
-    def _send_to_recipients(notification):
-        """
-        Send notification to individual recipients
+    def _send_to_recipients(notification_id):
         """
-        try:
-            for recipient in notification.recipients:
-                try:
-                    # Send in-app notification
-                    frappe.sendmail(
-                        recipients=[recipient.user],
-                        subject=notification.subject,
-                        message=notification.message,
-                        header=_('Internal Audit Notification')
-                    )
+        Deliver a notification to its pending recipients
 
-                    # Mark as sent
-                    recipient.status = 'Sent'
+        All recipients share one email queue entry, and their rows are
+        marked Sent or Failed with a single UPDATE.
+        """
+        recipient_doctype = frappe.get_meta('Audit Notification').get_field('recipients').options
+
+        notification = frappe.db.get_value('Audit Notification', notification_id,
+            ['name', 'subject', 'message'], as_dict=True)
+        if not notification:
+            return {'success': False, 'error': f'Notification {notification_id} not found'}
+
+        users = frappe.db.sql_list(f"""
+            SELECT DISTINCT user
+            FROM `tab{recipient_doctype}`
+            WHERE parent = %s AND parenttype = 'Audit Notification'
+            AND parentfield = 'recipients' AND status = 'Pending'
+        """, notification_id)
+        if not users:
+            return {'success': True, 'sent': 0}
 
-                except Exception as e:
-                    frappe.log_error(f"Failed to send notification to {recipient.user}: {str(e)}")
-                    recipient.status = 'Failed'
+        try:
+            frappe.sendmail(
+                recipients=users,
+                subject=notification.subject,
+                message=notification.message,
+                header=_('Internal Audit Notification'),
+                reference_doctype='Audit Notification',
+                reference_name=notification_id
+            )
+            status = 'Sent'
+        except Exception:
+            frappe.log_error(frappe.get_traceback(), _("Recipient Notification Error"))
+            status = 'Failed'
 
-            notification.save()
+        frappe.db.sql(f"""
+            UPDATE `tab{recipient_doctype}`
+            SET status = %s, modified = %s
+            WHERE parent = %s AND parenttype = 'Audit Notification'
+            AND parentfield = 'recipients' AND status = 'Pending'
+        """, (status, now_datetime(), notification_id))
+        frappe.db.set_value('Audit Notification', notification_id, 'status', status, update_modified=False)
 
-        except Exception as e:
-            frappe.log_error(frappe.get_traceback(), _("Recipient Notification Error"))
+        return {'success': status == 'Sent', 'sent': len(users) if status == 'Sent' else 0}
 
     @staticmethod
     def notify_finding_created(finding_id):
@@ -89,7 +139,7 @@ class NotificationManager:
             finding = frappe.get_doc('Audit Finding', finding_id)
 
             # Get responsible person
-            responsible_person = finding.responsible_party
+            responsible_person = finding.responsible_person
 
             # Get audit execution team members
             execution = frappe.get_doc('Audit Execution', finding.audit_execution)
@@ -127,14 +177,14 @@ class NotificationManager:
             return {'success': False, 'error': str(e)}
 
     @staticmethod
-    def notify_finding_overdue(finding_id):
+    def notify_finding_overdue(finding_id, recipients=None):
         """
         Notify when a finding becomes overdue
         """
         try:
             finding = frappe.get_doc('Audit Finding', finding_id)
 
-            recipients = [finding.responsible_party]
+            recipients = recipients or [finding.responsible_person]
 
             subject = f"OVERDUE: Audit Finding {finding.finding_title}"
             message = f"""
@@ -276,47 +326,77 @@ class NotificationManager:
     @staticmethod
     def schedule_overdue_notifications():
         """
-        Schedule notifications for overdue items
+        Send each responsible user one digest of their overdue items
+
+        Overdue findings and compliance checks are read with their
+        recipients in one query per doctype, grouped per user, and stamped
+        with a bulk UPDATE once the digests are queued.
         """
         try:
-            # Find overdue findings
-            overdue_findings = frappe.db.sql("""
-                SELECT name, finding_title, responsible_party, target_completion_date
-                FROM `tabAudit Finding`
-                WHERE status IN ('Open', 'In Progress')
-                AND target_completion_date < CURDATE()
-                AND (last_notification_date IS NULL OR last_notification_date < DATE_SUB(CURDATE(), INTERVAL 7 DAY))
-            """, as_dict=True)
-
-            # Send notifications for overdue findings
-            for finding in overdue_findings:
-                NotificationManager.notify_finding_overdue(finding.name)
-
-                # Update last notification date
-                frappe.db.set_value('Audit Finding', finding.name, 'last_notification_date', datetime.now())
-
-            # Find overdue compliance checks
-            overdue_compliance = frappe.db.sql("""
-                SELECT name, check_name, responsible_person, next_due_date
-                FROM `tabCompliance Check`
-                WHERE status = 'Scheduled'
-                AND next_due_date < CURDATE()
-                AND (last_notification_date IS NULL OR last_notification_date < DATE_SUB(CURDATE(), INTERVAL 7 DAY))
-            """, as_dict=True)
-
-            # Send notifications for overdue compliance
-            for check in overdue_compliance:
-                NotificationManager.notify_compliance_due(check.name)
-
-                # Update last notification date
-                frappe.db.set_value('Compliance Check', check.name, 'last_notification_date', datetime.now())
+            values = {'interval': OVERDUE_NOTIFICATION_INTERVAL_DAYS}
+            overdue_items = frappe.db.sql("""
+                SELECT 'Audit Finding' AS doctype, item.name, item.finding_title AS title,
+                    item.responsible_person AS recipient, item.target_completion_date AS due_date,
+                    DATEDIFF(CURDATE(), item.target_completion_date) AS days_overdue
+                FROM `tabAudit Finding` item
+                INNER JOIN `tabUser` u ON u.name = item.responsible_person AND u.enabled = 1
+                WHERE item.finding_status IN ('Open', 'Action in Progress')
+                AND item.target_completion_date < CURDATE()
+                AND (item.last_notification_date IS NULL
+                    OR item.last_notification_date < DATE_SUB(CURDATE(), INTERVAL %(interval)s DAY))
+            """, values, as_dict=True)
+
+            # Compliance Check is not defined in this app; it is only read
+            # where a site provides it, so findings are notified regardless
+            if frappe.db.table_exists('Compliance Check'):
+                overdue_items += frappe.db.sql("""
+                    SELECT 'Compliance Check' AS doctype, item.name, item.check_name AS title,
+                        item.responsible_person AS recipient, item.next_due_date AS due_date,
+                        DATEDIFF(CURDATE(), item.next_due_date) AS days_overdue
+                    FROM `tabCompliance Check` item
+                    INNER JOIN `tabUser` u ON u.name = item.responsible_person AND u.enabled = 1
+                    WHERE item.status = 'Scheduled'
+                    AND item.next_due_date < CURDATE()
+                    AND (item.last_notification_date IS NULL
+                        OR item.last_notification_date < DATE_SUB(CURDATE(), INTERVAL %(interval)s DAY))
+                """, values, as_dict=True)
+
+            overdue_items = sorted(overdue_items, key=lambda item: (item.recipient, item.doctype, -item.days_overdue))
+
+            notified = {'Audit Finding': [], 'Compliance Check': []}
+            digests_sent = 0
+
+            for recipient, items in itertools.groupby(overdue_items, key=lambda item: item.recipient):
+                items = list(items)
+                result = NotificationManager.send_notification(
+                    recipients=[recipient],
+                    subject=f"OVERDUE: {len(items)} audit item(s) need your attention",
+                    message=NotificationManager._build_overdue_digest(items),
+                    notification_type='Overdue Digest'
+                )
+
+                if result.get('success'):
+                    digests_sent += 1
+                    for item in items:
+                        notified[item.doctype].append(item.name)
+
+            # Stamp everything that was notified in one statement per doctype
+            notification_date = now_datetime()
+            for doctype, names in notified.items():
+                for batch in create_batch(names, OVERDUE_UPDATE_BATCH_SIZE):
+                    frappe.db.sql(f"""
+                        UPDATE `tab{doctype}`
+                        SET last_notification_date = %s
+                        WHERE name IN %s
+                    """, (notification_date, tuple(batch)))
 
             frappe.db.commit()
 
             return {
                 'success': True,
-                'overdue_findings_notified': len(overdue_findings),
-                'overdue_compliance_notified': len(overdue_compliance)
+                'overdue_findings_notified': len(notified['Audit Finding']),
+                'overdue_compliance_notified': len(notified['Compliance Check']),
+                'digests_sent': digests_sent
             }
 
         except Exception as e:
@@ -324,65 +404,38 @@ class NotificationManager:
             return {'success': False, 'error': str(e)}
 
     @staticmethod
-    def send_weekly_digest():
+    def _build_overdue_digest(items):
         """
-        Send weekly digest of audit activities
+        Message body listing one user's overdue findings and compliance checks
         """
-        try:
-            # Calculate date range (last 7 days)
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=7)
-
-            # Get audit activities summary
-            activities = {
-                'new_findings': frappe.db.count('Audit Finding',
-                    filters={'creation': ['between', [start_date, end_date]]}),
-                'resolved_findings': frappe.db.count('Audit Finding',
-                    filters={'status': 'Resolved', 'modified': ['between', [start_date, end_date]]}),
-                'completed_tests': frappe.db.sql("""
-                    SELECT COUNT(*) as count
-                    FROM `tabExecuted Test`
-                    WHERE status = 'Completed'
-                    AND modified BETWEEN %s AND %s
-                """, (start_date, end_date), as_dict=True)[0]['count'],
-                'compliance_checks': frappe.db.count('Compliance Execution',
-                    filters={'execution_date': ['between', [start_date, end_date]]})
-            }
-
-            # Get recipients (all audit users)
-            audit_users = frappe.db.sql("""
-                SELECT DISTINCT user
-                FROM `tabAudit Execution Team`
-                UNION
-                SELECT DISTINCT responsible_party
-                FROM `tabAudit Finding`
-                WHERE responsible_party IS NOT NULL
-            """, as_dict=True)
-
-            recipients = [user['user'] for user in audit_users]
-
-            subject = f"Weekly Audit Digest - {end_date.strftime('%B %d, %Y')}"
-            message = f"""
-            Weekly Audit Activities Summary ({start_date.strftime('%B %d')} - {end_date.strftime('%B %d, %Y')}):
+        sections = {
+            'Audit Finding': ('Overdue Findings', 'audit-finding'),
+            'Compliance Check': ('Overdue Compliance Checks', 'compliance-check')
+        }
 
-            📊 Key Metrics:
-            • New Findings: {activities['new_findings']}
-            • Resolved Findings: {activities['resolved_findings']}
-            • Completed Tests: {activities['completed_tests']}
-            • Compliance Checks: {activities['compliance_checks']}
+        lines = ["URGENT: The following items assigned to you are overdue:", ""]
+        for doctype, doctype_items in itertools.groupby(items, key=lambda item: item.doctype):
+            doctype_items = list(doctype_items)
+            heading, route = sections[doctype]
 
-            📈 Progress:
-            • Finding Resolution Rate: {round(activities['resolved_findings'] / max(activities['new_findings'], 1) * 100, 1)}%
+            lines.append(f"{heading} ({len(doctype_items)}):")
+            for item in doctype_items[:OVERDUE_DIGEST_ITEM_LIMIT]:
+                lines.append(f"• {item.title or item.name} - due {item.due_date}, "
+                    f"{item.days_overdue} days overdue: {get_url()}/app/{route}/{item.name}")
+            if len(doctype_items) > OVERDUE_DIGEST_ITEM_LIMIT:
+                lines.append(f"• ... and {len(doctype_items) - OVERDUE_DIGEST_ITEM_LIMIT} more")
+            lines.append("")
 
-            View Full Dashboard: {get_url()}/app/audit-dashboard
-            """
+        lines.append("Immediate action is required to address these items.")
+        return "\n".join(lines)
 
-            return NotificationManager.send_notification(
-                recipients=recipients,
-                subject=subject,
-                message=message,
-                notification_type='Weekly Digest'
-            )
+    @staticmethod
+    def send_weekly_digest(week=None):
+        """
+        Send each audit user their personal weekly digest, once per week
+        """
+        try:
+            return WeeklyDigest.send(week)
 
         except Exception as e:
             frappe.log_error(frappe.get_traceback(), _("Weekly Digest Error"))
@@ -427,19 +480,12 @@ def schedule_notifications():
     try:
         manager = NotificationManager()
 
-        # Send overdue notifications
+        # Send overdue notifications; the weekly digest has its own schedule
         overdue_result = manager.schedule_overdue_notifications()
 
-        # Send weekly digest (if it's Monday)
-        if datetime.now().weekday() == 0:  # Monday
-            digest_result = manager.send_weekly_digest()
-        else:
-            digest_result = {'success': True, 'message': 'Not Monday - skipping weekly digest'}
-
         return {
             'success': True,
-            'overdue_notifications': overdue_result,
-            'weekly_digest': digest_result
+            'overdue_notifications': overdue_result
         }
 
     except Exception as e:
@@ -448,11 +494,127 @@ def schedule_notifications():
 
 
 @frappe.whitelist()
-def send_weekly_digest():
+def send_weekly_digest(week=None):
     """
     Send weekly digest of audit activities (module-level function for hooks)
     """
-    return NotificationManager.send_weekly_digest()
+    return NotificationManager.send_weekly_digest(week)
+
+
+def deliver_notification(notification_id):
+    """
+    Background job sending a queued Audit Notification
+    """
+    result = NotificationManager._send_to_recipients(notification_id)
+    frappe.db.commit()
+    return result
+
+
+
+def get_notification_debounce_seconds():
+    return frappe.utils.cint(frappe.conf.get('audit_notification_debounce_seconds')
+        or NOTIFICATION_DEBOUNCE_SECONDS)
+
+
+def queue_notification_event(event_type, document, recipients):
+    """
+    Record an event for the background flush, once per debounce window
+
+    Nothing is recorded until the current transaction commits, so a rolled
+    back save neither sends the event nor starts its debounce window.
+    """
+    frappe.db.after_commit.add(partial(push_notification_event, event_type, document, list(recipients or [])))
+
+
+def push_notification_event(event_type, document, recipients):
+    """
+    Push an event for each recipient not already notified in the window
+
+    The dedupe key is (event type, document, recipient): repeats within the
+    window are dropped, so hot write paths cost one Redis SET per recipient.
+    Returns the number of recipients queued.
+    """
+    cache = frappe.cache()
+    window = get_notification_debounce_seconds()
+
+    queued = 0
+    for recipient in dict.fromkeys(filter(None, recipients)):
+        dedupe_key = cache.make_key(f"{NOTIFICATION_EVENT_KEY_PREFIX}::{event_type}::{document}::{recipient}")
+        if not cache.set(dedupe_key, 1, ex=window, nx=True):
+            continue
+
+        cache.rpush(NOTIFICATION_EVENTS_KEY, json.dumps({
+            'event_type': event_type,
+            'document': document,
+            'recipient': recipient
+        }))
+        queued += 1
+
+    if queued:
+        frappe.enqueue(
+            'mkaguzi.utils.notifications.flush_notification_events',
+            queue='short',
+            job_id='audit_notification_events::flush',
+            deduplicate=True
+        )
+
+    return queued
+
+
+def flush_notification_events():
+    """
+    Background job sending queued events, one notification per document
+
+    Events are moved to a processing list and only dropped once sent, so
+    events taken by a flush that dies are sent by the next one. A lock
+    keeps one flush at a time. Also runs from the scheduler to pick up
+    events pushed while a flush was already in progress.
+    """
+    cache = frappe.cache()
+    lock_key = cache.make_key(NOTIFICATION_FLUSH_LOCK_KEY)
+    if not cache.set(lock_key, 1, ex=NOTIFICATION_FLUSH_LOCK_TTL, nx=True):
+        return
+
+    try:
+        while True:
+            # Left over from a flush that died, otherwise the next batch
+            pending = cache.lrange(NOTIFICATION_EVENTS_PROCESSING_KEY, 0, -1)
+            if not pending:
+                pipe = cache.pipeline(transaction=False)
+                for _i in range(NOTIFICATION_EVENT_FLUSH_BATCH):
+                    pipe.lmove(cache.make_key(NOTIFICATION_EVENTS_KEY),
+                        cache.make_key(NOTIFICATION_EVENTS_PROCESSING_KEY), 'LEFT', 'RIGHT')
+                pending = list(filter(None, pipe.execute()))
+
+            if not pending:
+                break
+
+            events = {}
+            for event in pending:
+                event = json.loads(frappe.safe_decode(event))
+                events.setdefault((event['event_type'], event['document']), []).append(event['recipient'])
+
+            send_notification_events(events)
+            cache.delete_value(NOTIFICATION_EVENTS_PROCESSING_KEY)
+
+    finally:
+        cache.delete(lock_key)
+
+
+def send_notification_events(events):
+    handlers = {
+        'finding_overdue': NotificationManager.notify_finding_overdue
+    }
+
+    for (event_type, document), recipients in events.items():
+        handler = handlers.get(event_type)
+        if handler is None:
+            frappe.log_error(f"Unknown notification event type: {event_type}", _("Notification Event Error"))
+            continue
+
+        handler(document, recipients=recipients)
+
+    frappe.db.commit()
 
 
 # Document event handlers for hooks
@@ -463,10 +625,10 @@ def on_audit_finding_insert(doc, method):
 
 def on_audit_finding_update(doc, method):
     """Handle audit finding updates"""
-    # Check if finding became overdue
-    if doc.target_completion_date and doc.status in ['Open', 'In Progress']:
-        if doc.target_completion_date < datetime.now().date():
-            send_audit_notification('finding_overdue', finding_id=doc.name)
+    # Check if finding became overdue; repeated saves are debounced
+    if doc.target_completion_date and doc.finding_status in ['Open', 'Action in Progress']:
+        if getdate(doc.target_completion_date) < datetime.now().date():
+            queue_notification_event('finding_overdue', doc.name, [doc.responsible_person])
 
 
 def on_compliance_check_update(doc, method):
@@ -0,0 +1,239 @@
+import frappe
+from frappe import _
+import os
+import select
+import shutil
+import subprocess
+import sys
+import sysconfig
+import threading
+
+from mkaguzi.utils import sandbox_worker
+
+WORKER_PATH = os.path.abspath(sandbox_worker.__file__)
+# Where the worker script is mounted inside the sandbox
+SANDBOX_WORKER_PATH = '/sandbox/sandbox_worker.py'
+# nobody:nogroup inside the sandbox's user namespace
+SANDBOX_UID = 65534
+SANDBOX_GID = 65534
+# Shared libraries the interpreter and its extension modules link against
+SYSTEM_LIBRARY_PATHS = ('/lib', '/lib64', '/usr/lib', '/usr/lib64')
+
+# Defaults, overridable with the same keys in site_config.json
+SANDBOX_DEFAULTS = {
+    'python_sandbox_workers': 2,
+    'python_sandbox_cpu_seconds': 60,
+    'python_sandbox_memory_mb': 2048,
+    'python_sandbox_max_jobs': 50
+}
+
+
+class SandboxError(Exception):
+    pass
+
+
+def get_sandbox_config(key):
+    return frappe.utils.cint(frappe.conf.get(key) or SANDBOX_DEFAULTS[key])
+
+
+class SandboxWorker:
+    """
+    One warm worker process running mkaguzi/utils/sandbox_worker.py
+
+    The worker runs under bubblewrap: new user, PID, IPC and network
+    namespaces, all capabilities dropped, nobody as its uid, and a
+    filesystem made only of the Python runtime and system libraries,
+    mounted read-only, plus an empty /tmp. There is no shell, no bench
+    directory (so no site_config.json), and no network. Python-level
+    restrictions in the worker are not a security boundary on their own,
+    so workers are never started without this isolation.
+    """
+
+    def __init__(self, memory_mb):
+        self.memory_mb = memory_mb
+        self.jobs = 0
+        self.process = subprocess.Popen(
+            self.get_command(memory_mb),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd='/',
+            env=self.get_environment(),
+            close_fds=True
+        )
+
+    @staticmethod
+    def get_command(memory_mb):
+        worker = [sys.executable, '-I', SANDBOX_WORKER_PATH, str(memory_mb)]
+
+        bwrap = shutil.which(frappe.conf.get('python_sandbox_bwrap') or 'bwrap')
+        if not bwrap:
+            # Only a developer-mode site may opt out, for local work
+            if frappe.conf.get('developer_mode') and frappe.conf.get('python_sandbox_allow_unisolated'):
+                return [sys.executable, '-I', WORKER_PATH, str(memory_mb)]
+            raise SandboxError(_("Python Script tests need bubblewrap (bwrap) installed on the server"))
+
+        command = [
+            bwrap,
+            '--unshare-all',
+            '--die-with-parent',
+            '--new-session',
+            '--cap-drop', 'ALL',
+            '--uid', str(SANDBOX_UID),
+            '--gid', str(SANDBOX_GID),
+            '--proc', '/proc',
+            '--dev', '/dev',
+            '--tmpfs', '/tmp',
+            '--chdir', '/tmp'
+        ]
+        for path in SandboxWorker.get_readonly_paths():
+            command += ['--ro-bind', path, path]
+        # Merged-/usr systems link /lib64 etc.; the dynamic loader is found through them
+        for path in SYSTEM_LIBRARY_PATHS:
+            if os.path.islink(path):
+                command += ['--symlink', os.readlink(path), path]
+
+        # The interpreter itself; a venv's python is a symlink to it
+        executable = os.path.realpath(sys.executable)
+        command += ['--ro-bind', executable, executable]
+        if executable != sys.executable and sys.prefix == sys.base_prefix:
+            command += ['--ro-bind', executable, sys.executable]
+
+        command += ['--ro-bind', WORKER_PATH, SANDBOX_WORKER_PATH]
+        return command + worker
+
+    @staticmethod
+    def get_readonly_paths():
+        """
+        System libraries, the standard library and site-packages
+
+        sys.prefix is mounted whole only for virtualenvs, so /usr/bin (and
+        with it /bin/sh) never appears inside the sandbox.
+        """
+        paths = [path for path in SYSTEM_LIBRARY_PATHS if os.path.isdir(path) and not os.path.islink(path)]
+
+        install_paths = sysconfig.get_paths()
+        for key in ('stdlib', 'platstdlib', 'purelib', 'platlib'):
+            paths.append(os.path.realpath(install_paths[key]))
+        # libpython, for interpreters built with --enable-shared
+        if sysconfig.get_config_var('LIBDIR'):
+            paths.append(os.path.realpath(sysconfig.get_config_var('LIBDIR')))
+
+        if sys.prefix != sys.base_prefix:
+            paths.append(os.path.realpath(sys.prefix))
+
+        # Drop paths already covered by a parent mount
+        paths = sorted(set(path for path in paths if os.path.exists(path)))
+        return [path for path in paths
+            if not any(path != parent and path.startswith(parent + os.sep) for parent in paths)]
+
+    @staticmethod
+    def get_environment():
+        # No site, database or bench variables reach the script
+        return {
+            'PATH': '/nonexistent',
+            'LANG': 'C.UTF-8',
+            'HOME': '/tmp',
+            'OMP_NUM_THREADS': '1',
+            'OPENBLAS_NUM_THREADS': '1',
+            'MKL_NUM_THREADS': '1'
+        }
+
+    def is_alive(self):
+        return self.process.poll() is None
+
+    def request(self, header, payload, timeout):
+        try:
+            sandbox_worker.write_message(self.process.stdin, header, payload)
+        except (BrokenPipeError, OSError):
+            raise SandboxError(_("Python sandbox worker exited unexpectedly"))
+
+        ready, _w, _x = select.select([self.process.stdout], [], [], timeout)
+        if not ready:
+            self.kill()
+            raise SandboxError(_("Python script timed out after {0} seconds").format(timeout))
+
+        try:
+            response = sandbox_worker.read_message(self.process.stdout)
+        except EOFError:
+            self.kill()
+            raise SandboxError(_("Python script exceeded its CPU or memory limit"))
+
+        self.jobs += 1
+        return response
+
+    def kill(self):
+        if self.is_alive():
+            self.process.kill()
+        self.process.wait()
+
+
+class PythonSandbox:
+    """
+    Pool of warm sandbox workers shared by the threads of this process
+
+    Scripts run out of process, isolated from the host by bubblewrap and
+    under CPU-time and address-space rlimits, so a script can neither
+    reach the site's files or network nor cost more than its own worker. Idle workers are reused,
+    which keeps pandas and NumPy imported between runs, and are replaced
+    after python_sandbox_max_jobs runs.
+    """
+
+    lock = threading.Lock()
+    idle = []
+
+    @classmethod
+    def acquire(cls, memory_mb):
+        with cls.lock:
+            while cls.idle:
+                worker = cls.idle.pop()
+                if worker.is_alive() and worker.memory_mb == memory_mb:
+                    return worker
+                worker.kill()
+
+        return SandboxWorker(memory_mb)
+
+    @classmethod
+    def release(cls, worker):
+        with cls.lock:
+            if (worker.is_alive() and worker.jobs < get_sandbox_config('python_sandbox_max_jobs')
+                    and len(cls.idle) < get_sandbox_config('python_sandbox_workers')):
+                cls.idle.append(worker)
+                return
+
+        worker.kill()
+
+    @classmethod
+    def run(cls, script, data=None, params=None, cpu_seconds=None):
+        """
+        Run script with `data` (a DataFrame) and `params` in scope
+
+        Returns the script's `result`: a DataFrame when it set a DataFrame or
+        a list of dicts, otherwise the JSON value it set.
+        """
+        cpu_seconds = cpu_seconds or get_sandbox_config('python_sandbox_cpu_seconds')
+        memory_mb = get_sandbox_config('python_sandbox_memory_mb')
+
+        frame_format, payload = sandbox_worker.encode_frame(data) if data is not None else (None, b'')
+        header = {
+            'script': script,
+            'params': params or {},
+            'cpu_seconds': cpu_seconds,
+            'format': frame_format,
+            'columns': [str(column) for column in data.columns] if data is not None else []
+        }
+
+        worker = cls.acquire(memory_mb)
+        try:
+            # Wall-clock limit catches scripts that block without using CPU
+            response, response_payload = worker.request(header, payload, timeout=cpu_seconds * 2 + 5)
+        finally:
+            cls.release(worker)
+
+        if response['status'] != 'ok':
+            raise SandboxError(response['error'])
+
+        if response['kind'] == 'frame':
+            return sandbox_worker.decode_frame(response['format'], response_payload, response['columns'])
+
+        return response['value']
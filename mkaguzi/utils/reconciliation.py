@@ -1,45 +1,133 @@
 import frappe
 from frappe import _
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
+from frappe.utils import add_days, cint, flt, get_first_day, getdate, now_datetime
 from decimal import Decimal, ROUND_HALF_UP
 
+# Seconds a reconciliation frame stays cached for paging
+RECONCILIATION_CACHE_TTL = 600
+# Outstanding bank items older than this are no longer carried forward
+BANK_OUTSTANDING_MAX_AGE_DAYS = 90
+
 class ReconciliationEngine:
     """
     Engine for performing various reconciliation operations
     """
 
     @staticmethod
-    def reconcile_bank_statement(bank_account, statement_date, statement_balance):
+    def reconcile_bank_statement(bank_account, statement_date, statement_balance, statement_lines=None,
+                                 amount_tolerance=0.01, date_tolerance_days=5, opening_date=None,
+                                 max_outstanding_age_days=BANK_OUTSTANDING_MAX_AGE_DAYS):
         """
         Reconcile bank statement with GL entries
+
+        The book balance is one SUM over the account up to statement_date.
+        Open items start from the account's last Bank Reconciliation State
+        before statement_date: its outstanding items are carried forward and
+        only GL rows posted after it, or created after its GL checkpoint
+        (back-dated postings), are read. Statement lines ({'date', 'amount',
+        'reference'}) clear open GL rows within the amount and date
+        tolerances. Outstanding items older than max_outstanding_age_days
+        are aged out rather than carried forward again. Without a previous
+        state, rows before opening_date (default: start of the statement
+        month) are treated as cleared.
         """
         try:
-            # Get GL entries for the bank account up to statement date
-            gl_entries = frappe.db.sql("""
+            statement_date = getdate(statement_date)
+            statement_balance = flt(statement_balance)
+            statement_lines = frappe.parse_json(statement_lines) if isinstance(statement_lines, str) else (statement_lines or [])
+            gl_checkpoint = now_datetime()
+
+            book_balance = flt(frappe.db.sql("""
+                SELECT COALESCE(SUM(debit_amount - credit_amount), 0)
+                FROM `tabGL Entry`
+                WHERE account_no = %s
+                AND posting_date <= %s
+            """, (bank_account, statement_date))[0][0])
+
+            previous_state = frappe.db.get_value(
+                'Bank Reconciliation State',
+                {'bank_account': bank_account, 'statement_date': ['<', statement_date]},
+                ['name', 'statement_date', 'gl_checkpoint', 'modified'],
+                order_by='statement_date desc',
+                as_dict=True
+            )
+
+            if previous_state:
+                since = previous_state.statement_date
+                checkpoint = previous_state.gl_checkpoint or previous_state.modified
+                open_items = frappe.get_all(
+                    'Bank Reconciliation Item',
+                    filters={
+                        'parent': previous_state.name,
+                        'parenttype': 'Bank Reconciliation State',
+                        'item_status': 'Outstanding'
+                    },
+                    fields=['gl_entry as name', 'posting_date', 'document_no', 'description', 'amount as net_amount'],
+                    order_by='idx'
+                )
+            else:
+                since = add_days(getdate(opening_date) if opening_date else get_first_day(statement_date), -1)
+                checkpoint = None
+                open_items = []
+
+            # GL rows posted since the last checkpoint, plus rows back-dated into it
+            new_entries = frappe.db.sql("""
                 SELECT
+                    name,
                     posting_date,
                     document_no,
                     description,
-                    debit_amount,
-                    credit_amount,
                     (debit_amount - credit_amount) as net_amount
                 FROM `tabGL Entry`
-                WHERE account_no = %s
-                AND posting_date <= %s
+                WHERE account_no = %(account)s
+                AND posting_date <= %(statement_date)s
+                AND (posting_date > %(since)s
+                    OR (%(checkpoint)s IS NOT NULL AND creation > %(checkpoint)s))
                 ORDER BY posting_date, document_no
-            """, (bank_account, statement_date), as_dict=True)
+            """, {'account': bank_account, 'statement_date': statement_date, 'since': since,
+                  'checkpoint': checkpoint}, as_dict=True)
+
+            carried = {item.name for item in open_items}
+            open_items = open_items + [entry for entry in new_entries if entry.name not in carried]
 
-            # Calculate book balance
-            book_balance = sum([entry.net_amount for entry in gl_entries])
+            # Age out items that have stayed outstanding too long
+            aged_out = []
+            if cint(max_outstanding_age_days) > 0:
+                cutoff = add_days(statement_date, -cint(max_outstanding_age_days))
+                aged_out = [item for item in open_items if getdate(item.posting_date) < cutoff]
+                open_items = [item for item in open_items if getdate(item.posting_date) >= cutoff]
+
+            matches, unmatched_lines = ReconciliationEngine.match_statement_lines(
+                open_items, statement_lines, flt(amount_tolerance), int(date_tolerance_days)
+            )
 
-            # Calculate reconciliation difference
-            difference = float(statement_balance) - book_balance
+            outstanding = [item for index, item in enumerate(open_items) if index not in matches]
 
-            # Find outstanding items (uncleared transactions)
-            outstanding_items = []
+            if statement_lines:
+                # Book entries not yet on the statement explain part of the gap
+                difference = statement_balance + sum([flt(item.net_amount) for item in outstanding + aged_out]) - book_balance
+            else:
+                difference = statement_balance - book_balance
+
+            outstanding_items = [{
+                'type': 'Outstanding Deposit' if flt(item.net_amount) > 0 else 'Unpresented Payment',
+                'gl_entry': item.name,
+                'posting_date': item.posting_date,
+                'document_no': item.document_no,
+                'amount': flt(item.net_amount),
+                'description': item.description
+            } for item in outstanding]
+
+            if aged_out:
+                outstanding_items.append({
+                    'type': 'Aged Out Items',
+                    'amount': sum([flt(item.net_amount) for item in aged_out]),
+                    'description': f"{len(aged_out)} items outstanding for more than {cint(max_outstanding_age_days)} days, no longer carried forward"
+                })
 
-            # This is a simplified reconciliation - real implementation would track cleared items
             if abs(difference) > 0.01:  # Allow for small rounding differences
                 outstanding_items.append({
                     'type': 'Bank Reconciliation Difference',
@@ -47,11 +135,21 @@ class ReconciliationEngine:
                     'description': f"Difference between statement balance ({statement_balance}) and book balance ({book_balance:.2f})"
                 })
 
+            state, invalidated = ReconciliationEngine.save_bank_reconciliation_state(
+                bank_account, statement_date, statement_balance, book_balance, difference,
+                previous_state, open_items, matches, len(unmatched_lines), len(aged_out), gl_checkpoint
+            )
+
             return {
                 'book_balance': book_balance,
                 'statement_balance': statement_balance,
                 'difference': difference,
                 'outstanding_items': outstanding_items,
+                'cleared_items': len(matches),
+                'aged_out_items': len(aged_out),
+                'unmatched_statement_lines': unmatched_lines,
+                'reconciliation_state': state.name,
+                'invalidated_states': invalidated,
                 'reconciled': abs(difference) <= 0.01
             }
 
@@ -60,9 +158,125 @@ class ReconciliationEngine:
             raise
 
     @staticmethod
-    def reconcile_customer_balances(period):
+    def match_statement_lines(open_items, statement_lines, amount_tolerance=0.01, date_tolerance_days=5):
         """
-        Reconcile customer balances between AR and sales transactions
+        Pair statement lines with open GL items on amount and date
+
+        GL items are sorted by amount so each line's candidates come from a
+        binary search; among those within the date tolerance the closest
+        posting date wins, and each GL item clears at most one line.
+        Returns ({open_items index: line}, unmatched lines).
+        """
+        if not open_items or not statement_lines:
+            return {}, list(statement_lines)
+
+        amounts = np.array([flt(item.net_amount) for item in open_items])
+        dates = [getdate(item.posting_date) for item in open_items]
+        order = np.argsort(amounts, kind='stable')
+        sorted_amounts = amounts[order]
+        cleared = np.zeros(len(open_items), dtype=bool)
+
+        matches = {}
+        unmatched_lines = []
+
+        for line in statement_lines:
+            amount = flt(line.get('amount'))
+            line_date = getdate(line.get('date'))
+
+            low = np.searchsorted(sorted_amounts, amount - amount_tolerance, side='left')
+            high = np.searchsorted(sorted_amounts, amount + amount_tolerance, side='right')
+
+            best, best_gap = None, None
+            for position in range(low, high):
+                index = int(order[position])
+                if cleared[index]:
+                    continue
+
+                gap = abs((dates[index] - line_date).days)
+                if gap <= date_tolerance_days and (best_gap is None or gap < best_gap):
+                    best, best_gap = index, gap
+
+            if best is None:
+                unmatched_lines.append(line)
+            else:
+                cleared[best] = True
+                matches[best] = line
+
+        return matches, unmatched_lines
+
+    @staticmethod
+    def save_bank_reconciliation_state(bank_account, statement_date, statement_balance, book_balance,
+                                       difference, previous_state, open_items, matches, unmatched_count,
+                                       aged_out_count=0, gl_checkpoint=None):
+        """
+        Persist the checkpoint the next reconciliation of the account starts from
+
+        Items are written with one bulk insert rather than through the
+        document. States for later statement dates were built on the old
+        chain, so they are deleted and rebuilt by their next run.
+        Returns (state, names of invalidated states).
+        """
+        name = frappe.db.get_value(
+            'Bank Reconciliation State',
+            {'bank_account': bank_account, 'statement_date': statement_date}
+        )
+        state = frappe.get_doc('Bank Reconciliation State', name) if name else frappe.new_doc('Bank Reconciliation State')
+
+        state.update({
+            'bank_account': bank_account,
+            'statement_date': statement_date,
+            'previous_state': previous_state.name if previous_state else None,
+            'gl_checkpoint': gl_checkpoint or now_datetime(),
+            'statement_balance': statement_balance,
+            'book_balance': book_balance,
+            'difference': difference,
+            'reconciled': 1 if abs(difference) <= 0.01 else 0,
+            'cleared_count': len(matches),
+            'outstanding_count': len(open_items) - len(matches),
+            'aged_out_count': aged_out_count,
+            'unmatched_statement_lines': unmatched_count
+        })
+        state.set('items', [])
+        state.save(ignore_permissions=True)
+
+        frappe.db.delete('Bank Reconciliation Item', {
+            'parent': state.name,
+            'parenttype': 'Bank Reconciliation State'
+        })
+
+        timestamp = now_datetime()
+        fields = ['name', 'parent', 'parenttype', 'parentfield', 'idx', 'owner', 'modified_by', 'creation',
+                  'modified', 'gl_entry', 'posting_date', 'document_no', 'description', 'amount',
+                  'item_status', 'statement_reference', 'statement_line_date']
+        rows = []
+        for index, item in enumerate(open_items):
+            line = matches.get(index)
+            rows.append((
+                frappe.generate_hash(length=10), state.name, 'Bank Reconciliation State', 'items', index + 1,
+                frappe.session.user, frappe.session.user, timestamp, timestamp,
+                item.name, item.posting_date, item.document_no, item.description, flt(item.net_amount),
+                'Cleared' if line else 'Outstanding',
+                line.get('reference') if line else None,
+                getdate(line.get('date')) if line else None
+            ))
+        frappe.db.bulk_insert('Bank Reconciliation Item', fields, rows)
+
+        invalidated = frappe.get_all('Bank Reconciliation State',
+            filters={'bank_account': bank_account, 'statement_date': ['>', statement_date]},
+            pluck='name')
+        if invalidated:
+            frappe.db.delete('Bank Reconciliation Item', {
+                'parent': ['in', invalidated],
+                'parenttype': 'Bank Reconciliation State'
+            })
+            frappe.db.delete('Bank Reconciliation State', {'name': ['in', invalidated]})
+
+        return state, invalidated
+
+    @staticmethod
+    def get_customer_balance_frame(period):
+        """
+        Customer ledger balances joined to AR balances from the GL
         """
         try:
             period_doc = frappe.get_doc('Data Period', period)
@@ -96,56 +310,44 @@ class ReconciliationEngine:
                 HAVING ABS(ar_balance) > 0.01
             """, (end_date,), as_dict=True)
 
-            # Create reconciliation mapping
-            reconciliation_results = []
-
-            for entry in customer_entries:
-                # Find matching AR balance
-                ar_balance = next((ar['ar_balance'] for ar in ar_balances
-                                 if ar['customer_no'] == entry['customer_no']), 0)
-
-                difference = entry['net_amount'] - ar_balance
-
-                reconciliation_results.append({
-                    'customer_no': entry['customer_no'],
-                    'customer_name': entry['customer_name'],
-                    'ledger_balance': entry['net_amount'],
-                    'ar_balance': ar_balance,
-                    'difference': difference,
-                    'status': 'Matched' if abs(difference) <= 0.01 else 'Unmatched'
-                })
-
-            # Find AR balances without ledger entries
-            ledger_customers = {entry['customer_no'] for entry in customer_entries}
-            unmatched_ar = [ar for ar in ar_balances if ar['customer_no'] not in ledger_customers]
-
-            for ar in unmatched_ar:
-                reconciliation_results.append({
-                    'customer_no': ar['customer_no'],
-                    'customer_name': 'Unknown',
-                    'ledger_balance': 0,
-                    'ar_balance': ar['ar_balance'],
-                    'difference': -ar['ar_balance'],
-                    'status': 'AR Only'
-                })
-
-            return {
-                'reconciliation_date': datetime.now(),
-                'period': period,
-                'total_customers': len(reconciliation_results),
-                'matched_customers': len([r for r in reconciliation_results if r['status'] == 'Matched']),
-                'unmatched_customers': len([r for r in reconciliation_results if r['status'] != 'Matched']),
-                'results': reconciliation_results
-            }
+            return ReconciliationEngine.match_balances(
+                pd.DataFrame.from_records(customer_entries, columns=['customer_no', 'customer_name', 'net_amount'])
+                .rename(columns={'net_amount': 'ledger_balance'}),
+                pd.DataFrame.from_records(ar_balances, columns=['customer_no', 'ar_balance']),
+                key='customer_no',
+                ledger_balance='ledger_balance',
+                control_balance='ar_balance',
+                control_only_status='AR Only',
+                control_only_defaults={'customer_name': 'Unknown'},
+                columns=['customer_no', 'customer_name', 'ledger_balance', 'ar_balance', 'difference', 'status']
+            )
 
         except Exception as e:
             frappe.log_error(frappe.get_traceback(), _("Customer Balance Reconciliation Error"))
             raise
 
     @staticmethod
-    def reconcile_vendor_balances(period):
+    def reconcile_customer_balances(period):
         """
-        Reconcile vendor balances between AP and purchase transactions
+        Reconcile customer balances between AR and sales transactions
+        """
+        frame = ReconciliationEngine.get_customer_balance_frame(period)
+        reconciliation_results = ReconciliationEngine.frame_to_records(frame)
+        matched = int((frame['status'] == 'Matched').sum())
+
+        return {
+            'reconciliation_date': datetime.now(),
+            'period': period,
+            'total_customers': len(reconciliation_results),
+            'matched_customers': matched,
+            'unmatched_customers': len(reconciliation_results) - matched,
+            'results': reconciliation_results
+        }
+
+    @staticmethod
+    def get_vendor_balance_frame(period):
+        """
+        Vendor ledger balances joined to AP balances from the GL
         """
         try:
             period_doc = frappe.get_doc('Data Period', period)
@@ -179,56 +381,44 @@ class ReconciliationEngine:
                 HAVING ABS(ap_balance) > 0.01
             """, (end_date,), as_dict=True)
 
-            # Create reconciliation mapping
-            reconciliation_results = []
-
-            for entry in vendor_entries:
-                # Find matching AP balance
-                ap_balance = next((ap['ap_balance'] for ap in ap_balances
-                                 if ap['vendor_no'] == entry['vendor_no']), 0)
-
-                difference = entry['net_amount'] - ap_balance
-
-                reconciliation_results.append({
-                    'vendor_no': entry['vendor_no'],
-                    'vendor_name': entry['vendor_name'],
-                    'ledger_balance': entry['net_amount'],
-                    'ap_balance': ap_balance,
-                    'difference': difference,
-                    'status': 'Matched' if abs(difference) <= 0.01 else 'Unmatched'
-                })
-
-            # Find AP balances without ledger entries
-            ledger_vendors = {entry['vendor_no'] for entry in vendor_entries}
-            unmatched_ap = [ap for ap in ap_balances if ap['vendor_no'] not in ledger_vendors]
-
-            for ap in unmatched_ap:
-                reconciliation_results.append({
-                    'vendor_no': ap['vendor_no'],
-                    'vendor_name': 'Unknown',
-                    'ledger_balance': 0,
-                    'ap_balance': ap['ap_balance'],
-                    'difference': -ap['ap_balance'],
-                    'status': 'AP Only'
-                })
-
-            return {
-                'reconciliation_date': datetime.now(),
-                'period': period,
-                'total_vendors': len(reconciliation_results),
-                'matched_vendors': len([r for r in reconciliation_results if r['status'] == 'Matched']),
-                'unmatched_vendors': len([r for r in reconciliation_results if r['status'] != 'Matched']),
-                'results': reconciliation_results
-            }
+            return ReconciliationEngine.match_balances(
+                pd.DataFrame.from_records(vendor_entries, columns=['vendor_no', 'vendor_name', 'net_amount'])
+                .rename(columns={'net_amount': 'ledger_balance'}),
+                pd.DataFrame.from_records(ap_balances, columns=['vendor_no', 'ap_balance']),
+                key='vendor_no',
+                ledger_balance='ledger_balance',
+                control_balance='ap_balance',
+                control_only_status='AP Only',
+                control_only_defaults={'vendor_name': 'Unknown'},
+                columns=['vendor_no', 'vendor_name', 'ledger_balance', 'ap_balance', 'difference', 'status']
+            )
 
         except Exception as e:
             frappe.log_error(frappe.get_traceback(), _("Vendor Balance Reconciliation Error"))
             raise
 
     @staticmethod
-    def reconcile_inventory_stock(period):
+    def reconcile_vendor_balances(period):
         """
-        Reconcile inventory stock between item ledger and GL
+        Reconcile vendor balances between AP and purchase transactions
+        """
+        frame = ReconciliationEngine.get_vendor_balance_frame(period)
+        reconciliation_results = ReconciliationEngine.frame_to_records(frame)
+        matched = int((frame['status'] == 'Matched').sum())
+
+        return {
+            'reconciliation_date': datetime.now(),
+            'period': period,
+            'total_vendors': len(reconciliation_results),
+            'matched_vendors': matched,
+            'unmatched_vendors': len(reconciliation_results) - matched,
+            'results': reconciliation_results
+        }
+
+    @staticmethod
+    def get_inventory_stock_frame(period):
+        """
+        Item ledger stock values joined to inventory balances from the GL
         """
         try:
             period_doc = frappe.get_doc('Data Period', period)
@@ -258,51 +448,83 @@ class ReconciliationEngine:
                 HAVING ABS(gl_balance) > 0.01
             """, (end_date,), as_dict=True)
 
-            # Create reconciliation mapping
-            reconciliation_results = []
+            return ReconciliationEngine.match_balances(
+                pd.DataFrame.from_records(item_ledger_balances, columns=['item_no', 'ledger_quantity', 'ledger_value']),
+                pd.DataFrame.from_records(gl_inventory_balances, columns=['item_no', 'gl_balance']),
+                key='item_no',
+                ledger_balance='ledger_value',
+                control_balance='gl_balance',
+                control_only_status='GL Only',
+                control_only_defaults={'ledger_quantity': 0},
+                columns=['item_no', 'ledger_quantity', 'ledger_value', 'gl_balance', 'difference', 'status']
+            )
 
-            for ledger in item_ledger_balances:
-                # Find matching GL balance
-                gl_balance = next((gl['gl_balance'] for gl in gl_inventory_balances
-                                 if gl['item_no'] == ledger['item_no']), 0)
+        except Exception as e:
+            frappe.log_error(frappe.get_traceback(), _("Inventory Stock Reconciliation Error"))
+            raise
 
-                difference = ledger['ledger_value'] - gl_balance
+    @staticmethod
+    def reconcile_inventory_stock(period):
+        """
+        Reconcile inventory stock between item ledger and GL
+        """
+        frame = ReconciliationEngine.get_inventory_stock_frame(period)
+        reconciliation_results = ReconciliationEngine.frame_to_records(frame)
+        matched = int((frame['status'] == 'Matched').sum())
 
-                reconciliation_results.append({
-                    'item_no': ledger['item_no'],
-                    'ledger_quantity': ledger['ledger_quantity'],
-                    'ledger_value': ledger['ledger_value'],
-                    'gl_balance': gl_balance,
-                    'difference': difference,
-                    'status': 'Matched' if abs(difference) <= 0.01 else 'Unmatched'
-                })
+        return {
+            'reconciliation_date': datetime.now(),
+            'period': period,
+            'total_items': len(reconciliation_results),
+            'matched_items': matched,
+            'unmatched_items': len(reconciliation_results) - matched,
+            'results': reconciliation_results
+        }
 
-            # Find GL balances without ledger entries
-            ledger_items = {ledger['item_no'] for ledger in item_ledger_balances}
-            unmatched_gl = [gl for gl in gl_inventory_balances if gl['item_no'] not in ledger_items]
-
-            for gl in unmatched_gl:
-                reconciliation_results.append({
-                    'item_no': gl['item_no'],
-                    'ledger_quantity': 0,
-                    'ledger_value': 0,
-                    'gl_balance': gl['gl_balance'],
-                    'difference': -gl['gl_balance'],
-                    'status': 'GL Only'
-                })
+    @staticmethod
+    def match_balances(ledger, control, key, ledger_balance, control_balance, control_only_status,
+                       control_only_defaults=None, columns=None, tolerance=0.01):
+        """
+        Match ledger balances to control account balances with a hash join
 
-            return {
-                'reconciliation_date': datetime.now(),
-                'period': period,
-                'total_items': len(reconciliation_results),
-                'matched_items': len([r for r in reconciliation_results if r['status'] == 'Matched']),
-                'unmatched_items': len([r for r in reconciliation_results if r['status'] != 'Matched']),
-                'results': reconciliation_results
-            }
+        Every ledger row is kept, in order, as Matched or Unmatched, followed
+        by control balances with no ledger row (control_only_status). As with
+        the previous lookup, the first control row wins for a repeated key.
+        """
+        control = control.drop_duplicates(subset=[key])
+        ledger = ledger.assign(_ledger_order=range(len(ledger)))
+        control = control.assign(_control_order=range(len(control)))
 
-        except Exception as e:
-            frappe.log_error(frappe.get_traceback(), _("Inventory Stock Reconciliation Error"))
-            raise
+        merged = ledger.merge(control, on=key, how='outer', indicator=True, sort=False)
+        control_only = (merged['_merge'] == 'right_only').to_numpy()
+
+        merged = merged.assign(_control_only=control_only).sort_values(
+            ['_control_only', '_ledger_order', '_control_order'], kind='stable'
+        )
+        control_only = merged['_control_only'].to_numpy()
+
+        merged[ledger_balance] = merged[ledger_balance].fillna(0).astype(float)
+        merged[control_balance] = merged[control_balance].fillna(0).astype(float)
+        merged['difference'] = merged[ledger_balance] - merged[control_balance]
+
+        for column, value in (control_only_defaults or {}).items():
+            merged[column] = merged[column].astype(object)
+            merged.loc[control_only, column] = value
+
+        merged['status'] = np.where(
+            control_only,
+            control_only_status,
+            np.where(merged['difference'].abs() <= tolerance, 'Matched', 'Unmatched')
+        )
+
+        return merged[columns or [c for c in merged.columns if not c.startswith('_')]].reset_index(drop=True)
+
+    @staticmethod
+    def frame_to_records(frame):
+        """
+        Convert a reconciliation frame to result dictionaries, NaN as None
+        """
+        return frame.astype(object).where(frame.notna(), None).to_dict('records')
 
     @staticmethod
     def perform_three_way_reconciliation(customer_no, period):
@@ -423,7 +645,12 @@ def perform_reconciliation(reconciliation_type, **kwargs):
             return engine.reconcile_bank_statement(
                 kwargs.get('bank_account'),
                 kwargs.get('statement_date'),
-                kwargs.get('statement_balance')
+                kwargs.get('statement_balance'),
+                statement_lines=kwargs.get('statement_lines'),
+                amount_tolerance=kwargs.get('amount_tolerance', 0.01),
+                date_tolerance_days=kwargs.get('date_tolerance_days', 5),
+                opening_date=kwargs.get('opening_date'),
+                max_outstanding_age_days=kwargs.get('max_outstanding_age_days', BANK_OUTSTANDING_MAX_AGE_DAYS)
             )
         elif reconciliation_type == 'customer_balances':
             return engine.reconcile_customer_balances(kwargs.get('period'))
@@ -464,6 +691,51 @@ def get_reconciliation_report(reconciliation_type, period=None):
         frappe.throw(str(e))
 
 
+@frappe.whitelist()
+def get_reconciliation_page(reconciliation_type, period, start=0, page_length=100, status=None):
+    """
+    Page through a balance reconciliation
+
+    The merged frame is cached briefly so paging does not rerun the
+    underlying ledger queries for every page.
+    """
+    try:
+        frame_builders = {
+            'customer_balances': ReconciliationEngine.get_customer_balance_frame,
+            'vendor_balances': ReconciliationEngine.get_vendor_balance_frame,
+            'inventory_stock': ReconciliationEngine.get_inventory_stock_frame
+        }
+
+        if reconciliation_type not in frame_builders:
+            frappe.throw(_("Unsupported reconciliation type for paging"))
+
+        cache_key = f"reconciliation_frame::{reconciliation_type}::{period}"
+        frame = frappe.cache().get_value(cache_key)
+
+        if frame is None:
+            frame = frame_builders[reconciliation_type](period)
+            frappe.cache().set_value(cache_key, frame, expires_in_sec=RECONCILIATION_CACHE_TTL)
+
+        if status:
+            frame = frame[frame['status'] == status]
+
+        start = frappe.utils.cint(start)
+        page_length = frappe.utils.cint(page_length) or 100
+
+        return {
+            'period': period,
+            'total': len(frame),
+            'start': start,
+            'page_length': page_length,
+            'status_counts': frame['status'].value_counts().to_dict(),
+            'results': ReconciliationEngine.frame_to_records(frame.iloc[start:start + page_length])
+        }
+
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), _("Reconciliation Page Error"))
+        frappe.throw(str(e))
+
+
 @frappe.whitelist()
 def validate_reconciliation_thresholds(reconciliation_data, thresholds=None):
     """
@@ -0,0 +1,232 @@
+import frappe
+from frappe import _
+import gzip
+import itertools
+import json
+import os
+import shutil
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# Row lists longer than this are written to a file instead of the document
+RESULT_SPILL_ROWS = 1000
+PREVIEW_ROWS = 20
+PARQUET_BATCH_SIZE = 10000
+
+
+class ResultStore:
+    """
+    Storage for test result rows
+
+    Small results stay inline on the execution document as JSON. Larger row
+    lists are spilled to compressed files under the site's private files
+    (Parquet when pyarrow is installed, gzip NDJSON otherwise), and the
+    document keeps only a preview and a pointer to each file. Pages of rows
+    are read back with read_page, which only loads the requested columns.
+    """
+
+    @staticmethod
+    def get_directory(execution_name):
+        return frappe.get_site_path('private', 'files', 'test_results', frappe.scrub(execution_name))
+
+    @staticmethod
+    def store(execution_name, key, data):
+        """
+        Return the JSON-safe value to keep on the document for data
+
+        data is either a list of row dicts or a dict whose list values are
+        row lists (one table per key).
+        """
+        if isinstance(data, list):
+            if len(data) <= RESULT_SPILL_ROWS:
+                return data
+
+            return {
+                'spilled': True,
+                'list': True,
+                'tables': {'rows': ResultStore.spill(execution_name, key, data)},
+                'values': {}
+            }
+
+        if isinstance(data, dict):
+            large = {name: rows for name, rows in data.items()
+                     if isinstance(rows, list) and len(rows) > RESULT_SPILL_ROWS}
+            if not large:
+                return data
+
+            return {
+                'spilled': True,
+                'tables': {name: ResultStore.spill(execution_name, f"{key}-{name}", rows)
+                           for name, rows in large.items()},
+                'values': {name: value for name, value in data.items() if name not in large}
+            }
+
+        return data
+
+    @staticmethod
+    def spill(execution_name, key, rows):
+        """
+        Write rows to a compressed file and return its pointer
+        """
+        directory = ResultStore.get_directory(execution_name)
+        os.makedirs(directory, exist_ok=True)
+
+        columns = list(dict.fromkeys(itertools.chain.from_iterable(
+            row.keys() for row in rows if isinstance(row, dict)
+        )))
+        path = None
+
+        if pq and columns and all(isinstance(row, dict) for row in rows):
+            path = os.path.join(directory, f"{frappe.scrub(key)}.parquet")
+            try:
+                ResultStore.write_parquet(path, rows, columns)
+                file_format = 'parquet'
+            except (pa.ArrowException, ValueError, TypeError):
+                # Columns whose type differs between rows or batches cannot
+                # be typed; fall back to NDJSON
+                os.remove(path)
+                path = None
+
+        if not path:
+            path = os.path.join(directory, f"{frappe.scrub(key)}.ndjson.gz")
+            ResultStore.write_ndjson(path, rows)
+            file_format = 'ndjson.gz'
+
+        return {
+            'format': file_format,
+            'file': os.path.relpath(path, frappe.get_site_path()),
+            'rows': len(rows),
+            'columns': columns,
+            'size_bytes': os.path.getsize(path),
+            'preview': rows[:PREVIEW_ROWS]
+        }
+
+    @staticmethod
+    def write_parquet(path, rows, columns):
+        """
+        Write rows in batches, each with every column so batch schemas line up
+        """
+        writer = None
+        try:
+            for start in range(0, len(rows), PARQUET_BATCH_SIZE):
+                batch = rows[start:start + PARQUET_BATCH_SIZE]
+                table = pa.Table.from_pydict({
+                    column: [row.get(column) for row in batch]
+                    for column in columns
+                })
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema, compression='zstd')
+                writer.write_table(table.cast(writer.schema))
+        finally:
+            if writer:
+                writer.close()
+
+    @staticmethod
+    def write_ndjson(path, rows):
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            for row in rows:
+                f.write(frappe.as_json(row, indent=None, separators=(',', ':')))
+                f.write('\n')
+
+    @staticmethod
+    def get_tables(stored):
+        """
+        Row tables held by a stored value: {name: pointer or inline rows}
+        """
+        if isinstance(stored, dict) and stored.get('spilled'):
+            tables = dict(stored['tables'])
+            tables.update({name: rows for name, rows in stored['values'].items() if isinstance(rows, list)})
+            return tables
+
+        if isinstance(stored, list):
+            return {'rows': stored}
+
+        if isinstance(stored, dict):
+            return {name: rows for name, rows in stored.items() if isinstance(rows, list)}
+
+        return {}
+
+    @staticmethod
+    def read_page(stored, table=None, start=0, page_length=100, columns=None):
+        """
+        One page of a stored table, projected to columns when given
+        """
+        tables = ResultStore.get_tables(stored)
+        if not tables:
+            return {'table': None, 'tables': {}, 'total_rows': 0, 'columns': [], 'rows': []}
+
+        table = table or next(iter(tables))
+        if table not in tables:
+            frappe.throw(_("Result table {0} not found").format(table))
+
+        source = tables[table]
+        if isinstance(source, list):
+            total_rows = len(source)
+            available = list(dict.fromkeys(itertools.chain.from_iterable(
+                row.keys() for row in source[:PREVIEW_ROWS] if isinstance(row, dict)
+            )))
+            rows = source[start:start + page_length]
+        else:
+            total_rows = source['rows']
+            available = source['columns']
+            rows = ResultStore.read_rows(source, start, page_length, columns)
+
+        if columns:
+            rows = [{column: row.get(column) for column in columns} for row in rows]
+
+        return {
+            'table': table,
+            'tables': {name: len(value) if isinstance(value, list) else value['rows']
+                       for name, value in tables.items()},
+            'total_rows': total_rows,
+            'columns': columns or available,
+            'rows': rows
+        }
+
+    @staticmethod
+    def read_rows(pointer, start, page_length, columns=None):
+        path = frappe.get_site_path(pointer['file'])
+
+        if pointer['format'] == 'parquet':
+            parquet_file = pq.ParquetFile(path)
+            projected = [column for column in columns if column in pointer['columns']] if columns else None
+            rows, skipped = [], 0
+
+            for batch in parquet_file.iter_batches(batch_size=PARQUET_BATCH_SIZE, columns=projected):
+                if skipped + batch.num_rows <= start:
+                    skipped += batch.num_rows
+                    continue
+
+                offset = max(start - skipped, 0)
+                rows.extend(batch.slice(offset, page_length - len(rows)).to_pylist())
+                skipped += batch.num_rows
+                if len(rows) >= page_length:
+                    break
+
+            return rows
+
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return [json.loads(line) for line in itertools.islice(f, start, start + page_length)]
+
+    @staticmethod
+    def load(stored):
+        """
+        The complete data a stored value was made from, spilled rows included
+        """
+        if not (isinstance(stored, dict) and stored.get('spilled')):
+            return stored
+
+        tables = {name: ResultStore.read_rows(pointer, 0, pointer['rows'])
+                  for name, pointer in stored['tables'].items()}
+        if stored.get('list'):
+            return tables['rows']
+
+        return {**stored['values'], **tables}
+
+    @staticmethod
+    def delete(execution_name):
+        shutil.rmtree(ResultStore.get_directory(execution_name), ignore_errors=True)
@@ -0,0 +1,214 @@
+"""
+Worker process for Python Script audit tests
+
+Run as a standalone script by mkaguzi.utils.python_sandbox. It does not
+import frappe. It applies resource limits and imports pandas once. Then
+it executes scripts sent over stdin until the pipe is closed. Each
+message is a small JSON header followed by a binary payload. Frames are
+exchanged as Arrow IPC streams when pyarrow is installed and as NumPy
+.npz archives otherwise. Neither format is unpickled.
+
+The import allow-list and trimmed builtins only keep honest scripts
+tidy. pandas and NumPy expose os and file I/O through their own
+attributes, so the security boundary is the bubblewrap sandbox that
+python_sandbox starts this script in.
+"""
+import builtins
+import io
+import json
+import math
+import os
+import struct
+import sys
+import traceback
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+HEADER = struct.Struct('!IQ')
+
+ALLOWED_MODULES = {
+    'collections', 'datetime', 'decimal', 'functools', 'itertools', 'json',
+    'math', 'numpy', 'operator', 'pandas', 're', 'statistics'
+}
+
+BLOCKED_BUILTINS = {
+    '__import__', 'breakpoint', 'compile', 'eval', 'exec', 'exit', 'globals',
+    'help', 'input', 'locals', 'open', 'quit', 'vars'
+}
+
+
+def write_message(stream, header, payload=b''):
+    body = json.dumps(header, default=str).encode('utf-8')
+    stream.write(HEADER.pack(len(body), len(payload)))
+    stream.write(body)
+    stream.write(payload)
+    stream.flush()
+
+
+def read_exact(stream, size):
+    chunks = []
+    while size:
+        chunk = stream.read(size)
+        if not chunk:
+            raise EOFError('Sandbox pipe closed')
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def read_message(stream):
+    header_size, payload_size = HEADER.unpack(read_exact(stream, HEADER.size))
+    header = json.loads(read_exact(stream, header_size))
+    return header, read_exact(stream, payload_size) if payload_size else b''
+
+
+def encode_frame(frame):
+    """
+    Serialize a DataFrame to (format, bytes) without pickling
+    """
+    if pa is not None:
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return 'arrow', sink.getvalue().to_pybytes()
+
+    arrays = {}
+    for position, column in enumerate(frame.columns):
+        values = frame[column]
+        array = values.to_numpy()
+        if array.dtype.kind == 'O':
+            # Strings and mixed values become fixed-width unicode arrays
+            array = values.where(values.notna(), '').astype(str).to_numpy(dtype=str)
+        arrays[f"c{position}"] = array
+
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    return 'npz', buffer.getvalue()
+
+
+def decode_frame(frame_format, payload, columns=None):
+    if not payload:
+        return pd.DataFrame()
+
+    if frame_format == 'arrow':
+        return pa.ipc.open_stream(payload).read_pandas()
+
+    with np.load(io.BytesIO(payload), allow_pickle=False) as arrays:
+        return pd.DataFrame({
+            column: arrays[f"c{position}"] for position, column in enumerate(columns)
+        })
+
+
+def safe_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level or name.split('.')[0] not in ALLOWED_MODULES:
+        raise ImportError(f"Import of {name} is not allowed in test scripts")
+    return builtins.__import__(name, globals, locals, fromlist, level)
+
+
+def script_globals(data, params):
+    safe_builtins = {name: value for name, value in vars(builtins).items() if name not in BLOCKED_BUILTINS}
+    safe_builtins['__import__'] = safe_import
+    safe_builtins['print'] = lambda *args, **kwargs: None
+
+    return {
+        '__builtins__': safe_builtins,
+        '__name__': '__audit_test__',
+        'pd': pd,
+        'np': np,
+        'math': math,
+        'data': data,
+        'params': params,
+        'result': None
+    }
+
+
+def apply_memory_limit(memory_mb):
+    if resource is None:
+        return
+
+    limit = memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (0, 0))
+
+
+def apply_cpu_limit(cpu_seconds):
+    """
+    Allow cpu_seconds more CPU time from now; SIGXCPU ends the worker after
+    """
+    if resource is None:
+        return
+
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = math.ceil(usage.ru_utime + usage.ru_stime) + cpu_seconds
+    hard = resource.getrlimit(resource.RLIMIT_CPU)[1]
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def run_script(header, payload):
+    data = decode_frame(header.get('format'), payload, header.get('columns'))
+    scope = script_globals(data, header.get('params') or {})
+
+    exec(compile(header['script'], '<audit test>', 'exec'), scope)
+    result = scope.get('result')
+
+    if isinstance(result, list) and result and all(isinstance(row, dict) for row in result):
+        result = pd.DataFrame.from_records(result)
+
+    if isinstance(result, pd.DataFrame):
+        frame_format, frame_payload = encode_frame(result)
+        return {
+            'status': 'ok',
+            'kind': 'frame',
+            'format': frame_format,
+            'columns': [str(column) for column in result.columns],
+            'rows': len(result)
+        }, frame_payload
+
+    return {'status': 'ok', 'kind': 'value', 'value': result}, b''
+
+
+def main():
+    memory_mb = int(sys.argv[1])
+
+    # Keep the protocol on a private descriptor so stray output from C
+    # extensions cannot corrupt it
+    output = os.fdopen(os.dup(1), 'wb')
+    os.dup2(2, 1)
+    requests = sys.stdin.buffer
+
+    apply_memory_limit(memory_mb)
+
+    while True:
+        try:
+            header, payload = read_message(requests)
+        except EOFError:
+            break
+
+        apply_cpu_limit(int(header.get('cpu_seconds') or 60))
+        try:
+            response, response_payload = run_script(header, payload)
+        except MemoryError:
+            response, response_payload = {'status': 'error', 'error': 'Memory limit exceeded'}, b''
+        except Exception:
+            response, response_payload = {'status': 'error', 'error': traceback.format_exc(limit=-3)}, b''
+
+        write_message(output, response, response_payload)
+
+
+if __name__ == '__main__':
+    main()
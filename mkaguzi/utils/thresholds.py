@@ -0,0 +1,165 @@
+import hashlib
+import json
+import operator
+import numpy as np
+import pandas as pd
+
+COMPARISON_OPERATORS = {
+    '>': operator.gt,
+    '<': operator.lt,
+    '>=': operator.ge,
+    '<=': operator.le,
+    '==': operator.eq
+}
+
+AGGREGATES = ('count', 'sum', 'max', 'min', 'mean', 'percentage', 'first')
+
+SEVERITY_BY_LEVEL = {
+    'Critical': 'Critical',
+    'Error': 'High',
+    'Warning': 'Medium'
+}
+SEVERITY_ORDER = ['Low', 'Medium', 'High', 'Critical']
+
+MAX_CACHED_EVALUATORS = 256
+
+_evaluators = {}
+
+
+class ThresholdEvaluator:
+    """
+    A test's thresholds compiled into (aggregate, column, comparison) checks
+
+    Threshold names are either "<aggregate>:<column>" (e.g. "sum:amount",
+    "percentage:exception_found"; count and percentage count the rows where
+    the column is set), a bare aggregate ("count" is the number of rows), or
+    a column name, which compares the first row's value as thresholds always
+    have. Each distinct aggregate is computed once per result with
+    vectorized pandas operations.
+    """
+
+    def __init__(self, thresholds):
+        self.checks = []
+        for threshold in thresholds:
+            aggregate, column = self.parse_name(threshold.threshold_name)
+            self.checks.append({
+                'name': threshold.threshold_name,
+                'aggregate': aggregate,
+                'column': column,
+                'compare': COMPARISON_OPERATORS.get(threshold.comparison_operator),
+                'operator': threshold.comparison_operator,
+                'value': threshold.threshold_value,
+                'severity': SEVERITY_BY_LEVEL.get(threshold.notification_level, 'Low')
+            })
+
+    @staticmethod
+    def parse_name(name):
+        name = (name or '').strip()
+        aggregate, _, column = name.partition(':')
+        aggregate = aggregate.strip().lower()
+
+        if column and aggregate in AGGREGATES:
+            return aggregate, column.strip()
+        if name.lower() in AGGREGATES:
+            return name.lower(), None
+        return 'first', name
+
+    @staticmethod
+    def to_frame(result):
+        if isinstance(result, pd.DataFrame):
+            return result
+        if isinstance(result, np.ndarray) and result.dtype.names:
+            return pd.DataFrame(result)
+        if isinstance(result, (list, tuple)):
+            return pd.DataFrame.from_records(result) if result and isinstance(result[0], dict) \
+                else pd.DataFrame({'value': list(result)})
+        return None
+
+    @staticmethod
+    def aggregate(frame, aggregate, column):
+        rows = len(frame)
+
+        if column is None:
+            return rows if aggregate == 'count' else None
+        if column not in frame.columns:
+            return None
+
+        values = frame[column]
+        if aggregate in ('count', 'percentage'):
+            flagged = values.notna() & (values != 0) & (values != '')
+            count = int(flagged.sum())
+            return count if aggregate == 'count' else (count * 100 / rows if rows else 0)
+
+        if aggregate == 'first':
+            return values.iloc[0] if rows else None
+
+        numeric = pd.to_numeric(values, errors='coerce')
+        if not numeric.notna().any():
+            return None
+        return float(getattr(numeric, aggregate)())
+
+    def evaluate(self, result):
+        """
+        Return (status, severity, breaches) for a result
+        """
+        frame = self.to_frame(result)
+        if frame is None or not self.checks:
+            return 'Pass', 'Low', []
+
+        values = {}
+        breaches = []
+        severity = 'Low'
+
+        for check in self.checks:
+            key = (check['aggregate'], check['column'])
+            if key not in values:
+                values[key] = self.aggregate(frame, *key)
+
+            actual_value = values[key]
+            if actual_value is None or check['compare'] is None:
+                continue
+
+            if check['compare'](actual_value, check['value']):
+                breaches.append({
+                    'threshold_name': check['name'],
+                    'actual_value': actual_value,
+                    'threshold_value': check['value'],
+                    'comparison_operator': check['operator']
+                })
+                if SEVERITY_ORDER.index(check['severity']) > SEVERITY_ORDER.index(severity):
+                    severity = check['severity']
+
+        return ('Fail' if breaches else 'Pass'), severity, breaches
+
+
+def thresholds_signature(thresholds):
+    """
+    Hash of the threshold rows, so unrelated edits to the test keep the cache
+    """
+    rows = [
+        (row.threshold_name, row.comparison_operator, str(row.threshold_value), row.notification_level)
+        for row in thresholds
+    ]
+    return hashlib.sha1(json.dumps(rows).encode()).hexdigest()
+
+
+def get_threshold_evaluator(test):
+    """
+    Cached evaluator for a test, rebuilt whenever its thresholds change
+    """
+    key = (test.name, thresholds_signature(test.threshold_settings or []))
+    evaluator = _evaluators.get(key)
+
+    if evaluator is None:
+        if len(_evaluators) >= MAX_CACHED_EVALUATORS:
+            _evaluators.clear()
+
+        clear_threshold_evaluator(test.name)
+        evaluator = _evaluators[key] = ThresholdEvaluator(test.threshold_settings or [])
+
+    return evaluator
+
+
+def clear_threshold_evaluator(test_name):
+    for key in [key for key in _evaluators if key[0] == test_name]:
+        _evaluators.pop(key, None)
@@ -0,0 +1,322 @@
+import frappe
+from frappe.utils import add_days, get_url, getdate
+from datetime import date
+from functools import partial
+
+DIGEST_ROLLUP_PREFIX = 'audit_digest_rollup'
+DIGEST_LOCK_PREFIX = 'audit_digest_lock'
+# Rollups outlive their week so a late or repeated digest still finds them
+DIGEST_ROLLUP_TTL = 5 * 7 * 24 * 3600
+DIGEST_LOCK_TTL = 3600
+DIGEST_NOTIFICATION_TYPE = 'Weekly Digest'
+
+COMPLETE_FIELD = 'complete'
+
+DIGEST_METRICS = {
+    'new_findings': 'New Findings',
+    'resolved_findings': 'Resolved Findings',
+    'completed_tests': 'Completed Tests',
+    'compliance_checks': 'Compliance Checks'
+}
+
+PERSONAL_METRICS = {
+    'new_findings': 'New findings assigned to you',
+    'resolved_findings': 'Your findings resolved',
+    'completed_tests': 'Tests completed in your executions'
+}
+
+
+class WeeklyDigest:
+    """
+    Weekly rollup counters and the digest built from them
+
+    Counters live in one Redis hash per ISO week with "total:<metric>" and
+    "user:<user>:<metric>" fields, incremented from document events. A hash
+    carries a "complete" field once it has been rebuilt from the database;
+    until then the digest recomputes it with grouped queries.
+    """
+
+    @staticmethod
+    def week_key(day=None):
+        year, week, _weekday = getdate(day).isocalendar()
+        return f"{year}-W{week:02d}"
+
+    @staticmethod
+    def week_range(week):
+        year, _sep, week_number = week.partition('-W')
+        start = date.fromisocalendar(int(year), int(week_number), 1)
+        return start, add_days(start, 6)
+
+    @staticmethod
+    def rollup_key(week):
+        return frappe.cache().make_key(f"{DIGEST_ROLLUP_PREFIX}::{week}")
+
+    @staticmethod
+    def increment(metric, users=None, count=1, day=None):
+        """
+        Add count to a metric for the week of `day` and for each user
+        """
+        cache = frappe.cache()
+        key = WeeklyDigest.rollup_key(WeeklyDigest.week_key(day))
+
+        pipe = cache.pipeline()
+        pipe.hincrby(key, f"total:{metric}", count)
+        for user in set(filter(None, users or [])):
+            pipe.hincrby(key, f"user:{user}:{metric}", count)
+        pipe.expire(key, DIGEST_ROLLUP_TTL)
+        pipe.execute()
+
+    @staticmethod
+    def increment_after_commit(metric, users=None, count=1, day=None):
+        """
+        Increment once the current transaction commits, so a rolled back
+        save is never counted
+        """
+        frappe.db.after_commit.add(partial(WeeklyDigest.increment, metric, list(users or []), count, day))
+
+    @staticmethod
+    def rebuild(week):
+        """
+        Recompute a week's rollup from the database with grouped queries
+        """
+        start, end = WeeklyDigest.week_range(week)
+        values = {
+            'start': f"{start} 00:00:00",
+            'end': f"{end} 23:59:59.999999",
+            'start_date': start,
+            'end_date': end
+        }
+        counters = {f"total:{metric}": 0 for metric in DIGEST_METRICS}
+
+        def add(metric, rows):
+            for user, count in rows:
+                counters[f"total:{metric}"] += count
+                if user:
+                    counters[f"user:{user}:{metric}"] = counters.get(f"user:{user}:{metric}", 0) + count
+
+        add('new_findings', frappe.db.sql("""
+            SELECT responsible_person, COUNT(*)
+            FROM `tabAudit Finding`
+            WHERE creation BETWEEN %(start)s AND %(end)s
+            GROUP BY responsible_person
+        """, values))
+
+        add('resolved_findings', frappe.db.sql("""
+            SELECT responsible_person, COUNT(*)
+            FROM `tabAudit Finding`
+            WHERE finding_status = 'Closed'
+            AND closure_date BETWEEN %(start_date)s AND %(end_date)s
+            GROUP BY responsible_person
+        """, values))
+
+        add('compliance_checks', frappe.db.sql("""
+            SELECT NULL, COUNT(*)
+            FROM `tabCompliance Execution`
+            WHERE execution_date BETWEEN %(start)s AND %(end)s
+        """, values))
+
+        # Each execution's completed tests count for every member of its team
+        completed_tests = frappe.db.sql("""
+            SELECT team.user, tests.completed
+            FROM (
+                SELECT parent, COUNT(*) AS completed
+                FROM `tabExecuted Test`
+                WHERE status = 'Completed'
+                AND modified BETWEEN %(start)s AND %(end)s
+                GROUP BY parent
+            ) tests
+            LEFT JOIN `tabAudit Execution Team` team ON team.parent = tests.parent
+        """, values)
+        for user, count in completed_tests:
+            if user:
+                field = f"user:{user}:completed_tests"
+                counters[field] = counters.get(field, 0) + count
+        counters['total:completed_tests'] = frappe.db.sql("""
+            SELECT COUNT(*)
+            FROM `tabExecuted Test`
+            WHERE status = 'Completed'
+            AND modified BETWEEN %(start)s AND %(end)s
+        """, values)[0][0]
+
+        counters[COMPLETE_FIELD] = 1
+
+        cache = frappe.cache()
+        key = WeeklyDigest.rollup_key(week)
+        pipe = cache.pipeline()
+        pipe.delete(key)
+        pipe.hset(key, mapping=counters)
+        pipe.expire(key, DIGEST_ROLLUP_TTL)
+        pipe.execute()
+
+        return counters
+
+    @staticmethod
+    def read_counters(week):
+        # Raw read: the cache wrapper's hgetall would prefix the key again
+        # and unpickle the values
+        pipe = frappe.cache().pipeline()
+        pipe.hgetall(WeeklyDigest.rollup_key(week))
+        return {frappe.safe_decode(field): int(value) for field, value in pipe.execute()[0].items()}
+
+    @staticmethod
+    def get_rollup(week):
+        """
+        Week's counters as {'total': {metric: n}, 'users': {user: {metric: n}}}
+        """
+        counters = WeeklyDigest.read_counters(week)
+        if not counters.get(COMPLETE_FIELD):
+            counters = WeeklyDigest.rebuild(week)
+
+        rollup = {'total': {metric: 0 for metric in DIGEST_METRICS}, 'users': {}}
+        for field, value in counters.items():
+            scope, _sep, rest = field.partition(':')
+            if scope == 'total':
+                rollup['total'][rest] = value
+            elif scope == 'user':
+                user, _sep, metric = rest.rpartition(':')
+                rollup['users'].setdefault(user, {})[metric] = value
+
+        return rollup
+
+    @staticmethod
+    def get_recipients():
+        return frappe.db.sql_list("""
+            SELECT audit_users.user
+            FROM (
+                SELECT user FROM `tabAudit Execution Team`
+                UNION
+                SELECT responsible_person FROM `tabAudit Finding`
+                WHERE responsible_person IS NOT NULL
+            ) audit_users
+            INNER JOIN `tabUser` u ON u.name = audit_users.user AND u.enabled = 1
+        """)
+
+    @staticmethod
+    def get_sent_recipients(week):
+        """
+        Users who already have this week's digest: the idempotency record
+
+        Recipients whose delivery failed are left out so the next run sends
+        to them again; pending ones are still being delivered.
+        """
+        recipient_doctype = frappe.get_meta('Audit Notification').get_field('recipients').options
+        return set(frappe.db.sql_list(f"""
+            SELECT recipient.user
+            FROM `tab{recipient_doctype}` recipient
+            INNER JOIN `tabAudit Notification` notification ON notification.name = recipient.parent
+            WHERE notification.notification_type = %s
+            AND notification.related_document = %s
+            AND recipient.parenttype = 'Audit Notification'
+            AND recipient.status != 'Failed'
+        """, (DIGEST_NOTIFICATION_TYPE, week)))
+
+    @staticmethod
+    def build_message(week, rollup, user):
+        start, end = WeeklyDigest.week_range(week)
+        total = rollup['total']
+        personal = rollup['users'].get(user, {})
+        resolution_rate = round(total['resolved_findings'] / max(total['new_findings'], 1) * 100, 1)
+
+        lines = [
+            f"Weekly Audit Activities Summary ({start.strftime('%B %d')} - {end.strftime('%B %d, %Y')}):",
+            "",
+            "📊 Key Metrics:"
+        ]
+        lines += [f"• {label}: {total.get(metric, 0)}" for metric, label in DIGEST_METRICS.items()]
+        lines += ["", "👤 Your Week:"]
+        lines += [f"• {label}: {personal.get(metric, 0)}" for metric, label in PERSONAL_METRICS.items()]
+        lines += [
+            "",
+            "📈 Progress:",
+            f"• Finding Resolution Rate: {resolution_rate}%",
+            "",
+            f"View Full Dashboard: {get_url()}/app/audit-dashboard"
+        ]
+        return "\n".join(lines)
+
+    @staticmethod
+    def send(week=None):
+        """
+        Send each audit user their digest for a week (default: last week)
+
+        Users recorded as already having the week's digest are skipped, and
+        a Redis lock keeps overlapping runs apart, so every user gets
+        exactly one digest per week.
+        """
+        from mkaguzi.utils.notifications import NotificationManager
+
+        week = week or WeeklyDigest.week_key(add_days(getdate(), -7))
+
+        cache = frappe.cache()
+        lock_key = cache.make_key(f"{DIGEST_LOCK_PREFIX}::{week}")
+        if not cache.set(lock_key, 1, ex=DIGEST_LOCK_TTL, nx=True):
+            return {'success': True, 'week': week, 'skipped': True, 'message': 'Digest already in progress'}
+
+        try:
+            rollup = WeeklyDigest.get_rollup(week)
+            already_sent = WeeklyDigest.get_sent_recipients(week)
+            _start, end = WeeklyDigest.week_range(week)
+
+            sent = 0
+            for user in WeeklyDigest.get_recipients():
+                if user in already_sent:
+                    continue
+
+                result = NotificationManager.send_notification(
+                    recipients=[user],
+                    subject=f"Weekly Audit Digest - {end.strftime('%B %d, %Y')}",
+                    message=WeeklyDigest.build_message(week, rollup, user),
+                    notification_type=DIGEST_NOTIFICATION_TYPE,
+                    related_document=week
+                )
+                if result.get('success'):
+                    sent += 1
+
+            frappe.db.commit()
+
+            # Give the new week a database baseline for its incremental counters
+            current_week = WeeklyDigest.week_key()
+            if not WeeklyDigest.read_counters(current_week).get(COMPLETE_FIELD):
+                WeeklyDigest.rebuild(current_week)
+
+            return {
+                'success': True,
+                'week': week,
+                'sent': sent,
+                'skipped_recipients': len(already_sent)
+            }
+
+        finally:
+            cache.delete(lock_key)
+
+
+# Document event handlers for hooks
+def on_audit_finding_insert(doc, method):
+    """Count a new finding in this week's rollup"""
+    WeeklyDigest.increment_after_commit('new_findings', users=[doc.responsible_person])
+
+
+def on_audit_finding_update(doc, method):
+    """Count a closed finding in the week of its closure date, as rebuild does"""
+    if doc.finding_status == 'Closed' and doc.has_value_changed('finding_status'):
+        WeeklyDigest.increment_after_commit('resolved_findings', users=[doc.responsible_person],
+            day=doc.closure_date)
+
+
+def on_audit_execution_update(doc, method):
+    """Count executed tests that were completed by this save"""
+    before = doc.get_doc_before_save()
+    previous = {test.name: test.status for test in before.executed_tests} if before else {}
+
+    completed = sum(
+        1 for test in doc.executed_tests
+        if test.status == 'Completed' and previous.get(test.name) != 'Completed'
+    )
+    if completed:
+        WeeklyDigest.increment_after_commit('completed_tests', users=[member.user for member in doc.execution_team],
+            count=completed)
+
+
+def on_compliance_execution_insert(doc, method):
+    """Count a compliance check executed in its week"""
+    WeeklyDigest.increment_after_commit('compliance_checks', day=doc.execution_date)
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the chunked analytics kernels
+"""
+
+import numpy as np
+import pandas as pd
+from frappe.tests.utils import FrappeTestCase
+
+from mkaguzi.utils.analytics_kernels import (
+    HashCounter, analyze_outliers, analyze_trends, check_completeness, check_validity,
+    detect_duplicates, merge_moments
+)
+
+
+def chunked(frame, size):
+    """read_chunks callable yielding the frame in slices of size rows"""
+    return lambda: (frame.iloc[start:start + size] for start in range(0, len(frame), size))
+
+
+class TestDuplicateKernel(FrappeTestCase):
+
+    frame = pd.DataFrame({
+        'invoice': ['INV-1', 'inv-1 ', 'INV-2', 'INV-3', 'INV-2', 'INV-1'],
+        'vendor': ['A', 'a', 'B', 'C', 'B', 'A'],
+        'amount': [10, 10, 20, 30, 20, 10]
+    })
+
+    def test_groups_normalized_keys_across_chunks(self):
+        rows = detect_duplicates(chunked(self.frame, 2), ['invoice', 'vendor'])
+
+        self.assertEqual(len(rows), 5)
+        self.assertEqual([row['duplicate_count'] for row in rows], [3, 3, 3, 2, 2])
+        self.assertEqual(len({row['duplicate_key'] for row in rows[:3]}), 1)
+        self.assertEqual({row['invoice'] for row in rows[3:]}, {'INV-2'})
+        self.assertTrue(all(row['exception_found'] for row in rows))
+
+    def test_exact_keys(self):
+        rows = detect_duplicates(chunked(self.frame, 4), ['invoice', 'vendor'], normalize=False)
+        self.assertEqual(sorted(row['invoice'] for row in rows), ['INV-1', 'INV-1', 'INV-2', 'INV-2'])
+
+    def test_max_results_and_no_duplicates(self):
+        self.assertEqual(len(detect_duplicates(chunked(self.frame, 6), ['invoice'], max_results=2)), 2)
+        self.assertEqual(
+            sorted(row['amount'] for row in detect_duplicates(chunked(self.frame, 6), ['amount', 'invoice'], normalize=False)),
+            [10, 10, 20, 20]
+        )
+        self.assertEqual(detect_duplicates(chunked(self.frame.iloc[2:4], 6), ['invoice']), [])
+
+    def test_hash_counter_compacts(self):
+        counter = HashCounter()
+        for _i in range(40):
+            counter.add(np.array([1, 2, 2], dtype=np.uint64))
+
+        self.assertLess(len(counter.parts), 16)
+        hashes, counts = counter.duplicated()
+        self.assertEqual(hashes.tolist(), [1, 2])
+        self.assertEqual(counts.tolist(), [40, 80])
+
+
+class TestOutlierKernel(FrappeTestCase):
+
+    frame = pd.DataFrame({
+        'entry': range(22),
+        'amount': [10, 11, 9, 10, 12, 8, 10, 11, 9, 10, 10, 11, 9, 10, 12, 8, 10, 11, 9, 10, 500, 'n/a']
+    })
+
+    def test_merge_moments_matches_numpy(self):
+        values = np.random.default_rng(1).normal(50, 10, 1000)
+        moments = (0, 0.0, 0.0)
+        for part in np.array_split(values, 9):
+            moments = merge_moments(moments, part)
+
+        count, mean, m2 = moments
+        self.assertEqual(count, 1000)
+        self.assertAlmostEqual(mean, values.mean())
+        self.assertAlmostEqual(m2 / count, values.var())
+
+    def test_methods_flag_the_outlier(self):
+        for method in ('zscore', 'iqr', 'mad'):
+            rows = analyze_outliers(chunked(self.frame, 5), 'amount', method=method)
+            self.assertEqual([row['entry'] for row in rows], [20], method)
+            self.assertEqual(rows[0]['outlier_method'], method)
+
+    def test_zscore_matches_population_deviation(self):
+        values = pd.to_numeric(self.frame['amount'], errors='coerce').dropna()
+        expected = abs(500 - values.mean()) / values.std(ddof=0)
+
+        rows = analyze_outliers(chunked(self.frame, 7), 'amount', threshold=1)
+        self.assertAlmostEqual(rows[0]['outlier_score'], round(expected, 4))
+
+    def test_constant_values(self):
+        frame = pd.DataFrame({'amount': [5] * 10})
+        self.assertEqual(analyze_outliers(chunked(frame, 3), 'amount'), [])
+
+    def test_max_results_keeps_highest_scores(self):
+        frame = pd.DataFrame({'entry': range(12), 'amount': [0] * 8 + [100, 300, 200, 400]})
+        rows = analyze_outliers(chunked(frame, 5), 'amount', threshold=0.5, max_results=2)
+        self.assertEqual([row['entry'] for row in rows], [11, 9])
+
+
+class TestTrendKernel(FrappeTestCase):
+
+    def test_flags_periods_against_rolling_baseline(self):
+        frame = pd.DataFrame({
+            'date': ['2025-01-05', '2025-01-20', '2025-02-10', '2025-04-01', '2025-05-15', '2025-06-01'],
+            'amount': [50, 50, 100, 100, 400, 100]
+        })
+        rows = analyze_trends(chunked(frame, 2), 'date', 'amount', window=2, threshold_percent=50)
+
+        self.assertEqual([row['period'] for row in rows],
+            ['2025-01', '2025-02', '2025-03', '2025-04', '2025-05', '2025-06'])
+        self.assertEqual([row['total'] for row in rows], [100, 100, 0, 100, 400, 100])
+        self.assertIsNone(rows[1]['baseline'])
+        self.assertEqual(rows[2]['baseline'], 100)
+        self.assertEqual(rows[2]['change_percent'], -100)
+        self.assertEqual(rows[4]['change_percent'], 700)
+        self.assertEqual(rows[5]['change_percent'], -60)
+        self.assertEqual([row['exception_found'] for row in rows], [False, False, True, True, True, True])
+
+    def test_counts_rows_without_value_field(self):
+        frame = pd.DataFrame({'date': ['2025-01-01', '2025-01-02', '2025-02-01']})
+        rows = analyze_trends(chunked(frame, 1), 'date', window=1)
+        self.assertEqual([row['total'] for row in rows], [2, 1])
+        self.assertEqual([row['record_count'] for row in rows], [2, 1])
+
+
+class TestDataQualityKernels(FrappeTestCase):
+
+    frame = pd.DataFrame({
+        'code': ['A1', 'B2', '', None, 'c3', 'D4'],
+        'amount': ['10', '1.5', 'x', '', '7', None],
+        'count': ['1', '2.0', '2.5', 'three', None, '4'],
+        'posted': ['2025-01-01', 'not a date', '01/02/2025', None, '', '2025-13-40'],
+        'active': ['yes', 'N', 'maybe', '1', None, 'true']
+    })
+
+    def test_completeness(self):
+        rows = {row['field']: row for row in check_completeness(chunked(self.frame, 4),
+            fields=['code', 'amount'], required_fields=['code'], max_missing_percent=10)}
+
+        self.assertEqual(rows['code']['missing_count'], 2)
+        self.assertEqual(rows['code']['missing_percent'], 33.33)
+        self.assertTrue(rows['code']['exception_found'])
+        self.assertEqual(rows['amount']['missing_count'], 2)
+        self.assertFalse(rows['amount']['exception_found'])
+
+    def test_validity(self):
+        rows = {row['field']: row for row in check_validity(chunked(self.frame, 4), [
+            {'field': 'amount', 'field_type': 'Float'},
+            {'field': 'count', 'field_type': 'Integer'},
+            {'field': 'posted', 'field_type': 'Date'},
+            {'field': 'active', 'field_type': 'Boolean'},
+            {'field': 'code', 'field_type': 'Data', 'validation_rule': '[A-Z][0-9]'}
+        ])}
+
+        self.assertEqual((rows['amount']['checked_rows'], rows['amount']['invalid_count']), (4, 1))
+        self.assertEqual(rows['amount']['sample_invalid_values'], 'x')
+        self.assertEqual(rows['count']['invalid_count'], 2)
+        self.assertEqual(rows['posted']['invalid_count'], 2)
+        self.assertEqual(rows['active']['sample_invalid_values'], 'maybe')
+        self.assertEqual(rows['code']['invalid_count'], 1)
+        self.assertEqual(rows['code']['invalid_percent'], 25)
+        self.assertTrue(all(row['exception_found'] for row in rows.values()))
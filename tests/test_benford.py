@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the streaming Benford's Law analyzer
+"""
+
+import numpy as np
+from frappe.tests.utils import FrappeTestCase
+
+from mkaguzi.utils.benford import BenfordAnalyzer, expected_distributions
+
+
+def leading_digits(amount):
+    """Reference: the first two digits of an amount's decimal string"""
+    digits = f"{abs(amount):.6f}".lstrip('0.').replace('.', '')
+    return int(digits[:2])
+
+
+class TestBenfordAnalyzer(FrappeTestCase):
+    """Digit counts must match the string-based definition"""
+
+    def test_expected_distributions(self):
+        expected = expected_distributions()
+        for test in expected:
+            self.assertAlmostEqual(expected[test].sum(), 1.0)
+
+        self.assertAlmostEqual(expected['first_digit'][1], 0.30103, places=5)
+        self.assertAlmostEqual(expected['second_digit'][0], 0.11968, places=5)
+
+    def test_first_two_digits(self):
+        amounts = np.array([10, 19.99, 99, 100, 1000, 1234.5, 99999, 1e6, 7.5e7, 45.0])
+        self.assertEqual(BenfordAnalyzer.first_two_digits(amounts).tolist(),
+            [leading_digits(amount) for amount in amounts])
+
+    def test_counts_match_reference(self):
+        rng = np.random.default_rng(7)
+        amounts = np.round(10 ** rng.uniform(1, 7, 5000), 2)
+
+        analyzer = BenfordAnalyzer()
+        for chunk in np.array_split(amounts, 7):
+            analyzer.add(chunk)
+
+        leading = np.array([leading_digits(amount) for amount in amounts])
+        self.assertEqual(analyzer.total, len(amounts))
+        self.assertEqual(analyzer.counts['first_digit'].tolist(),
+            np.bincount(leading // 10, minlength=10).tolist())
+        self.assertEqual(analyzer.counts['second_digit'].tolist(),
+            np.bincount(leading % 10, minlength=10).tolist())
+        self.assertEqual(analyzer.counts['first_two_digits'].tolist(),
+            np.bincount(leading, minlength=100).tolist())
+        self.assertEqual(analyzer.counts['last_two_digits'].tolist(),
+            np.bincount(amounts.astype(np.int64) % 100, minlength=100).tolist())
+
+    def test_skips_small_and_invalid_amounts(self):
+        analyzer = BenfordAnalyzer()
+        analyzer.add([5, 9.99, np.nan, np.inf, -250, 0, 12])
+
+        self.assertEqual(analyzer.total, 2)
+        self.assertEqual(analyzer.counts['first_digit'][1], 1)
+        self.assertEqual(analyzer.counts['first_digit'][2], 1)
+
+    def test_benford_data_conforms(self):
+        rng = np.random.default_rng(11)
+        analyzer = BenfordAnalyzer()
+        analyzer.add(10 ** rng.uniform(1, 8, 200000))
+
+        result = analyzer.test_result('first_digit')
+        self.assertEqual(result['conformity'], 'Close Conformity')
+        self.assertEqual(result['records'], 200000)
+        self.assertEqual([row['digit'] for row in result['distribution']], list(range(1, 10)))
+
+    def test_uniform_data_does_not_conform(self):
+        rng = np.random.default_rng(3)
+        analyzer = BenfordAnalyzer()
+        analyzer.add(rng.uniform(100, 999, 50000))
+
+        self.assertEqual(analyzer.test_result('first_digit')['conformity'], 'Nonconformity')
+        self.assertIsNone(analyzer.test_result('last_two_digits')['conformity'])
+
+    def test_empty_result(self):
+        result = BenfordAnalyzer().test_result('first_digit')
+        self.assertEqual(result['records'], 0)
+        self.assertEqual(result['mad'], 0.0)
+
+    def test_segments(self):
+        analyzer = BenfordAnalyzer()
+        analyzer.add([100, 200, 150, 5, 900], segments=['A', 'B', 'A', 'B', 'C'])
+        analyzer.add([120], segments=['C'])
+
+        counts = {label: analyzer.segment_counts[row].tolist() for label, row in analyzer.segment_index.items()}
+        self.assertEqual(counts['A'][1], 2)
+        self.assertEqual(sum(counts['B']), 1)
+        self.assertEqual(counts['C'][1], 1)
+        self.assertEqual(counts['C'][9], 1)
+
+        results = analyzer.segment_results(min_records=2)
+        self.assertEqual({result['segment'] for result in results}, {'A', 'C'})
+        self.assertEqual(results, sorted(results, key=lambda result: result['mad'], reverse=True))
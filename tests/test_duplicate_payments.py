@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the duplicate payment sort-and-sweep
+"""
+
+import random
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from frappe.tests.utils import FrappeTestCase
+
+from mkaguzi.api.analytics import find_duplicate_payments, invoice_number_similarity
+
+
+def brute_force_pairs(payments, start_date, end_date, tolerance_amount, date_range_days):
+    """The self-join the sweep replaces: every pair compared directly"""
+    pairs = set()
+    for first in payments:
+        for second in payments:
+            if first[0] != second[0] or first[2] >= second[2]:
+                continue
+            if abs(first[4] - second[4]) > tolerance_amount:
+                continue
+            if abs((second[3] - first[3]).days) > date_range_days:
+                continue
+            if start_date <= first[3] <= end_date:
+                pairs.add((first[2], second[2]))
+    return pairs
+
+
+class TestFindDuplicatePayments(FrappeTestCase):
+    """The sweep must find exactly the pairs of the self-join"""
+
+    start_date = date(2025, 1, 1)
+    end_date = date(2025, 3, 31)
+
+    def make_payments(self, count, seed):
+        rng = random.Random(seed)
+        payments = []
+        for i in range(count):
+            vendor = f"V{rng.randint(1, 5):03d}"
+            payments.append((
+                vendor,
+                f"Vendor {vendor}",
+                f"PAY-{i:05d}",
+                self.start_date + timedelta(days=rng.randint(-20, 110)),
+                float(rng.choice([100, 250, 250.5, 1000, 1000.25, 1001, 5000])),
+                f"INV-{rng.randint(1, 30):04d}"
+            ))
+        payments.sort(key=lambda row: (row[0], row[3]))
+        return payments
+
+    def find(self, payments, tolerance_amount, date_range_days, **kwargs):
+        window_start = self.start_date - timedelta(days=date_range_days)
+        window_end = self.end_date + timedelta(days=date_range_days)
+        rows = [row for row in payments if window_start <= row[3] <= window_end]
+        with patch('mkaguzi.api.analytics.run_query', return_value=rows):
+            return find_duplicate_payments(self.start_date, self.end_date, tolerance_amount,
+                date_range_days, **kwargs)
+
+    def test_matches_brute_force(self):
+        for seed in range(5):
+            payments = self.make_payments(200, seed)
+            for tolerance_amount, date_range_days in [(0, 7), (0.5, 30), (2, 0), (5000, 14)]:
+                result = self.find(payments, tolerance_amount, date_range_days)
+                self.assertEqual(
+                    {(row['doc_no_1'], row['doc_no_2']) for row in result},
+                    brute_force_pairs(payments, self.start_date, self.end_date,
+                        tolerance_amount, date_range_days),
+                    f"seed {seed}, tolerance {tolerance_amount}, days {date_range_days}"
+                )
+
+    def test_pair_fields(self):
+        payments = [
+            ('V001', 'Acme', 'PAY-2', date(2025, 1, 10), 500.0, 'inv 42'),
+            ('V001', 'Acme', 'PAY-1', date(2025, 1, 12), 500.0, 'INV-0042'),
+            ('V002', 'Other', 'PAY-3', date(2025, 1, 12), 500.0, 'INV-0042')
+        ]
+        result = self.find(payments, 0, 7)
+
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result[0]['doc_no_1'], 'PAY-1')
+        self.assertEqual(result[0]['doc_no_2'], 'PAY-2')
+        self.assertEqual(result[0]['days_apart'], 2)
+        self.assertEqual(result[0]['invoice_similarity'], 1.0)
+
+    def test_recurring_payments(self):
+        payments = [
+            ('V001', 'Landlord', f"RENT-{i:03d}", self.start_date + timedelta(days=7 * i), 1000.0, f"R{i}")
+            for i in range(-3, 16)
+        ]
+        payments.append(('V001', 'Landlord', 'RENT-DUP', date(2025, 2, 13), 1000.0, 'R6'))
+
+        result = self.find(payments, 0, 3)
+        self.assertEqual({(row['doc_no_1'], row['doc_no_2']) for row in result}, {('RENT-006', 'RENT-DUP')})
+
+    def test_tolerance_across_bucket_edges(self):
+        payments = [
+            ('V001', 'Acme', 'PAY-1', date(2025, 1, 10), 0.1, ''),
+            ('V001', 'Acme', 'PAY-2', date(2025, 1, 10), 0.3, ''),
+            ('V001', 'Acme', 'PAY-3', date(2025, 1, 10), 0.51, ''),
+            ('V001', 'Acme', 'PAY-4', date(2025, 1, 10), 1.0, '')
+        ]
+        for tolerance_amount in (0.2, 0.21, 0.5):
+            result = self.find(payments, tolerance_amount, 0)
+            self.assertEqual(
+                {(row['doc_no_1'], row['doc_no_2']) for row in result},
+                brute_force_pairs(payments, self.start_date, self.end_date, tolerance_amount, 0),
+                tolerance_amount
+            )
+
+    def test_require_invoice_match(self):
+        payments = [
+            ('V001', 'Acme', 'PAY-1', date(2025, 1, 10), 500.0, 'A-100'),
+            ('V001', 'Acme', 'PAY-2', date(2025, 1, 11), 500.0, 'ZZ-999')
+        ]
+        self.assertEqual(len(self.find(payments, 0, 7)), 1)
+        self.assertEqual(self.find(payments, 0, 7, require_invoice_match=True), [])
+
+    def test_no_payments(self):
+        self.assertEqual(self.find([], 0, 7), [])
+
+    def test_invoice_number_similarity(self):
+        self.assertEqual(invoice_number_similarity('INV-0042', 'inv 42'), 1.0)
+        self.assertEqual(invoice_number_similarity('', 'INV-1'), 0.0)
+        self.assertLess(invoice_number_similarity('INV-1001', 'PO-77'), 0.5)
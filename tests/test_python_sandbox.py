@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the Python Script test sandbox
+"""
+
+import shutil
+import unittest
+from unittest.mock import patch
+
+import frappe
+import pandas as pd
+from frappe.tests.utils import FrappeTestCase
+
+from mkaguzi.utils.python_sandbox import PythonSandbox, SandboxError, SandboxWorker
+
+
+class TestPythonSandbox(FrappeTestCase):
+    """Scripts must not reach the host's processes, files or network"""
+
+    def test_refuses_to_run_without_isolation(self):
+        """Without bubblewrap no worker is started"""
+        with patch('mkaguzi.utils.python_sandbox.shutil.which', return_value=None):
+            with self.assertRaises(SandboxError):
+                SandboxWorker.get_command(512)
+
+    def test_command_mounts_no_shell_or_bench(self):
+        """Only libraries and the interpreter are mounted"""
+        with patch('mkaguzi.utils.python_sandbox.shutil.which', return_value='/usr/bin/bwrap'):
+            command = SandboxWorker.get_command(512)
+
+        self.assertIn('--unshare-all', command)
+        mounts = [command[i + 2] for i, arg in enumerate(command) if arg == '--ro-bind']
+        self.assertNotIn('/usr', mounts)
+        self.assertNotIn('/usr/bin', mounts)
+        self.assertNotIn('/etc', mounts)
+        self.assertFalse(any(path.startswith(frappe.get_site_path()) for path in mounts))
+
+
+@unittest.skipUnless(shutil.which('bwrap'), "bubblewrap is not installed")
+class TestPythonSandboxEscapes(FrappeTestCase):
+    """Regression tests for escapes through the pandas and numpy modules"""
+
+    def run_script(self, script, data=None):
+        return PythonSandbox.run(script, data, cpu_seconds=10)
+
+    def test_runs_scripts(self):
+        result = self.run_script("result = data.assign(total=data.amount * 2)", pd.DataFrame({'amount': [1, 2]}))
+        self.assertEqual(result['total'].tolist(), [2, 4])
+
+    def test_no_shell_through_pandas(self):
+        with self.assertRaises(SandboxError):
+            self.run_script("result = pd.io.common.os.popen('id').read()")
+
+    def test_no_host_files(self):
+        with self.assertRaises(SandboxError):
+            self.run_script("result = pd.read_csv('/etc/passwd')")
+
+        site_config = frappe.get_site_path('site_config.json')
+        with self.assertRaises(SandboxError):
+            self.run_script(f"result = pd.read_json({site_config!r})")
+
+    def test_no_network(self):
+        with self.assertRaises(SandboxError):
+            self.run_script("result = pd.read_csv('http://example.com/data.csv')")
+
+    def test_blocked_imports(self):
+        with self.assertRaises(SandboxError):
+            self.run_script("import os\nresult = os.listdir('/')")
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for reconciliation matching
+"""
+
+from datetime import date
+from types import SimpleNamespace
+
+import pandas as pd
+from frappe.tests.utils import FrappeTestCase
+
+from mkaguzi.utils.reconciliation import ReconciliationEngine
+
+
+class TestMatchBalances(FrappeTestCase):
+    """Ledger balances joined to control balances on their key"""
+
+    def match(self, ledger, control, **kwargs):
+        return ReconciliationEngine.match_balances(
+            pd.DataFrame(ledger), pd.DataFrame(control), 'customer_no', 'ledger_balance', 'gl_balance',
+            'Missing in Ledger', **kwargs
+        )
+
+    def test_statuses_and_order(self):
+        result = self.match(
+            {'customer_no': ['C3', 'C1', 'C2'], 'customer_name': ['Gamma', 'Alpha', 'Beta'],
+             'ledger_balance': [300.0, 100.0, 200.0]},
+            {'customer_no': ['C1', 'C4', 'C3'], 'gl_balance': [100.005, 50.0, 250.0]},
+            control_only_defaults={'customer_name': 'Unknown'}
+        )
+
+        self.assertEqual(result['customer_no'].tolist(), ['C3', 'C1', 'C2', 'C4'])
+        self.assertEqual(result['status'].tolist(), ['Unmatched', 'Matched', 'Unmatched', 'Missing in Ledger'])
+        self.assertEqual(result['difference'].round(3).tolist(), [50.0, -0.005, 200.0, -50.0])
+        self.assertEqual(result['customer_name'].tolist(), ['Gamma', 'Alpha', 'Beta', 'Unknown'])
+        self.assertEqual(result.loc[3, 'ledger_balance'], 0)
+
+    def test_first_control_row_wins(self):
+        result = self.match(
+            {'customer_no': ['C1'], 'ledger_balance': [100.0]},
+            {'customer_no': ['C1', 'C1'], 'gl_balance': [100.0, 999.0]}
+        )
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result.loc[0, 'status'], 'Matched')
+
+    def test_tolerance_and_columns(self):
+        result = self.match(
+            {'customer_no': ['C1'], 'ledger_balance': [100.0]},
+            {'customer_no': ['C1'], 'gl_balance': [99.0]},
+            columns=['customer_no', 'status'], tolerance=1
+        )
+        self.assertEqual(result.columns.tolist(), ['customer_no', 'status'])
+        self.assertEqual(result.loc[0, 'status'], 'Matched')
+
+    def test_matches_lookup_on_larger_frames(self):
+        ledger = pd.DataFrame({'customer_no': [f"C{i}" for i in range(0, 300, 2)], 'ledger_balance': range(150)})
+        control = pd.DataFrame({'customer_no': [f"C{i}" for i in range(0, 300, 3)],
+                                'gl_balance': [i % 7 for i in range(100)]})
+        result = self.match(ledger, control)
+
+        lookup = dict(zip(control['customer_no'], control['gl_balance']))
+        expected = [
+            'Matched' if abs(balance - lookup.get(key, 0)) <= 0.01 else 'Unmatched'
+            for key, balance in zip(ledger['customer_no'], ledger['ledger_balance'])
+        ]
+        missing = [key for key in control['customer_no'] if key not in set(ledger['customer_no'])]
+
+        self.assertEqual(result['status'].tolist(), expected + ['Missing in Ledger'] * len(missing))
+        self.assertEqual(result['customer_no'].tolist()[len(ledger):], missing)
+
+
+class TestMatchStatementLines(FrappeTestCase):
+    """Statement lines paired with open GL items on amount and date"""
+
+    def items(self, *rows):
+        return [SimpleNamespace(net_amount=amount, posting_date=posting_date) for amount, posting_date in rows]
+
+    def test_closest_date_within_tolerance(self):
+        open_items = self.items(
+            (100, date(2025, 1, 1)),
+            (100, date(2025, 1, 9)),
+            (100.005, date(2025, 1, 11)),
+            (250, date(2025, 1, 10))
+        )
+        lines = [
+            {'amount': 100, 'date': date(2025, 1, 10)},
+            {'amount': 100, 'date': date(2025, 1, 10)},
+            {'amount': 100, 'date': date(2025, 1, 10)},
+            {'amount': 250, 'date': date(2025, 1, 20)}
+        ]
+        matches, unmatched = ReconciliationEngine.match_statement_lines(open_items, lines)
+
+        self.assertIs(matches[1], lines[0])
+        self.assertIs(matches[2], lines[1])
+        self.assertNotIn(0, matches)
+        self.assertEqual(unmatched, [lines[2], lines[3]])
+
+    def test_amount_tolerance(self):
+        open_items = self.items((100.02, date(2025, 1, 1)), (99.5, date(2025, 1, 1)))
+        lines = [{'amount': 100, 'date': date(2025, 1, 1)}]
+
+        matches, unmatched = ReconciliationEngine.match_statement_lines(open_items, lines)
+        self.assertEqual((matches, unmatched), ({}, lines))
+
+        matches, unmatched = ReconciliationEngine.match_statement_lines(open_items, lines, amount_tolerance=0.05)
+        self.assertEqual(list(matches), [0])
+        self.assertEqual(unmatched, [])
+
+    def test_each_item_clears_one_line(self):
+        open_items = self.items((-40, date(2025, 2, 1)))
+        lines = [{'amount': -40, 'date': date(2025, 2, 2)}, {'amount': -40, 'date': date(2025, 2, 1)}]
+
+        matches, unmatched = ReconciliationEngine.match_statement_lines(open_items, lines)
+        self.assertIs(matches[0], lines[0])
+        self.assertEqual(unmatched, [lines[1]])
+
+    def test_empty_inputs(self):
+        lines = [{'amount': 1, 'date': date(2025, 1, 1)}]
+        self.assertEqual(ReconciliationEngine.match_statement_lines([], lines), ({}, lines))
+        self.assertEqual(ReconciliationEngine.match_statement_lines(self.items((1, date(2025, 1, 1))), []), ({}, []))
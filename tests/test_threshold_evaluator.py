@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for compiled threshold evaluation
+"""
+
+from types import SimpleNamespace
+
+import pandas as pd
+from frappe.tests.utils import FrappeTestCase
+
+from mkaguzi.utils import thresholds
+from mkaguzi.utils.thresholds import ThresholdEvaluator, get_threshold_evaluator
+
+
+def threshold(name, comparison_operator, value, level='Warning'):
+    return SimpleNamespace(threshold_name=name, comparison_operator=comparison_operator,
+        threshold_value=value, notification_level=level)
+
+
+class TestThresholdEvaluator(FrappeTestCase):
+    """Threshold names select an aggregate and column of the result"""
+
+    rows = [
+        {'amount': 100, 'exception_found': 1, 'vendor': 'A'},
+        {'amount': 250, 'exception_found': 0, 'vendor': 'B'},
+        {'amount': 50, 'exception_found': 1, 'vendor': ''},
+        {'amount': None, 'exception_found': None, 'vendor': 'C'}
+    ]
+
+    def evaluate(self, *checks, result=None):
+        return ThresholdEvaluator(checks).evaluate(self.rows if result is None else result)
+
+    def actual(self, name):
+        status, _severity, breaches = self.evaluate(threshold(name, '>=', float('-inf')))
+        self.assertEqual(status, 'Fail')
+        return breaches[0]['actual_value']
+
+    def test_parse_name(self):
+        self.assertEqual(ThresholdEvaluator.parse_name('sum:amount'), ('sum', 'amount'))
+        self.assertEqual(ThresholdEvaluator.parse_name(' Percentage : flag '), ('percentage', 'flag'))
+        self.assertEqual(ThresholdEvaluator.parse_name('count'), ('count', None))
+        self.assertEqual(ThresholdEvaluator.parse_name('amount'), ('first', 'amount'))
+        self.assertEqual(ThresholdEvaluator.parse_name('ratio:amount'), ('first', 'ratio:amount'))
+
+    def test_aggregates(self):
+        self.assertEqual(self.actual('count'), 4)
+        self.assertEqual(self.actual('count:exception_found'), 2)
+        self.assertEqual(self.actual('count:vendor'), 3)
+        self.assertEqual(self.actual('percentage:exception_found'), 50)
+        self.assertEqual(self.actual('sum:amount'), 400)
+        self.assertEqual(self.actual('max:amount'), 250)
+        self.assertEqual(self.actual('min:amount'), 50)
+        self.assertAlmostEqual(self.actual('mean:amount'), 400 / 3)
+
+    def test_plain_column_compares_first_row(self):
+        self.assertEqual(self.actual('amount'), 100)
+        status, _severity, _breaches = self.evaluate(threshold('amount', '>', 200))
+        self.assertEqual(status, 'Pass')
+
+    def test_operators(self):
+        for comparison_operator, value, breached in [
+            ('>', 4, False), ('>=', 4, True), ('<', 5, True), ('<=', 3, False), ('==', 4, True)
+        ]:
+            status, _severity, _breaches = self.evaluate(threshold('count', comparison_operator, value))
+            self.assertEqual(status, 'Fail' if breached else 'Pass', comparison_operator)
+
+    def test_severity_is_highest_breached(self):
+        status, severity, breaches = self.evaluate(
+            threshold('count', '>', 1, 'Warning'),
+            threshold('sum:amount', '>', 300, 'Critical'),
+            threshold('max:amount', '>', 1000, 'Error')
+        )
+        self.assertEqual(status, 'Fail')
+        self.assertEqual(severity, 'Critical')
+        self.assertEqual([breach['threshold_name'] for breach in breaches], ['count', 'sum:amount'])
+
+    def test_missing_columns_and_unknown_operators_are_skipped(self):
+        status, severity, breaches = self.evaluate(
+            threshold('sum:missing', '>', 0),
+            threshold('count', '!=', 0),
+            threshold('sum:vendor', '>', 0)
+        )
+        self.assertEqual((status, severity, breaches), ('Pass', 'Low', []))
+
+    def test_result_shapes(self):
+        check = threshold('count', '>', 2)
+        self.assertEqual(self.evaluate(check, result=pd.DataFrame(self.rows))[0], 'Fail')
+        self.assertEqual(self.evaluate(check, result=[1, 2, 3])[0], 'Fail')
+        self.assertEqual(self.evaluate(check, result=[])[0], 'Pass')
+        self.assertEqual(self.evaluate(check, result={'count': 10})[0], 'Pass')
+
+
+class TestThresholdEvaluatorCache(FrappeTestCase):
+    """Evaluators are reused until a test's threshold rows change"""
+
+    def setUp(self):
+        thresholds._evaluators.clear()
+
+    def test_cache_follows_threshold_rows(self):
+        test = SimpleNamespace(name='TEST-1', threshold_settings=[threshold('count', '>', 1)])
+        evaluator = get_threshold_evaluator(test)
+        self.assertIs(get_threshold_evaluator(test), evaluator)
+
+        test.threshold_settings = [threshold('count', '>', 5)]
+        changed = get_threshold_evaluator(test)
+        self.assertIsNot(changed, evaluator)
+        self.assertEqual(changed.evaluate([1, 2, 3])[0], 'Pass')
+        self.assertEqual(len(thresholds._evaluators), 1)